@@ -0,0 +1,15 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+import runpy
+
+# Share the role module_utils with the controller side plugins, see module_utils/qem_paths.py
+runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))
+
+from ansible.module_utils.qem_action import QemActionBase
+
+
+class ActionModule(QemActionBase):
+    # Runs the qem_endpoint module in the controller process, see module_utils/qem_action.py
+    pass
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# Times N sequential qem_task_status tasks run through the action plugins (in the controller process)
+# and as regular modules (AnsiballZ), against the QEM pointed by the QEM_* environment variables.
+#
+#   QEM_HOSTNAME=... QEM_DOMAIN=... QEM_USERNAME=... QEM_PASSWORD=... \
+#   python benchmarks/action_plugin_benchmark.py --server "My Sample Server" --task "My Task" --runs 500
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_playbook(directory, server, task, runs, state):
+    # One task per run (no loop): Ansible forks a worker per task, as in a real play
+    step = '  - qem_task_status: {{name: {0}, server: {1}, state: {2}}}\n'.format(json.dumps(task), json.dumps(server), state)
+    path = os.path.join(directory, 'benchmark.yml')
+    with open(path, 'w') as playbook:
+        playbook.write('- hosts: localhost\n  connection: local\n  gather_facts: false\n  tasks:\n')
+        playbook.write(step * runs)
+    return path
+
+
+def run_playbook(playbook, in_process, ansible_playbook):
+    env = dict(os.environ)
+    env['ANSIBLE_ACTION_PLUGINS'] = os.path.join(ROLE_DIR, 'action_plugins')
+    env['ANSIBLE_LIBRARY'] = os.path.join(ROLE_DIR, 'library')
+    env['ANSIBLE_MODULE_UTILS'] = os.path.join(ROLE_DIR, 'module_utils')
+    env['QEM_ACTION_IN_PROCESS'] = 'true' if in_process else 'false'
+    start = time.time()
+    process = subprocess.Popen([ansible_playbook, '-i', 'localhost,', playbook], env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    elapsed = time.time() - start
+    if process.returncode != 0:
+        sys.stderr.write(output.decode('utf-8', 'replace'))
+        raise SystemExit('ansible-playbook failed ({0})'.format(process.returncode))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time qem_task_status run through the action plugins and as modules')
+    parser.add_argument('--server', required=True)
+    parser.add_argument('--task', required=True)
+    parser.add_argument('--state', default='started', help='a no-op state for the task so only the module overhead is measured')
+    parser.add_argument('--runs', type=int, default=500)
+    parser.add_argument('--ansible-playbook', default='ansible-playbook')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='qem-benchmark-')
+    playbook = write_playbook(directory, args.server, args.task, args.runs, args.state)
+    results = dict(runs=args.runs)
+    for label, in_process in (('module', False), ('action_plugin', True)):
+        elapsed = run_playbook(playbook, in_process, args.ansible_playbook)
+        results[label] = dict(total=round(elapsed, 3), per_run=round(elapsed / args.runs, 4))
+    results['speedup'] = round(results['module']['total'] / results['action_plugin']['total'], 2)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
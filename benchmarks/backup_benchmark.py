@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# Compares full export dumps with the incremental content-addressed backup (module_utils/qem_backup.py) on a synthetic
+# fleet, no QEM is needed: the exports are generated in memory by a stand-in client.
+#
+#   python benchmarks/backup_benchmark.py --servers 10 --tasks 100 --change-ratio 0.01
+
+import argparse
+import json
+import os
+import random
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+
+# Makes the role module_utils importable, see module_utils/qem_paths.py
+ROLE_DIR = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))['ROLE_DIR']
+
+from ansible.module_utils.qem_backup import BackupStore
+from ansible.module_utils.qem_export import safe_file_name, stream_to_file
+from ansible.module_utils.qem_parallel import run_parallel
+
+
+def synthetic_task(server, index, revision, table_count):
+    return {
+        'task': {'name': 'task-{0:04d}'.format(index), 'source_name': 'src-{0}'.format(index), 'task_uuid': '{0}-{1}-{2}'.format(server, index, revision)},
+        'source': {'rep_source': {'source_name': 'src-{0}'.format(index), 'database_name': 'src-{0}'.format(index)},
+                   'source_tables': {'explicit_included_tables': [{'owner': server.upper(), 'name': 'TABLE_{0}_{1}'.format(index, table)} for table in range(table_count)]}},
+        'targets': [{'rep_target': {'target_name': 'tgt-{0}'.format(index), 'database_name': 'tgt-{0}'.format(index)}}],
+        'task_settings': {'revision': revision, 'target_settings': {'max_transaction_size': 1024, 'create_pk_after_data_load': False}},
+    }
+
+
+def synthetic_endpoint(server, name, role):
+    return {'name': name, 'role': role, 'is_licensed': True, 'type_id': 'ORACLE_COMPONENT_TYPE',
+            'db_settings': {'$type': 'OracleSettings', 'username': 'scott', 'server': '//{0}.{1}.contoso.com:1521'.format(name, server)}}
+
+
+class SyntheticFleet(object):
+    # Stand-in for AemClient.export_all_to, a task revision bump changes its export
+
+    def __init__(self, servers, tasks, table_count):
+        self.servers = ['server-{0:02d}'.format(server) for server in range(servers)]
+        self.tasks = tasks
+        self.table_count = table_count
+        self.revisions = dict(((server, index), 0) for server in self.servers for index in range(tasks))
+
+    def change(self, ratio):
+        for key in random.sample(sorted(self.revisions), int(len(self.revisions) * ratio)):
+            self.revisions[key] += 1
+
+    def export_all_to(self, server, output):
+        tasks = [synthetic_task(server, index, self.revisions[(server, index)], self.table_count) for index in range(self.tasks)]
+        databases = [synthetic_endpoint(server, 'src-{0}'.format(index), 'SOURCE') for index in range(self.tasks)]
+        databases += [synthetic_endpoint(server, 'tgt-{0}'.format(index), 'TARGET') for index in range(self.tasks)]
+        document = {'name': server, '_version': {'version': '6.6.0.1'},
+                    'cmd.replication_definition': {'tasks': tasks, 'databases': databases, 'error_behavior': {}}}
+        output.write(json.dumps(document, indent=4).encode('utf-8'))
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, dirs, names in os.walk(path) for name in names)
+
+
+def full_backup(fleet, directory, parallelism):
+    # The nightly full dump: one export_all file per server, every run rewrites everything
+    target = os.path.join(directory, time.strftime('%Y%m%dT%H%M%S') + '-{0}'.format(random.randint(0, 1 << 30)))
+    start = time.time()
+    run_parallel(lambda server: stream_to_file(lambda output: fleet.export_all_to(server, output),
+                                               os.path.join(target, '{0}.json'.format(safe_file_name(server)))),
+                 fleet.servers, parallelism)
+    return dict(elapsed=round(time.time() - start, 3), bytes_written=directory_size(target))
+
+
+def incremental_backup(fleet, store, parallelism):
+    start = time.time()
+    outcomes = run_parallel(lambda server: store.backup_server(fleet, server), fleet.servers, parallelism)
+    errors = [outcome['error'] for outcome in outcomes.values() if outcome['error'] is not None]
+    if errors:
+        raise SystemExit(errors[0])
+    entries = dict((server, outcome['result'][0]) for server, outcome in outcomes.items())
+    snapshot = store.save_manifest(entries)
+    stats = [outcome['result'][1] for outcome in outcomes.values()]
+    return dict(
+        elapsed=round(time.time() - start, 3),
+        bytes_written=sum(stat['bytes'] for stat in stats),
+        objects_written=sum(stat['written'] for stat in stats),
+        objects_reused=sum(stat['reused'] for stat in stats),
+        snapshot=snapshot
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare full and incremental backups on a synthetic fleet')
+    parser.add_argument('--servers', type=int, default=10)
+    parser.add_argument('--tasks', type=int, default=100, help='tasks per server')
+    parser.add_argument('--tables', type=int, default=50, help='tables per task')
+    parser.add_argument('--change-ratio', type=float, default=0.01, help='ratio of tasks changed between two nightly runs')
+    parser.add_argument('--parallelism', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    fleet = SyntheticFleet(args.servers, args.tasks, args.tables)
+    directory = tempfile.mkdtemp(prefix='qem-backup-benchmark-')
+    try:
+        store = BackupStore(os.path.join(directory, 'store'))
+        results = dict(servers=args.servers, tasks=args.servers * args.tasks, change_ratio=args.change_ratio)
+        results['full'] = full_backup(fleet, os.path.join(directory, 'full'), args.parallelism)
+        results['incremental_first'] = incremental_backup(fleet, store, args.parallelism)
+        results['incremental_unchanged'] = incremental_backup(fleet, store, args.parallelism)
+        fleet.change(args.change_ratio)
+        results['full_after_change'] = full_backup(fleet, os.path.join(directory, 'full'), args.parallelism)
+        results['incremental_after_change'] = incremental_backup(fleet, store, args.parallelism)
+        results['store_bytes'] = directory_size(store.path)
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+# Performance suite of the client and the modules against the local stand-in (tools/qem_standin.py), no QEM is needed:
+#   serialization - AttUtil.attobject_to_json + json.dumps of every aem_client model, as sent by do_web_request
+#   deserialization - every aem_client model built from its JSON document
+#   hydration - AemGetTaskListResp built from task lists of --sizes tasks, and get_task_list over HTTPS
+#   modules - end-to-end run of every qem_* module in the process (argument validation, exec_module, result)
+#   imports - cold-start import time of aem_client, qem_common and every module, in a fresh interpreter
+# Every metric is in seconds, lower is better. The results are printed (or written to --output) as JSON. With --baseline,
+# the results are compared with a previous run and the script exits with 1 when a metric regressed beyond --threshold.
+#
+#   python benchmarks/suite_benchmark.py --output baseline.json
+#   python benchmarks/suite_benchmark.py --baseline baseline.json --threshold 0.25
+#   python benchmarks/suite_benchmark.py compare baseline.json current.json
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from collections import OrderedDict
+from enum import Enum
+
+# Makes the role module_utils importable, see module_utils/qem_paths.py
+QEM_PATHS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py')
+ROLE_DIR = runpy.run_path(QEM_PATHS)['ROLE_DIR']
+sys.path.insert(0, os.path.join(ROLE_DIR, 'tools'))
+
+from ansible.module_utils import aem_client
+from ansible.module_utils.aem_client import AemGetTaskListResp, AttUtil
+from qem_standin import Fleet, QemStandIn
+
+SECTIONS = ('serialization', 'deserialization', 'hydration', 'modules', 'imports')
+DEFAULT_SIZES = (100, 10000, 50000)
+# The aem_client classes which are not API models
+NON_MODELS = ('AttUtil', 'AttConnector', 'AttClient', 'AemClient')
+
+IMPORT_PROBE = '''
+import runpy, sys, timeit
+start = timeit.default_timer()
+runpy.run_path({qem_paths!r})
+{statement}
+sys.stdout.write(repr(timeit.default_timer() - start))
+'''
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def best_time(func, number, repeat):
+    # Seconds per call, the best of repeat rounds of number calls
+    return min(timeit.Timer(func).repeat(repeat=repeat, number=number)) / number
+
+
+def model_classes():
+    return [value for name, value in sorted(vars(aem_client).items())
+            if inspect.isclass(value) and value.__module__ == aem_client.__name__ and name not in NON_MODELS
+            and not issubclass(value, (Enum, Exception))]
+
+
+def sample_documents(fleet):
+    # A JSON document for each model, taken from what the stand-in returns
+    replicate, compose = 'server-000', 'server-002'
+    task = next(name for name, task in fleet.servers[replicate]['tasks'].items() if task['state'] == 'RUNNING')
+    compose_task = next(iter(fleet.servers[compose]['tasks']))
+    server_list = fleet.handle('GET', ['servers'], dict(), None)[1]
+    details = fleet.server_details(replicate)
+    compose_details = fleet.server_details(compose)
+    task_details = fleet.task_details(replicate, task)
+    task_list = fleet.handle('GET', ['servers', replicate, 'tasks'], dict(), None)[1]
+    endpoint_list = fleet.handle('GET', ['servers', replicate, 'endpoints'], dict(), None)[1]
+    role = OrderedDict([('users', [OrderedDict([('name', 'CONTOSO\\user{0}'.format(index))]) for index in range(3)]),
+                       ('groups', [OrderedDict([('name', 'CONTOSO\\group{0}'.format(index))]) for index in range(2)])])
+    acl = OrderedDict([('admin_role', role), ('designer_role', role), ('operator_role', role), ('viewer_role', role),
+                       ('disable_inheritance', False)])
+    definition = fleet.handle('GET', ['servers', replicate, 'def'], dict(), None)[1]
+    server_details = details['server_details']
+    return dict(
+        AemServerInfo=server_list['serverList'][0],
+        ReplicateServerInfo=server_list['serverList'][0],
+        ComposeServerInfo=server_list['serverList'][2],
+        AemGetServerListResp=server_list,
+        AemServer=definition,
+        AemReplicateServer=definition,
+        AemComposeServer=fleet.handle('GET', ['servers', compose, 'def'], dict(), None)[1],
+        AemServerDetails=server_details,
+        ReplicateServerDetails=server_details,
+        ComposeServerDetails=compose_details['server_details'],
+        AemGetServerDetailsResp=details,
+        Configuration=server_details['configuration'],
+        ApiLicense=server_details['license'],
+        AemTasksSummary=server_details['task_summary'],
+        AemServerUtilization=server_details['resource_utilization'],
+        AemTaskInfoDetailedBase=task_details,
+        AemTaskInfoDetailed=task_details,
+        AemComposeTaskInfoDetailed=fleet.task_details(compose, compose_task),
+        TaskEndpoint=task_details['source_endpoint'],
+        AemFullLoadCounters=task_details['full_load_counters'],
+        AemThroughput=task_details['cdc_throughput'],
+        AemCdcEventCounters=task_details['cdc_event_counters'],
+        AemCdcTransactionsCounters=task_details['cdc_transactions_counters'],
+        AemCdcLatency=task_details['cdc_latency'],
+        AemTaskInfo=task_list['taskList'][0],
+        AemGetTaskListResp=task_list,
+        Endpoint=endpoint_list['endpointList'][0],
+        AemGetEndpointListResp=endpoint_list,
+        AemAuthorizationAcl=acl,
+        AemRoleDef=role,
+        AemUserRef=role['users'][0],
+        AemGroupRef=role['groups'][0],
+        AemRunTaskReq=OrderedDict([('cdcposition', None)]),
+        AemRunTaskResp=OrderedDict([('state', 'RUNNING'), ('error_message', '')]),
+        AemStopTaskResp=OrderedDict([('state', 'STOPPED'), ('error_message', '')]),
+        AemTestEndpointResp=OrderedDict([('status', 'CONNECTED'), ('message', ''), ('detailed_message', '')]),
+    )
+
+
+def bench_models(fleet, metrics, sections, repeat):
+    documents = sample_documents(fleet)
+    classes = model_classes()
+    missing = [cls.__name__ for cls in classes if cls.__name__ not in documents]
+    if missing:
+        raise SystemExit('No sample document for the models: {0}'.format(', '.join(missing)))
+    for cls in classes:
+        # the client hydrates the raw response body
+        body = json.dumps(documents[cls.__name__]).encode('utf-8')
+        if 'deserialization' in sections:
+            metrics['deserialize.{0}'.format(cls.__name__)] = best_time(lambda: cls(body), 2000, repeat)
+        if 'serialization' in sections:
+            instance = cls(body)
+            metrics['serialize.{0}'.format(cls.__name__)] = best_time(
+                lambda: json.dumps(AttUtil.attobject_to_json(instance), sort_keys=True), 2000, repeat)
+
+
+def hydration_fleet(sizes):
+    # One server per size, named after its number of tasks
+    fleet = Fleet()
+    for size in sizes:
+        server = 'tasks-{0}'.format(size)
+        fleet.add_server(server)
+        for index in range(size):
+            fleet.add_task(server, 'task-{0:05d}'.format(index), state='RUNNING', source='src-000', target='tgt-000')
+    return fleet
+
+
+def bench_hydration(sizes, metrics, repeat, standin_options):
+    fleet = hydration_fleet(sizes)
+    with QemStandIn(fleet, **standin_options) as standin:
+        client = standin.client()
+        for size in sizes:
+            server = 'tasks-{0}'.format(size)
+            body = json.dumps(fleet.handle('GET', ['servers', server, 'tasks'], dict(), None)[1]).encode('utf-8')
+            number = max(1, 10000 // size)
+            metrics['hydrate.task_list.{0}'.format(size)] = best_time(lambda: AemGetTaskListResp(body), number, repeat)
+            metrics['client.get_task_list.{0}'.format(size)] = best_time(lambda: client.get_task_list(server), number, repeat)
+
+
+def module_params(fleet, client, scratch):
+    # Parameters of a repeatable run of every module against the synthetic fleet, the changes are made by the first run
+    server = 'server-000'
+    task = next(name for name, task in fleet.servers[server]['tasks'].items() if task['state'] == 'RUNNING')
+    return dict(
+        qem_acl=dict(server=server, name='CONTOSO\\benchmark', type='user', role='operator'),
+        qem_acl_info=dict(server=server),
+        qem_backup=dict(server=server, dest=os.path.join(scratch, 'backup')),
+        qem_endpoint=dict(server=server, definition=json.dumps(fleet.servers[server]['endpoints']['src-000'])),
+        qem_endpoint_info=dict(server=server),
+        qem_endpoint_test=dict(server=server),
+        qem_export=dict(server=server, tasks=[task], dest=os.path.join(scratch, 'export')),
+        qem_inventory_info=dict(),
+        qem_license=dict(name=server),
+        qem_server=dict(name=server, host='{0}.contoso.com'.format(server), port=3552, username='qlik', password='secret'),
+        qem_settings=dict(name=server, settings='{}'),
+        qem_table_reload=dict(server=server, name=task, tables=['HR.TABLE_0']),
+        qem_task=dict(server=server, name=task, definition=client.export_task(server, task, True).decode('utf-8'),
+                      fingerprint_cache=os.path.join(scratch, 'fingerprints.json')),
+        qem_task_info=dict(server=server),
+        qem_task_status=dict(server=server, name=task, state='started'),
+        qem_task_watch=dict(server=server, snapshot=os.path.join(scratch, 'task_states.json')),
+    )
+
+
+def library_modules():
+    library = os.path.join(ROLE_DIR, 'library')
+    return sorted(name[:-3] for name in os.listdir(library) if name.startswith('qem_') and name.endswith('.py'))
+
+
+def bench_modules(metrics, errors, runs, standin_options):
+    # Imported here, the action plugin helpers need the Ansible controller
+    from ansible.module_utils.qem_action import load_module_class, run_module
+    fleet = Fleet.synthetic(servers=3, tasks=50, compose=1)
+    scratch = tempfile.mkdtemp(prefix='qem-benchmark-')
+    environ = dict(os.environ)
+    try:
+        with QemStandIn(fleet, **standin_options) as standin:
+            os.environ.update(standin.environment())
+            params = module_params(fleet, standin.client(), scratch)
+            for name in library_modules():
+                module_class = load_module_class(name)
+                if module_class is None:
+                    continue
+                if name not in params:
+                    errors['module.{0}'.format(name)] = 'no benchmark parameters'
+                    continue
+                timings = []
+                for run in range(runs + 1):
+                    start = timeit.default_timer()
+                    result = run_module(module_class, dict(params[name]))
+                    elapsed = timeit.default_timer() - start
+                    if result.get('failed'):
+                        errors['module.{0}'.format(name)] = result.get('msg')
+                        break
+                    # the first run logs in and applies the changes
+                    if run:
+                        timings.append(elapsed)
+                if timings:
+                    metrics['module.{0}'.format(name)] = median(timings)
+    finally:
+        os.environ.clear()
+        os.environ.update(environ)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def bench_imports(metrics, errors, runs):
+    statements = OrderedDict([
+        ('aem_client', 'import ansible.module_utils.aem_client'),
+        ('qem_common', 'import ansible.module_utils.qem_common'),
+    ])
+    for name in library_modules():
+        statements[name] = ('import importlib.util\n'
+                            'spec = importlib.util.spec_from_file_location({0!r}, {1!r})\n'
+                            'spec.loader.exec_module(importlib.util.module_from_spec(spec))').format(
+            name, os.path.join(ROLE_DIR, 'library', '{0}.py'.format(name)))
+    for name, statement in statements.items():
+        probe = IMPORT_PROBE.format(qem_paths=QEM_PATHS, statement=statement)
+        timings = []
+        for run in range(runs):
+            process = subprocess.Popen([sys.executable, '-c', probe], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            output, error = process.communicate()
+            if process.returncode != 0:
+                errors['import.{0}'.format(name)] = error.decode('utf-8', 'replace').strip().splitlines()[-1]
+                break
+            timings.append(float(output))
+        if timings:
+            metrics['import.{0}'.format(name)] = median(timings)
+
+
+def compare(baseline, current, threshold, min_delta=0):
+    # The metrics of current slower than baseline by more than threshold (a ratio) and min_delta seconds
+    regressions = []
+    improvements = []
+    for name in sorted(set(baseline['metrics']) & set(current['metrics'])):
+        before, after = baseline['metrics'][name], current['metrics'][name]
+        if not before:
+            continue
+        entry = OrderedDict([('metric', name), ('baseline', before), ('current', after), ('ratio', round(after / before, 3))])
+        if after > before * (1 + threshold) and after - before > min_delta:
+            regressions.append(entry)
+        elif after < before / (1 + threshold):
+            improvements.append(entry)
+    return OrderedDict([
+        ('threshold', threshold),
+        ('compared', len(set(baseline['metrics']) & set(current['metrics']))),
+        ('regressions', regressions),
+        ('improvements', improvements),
+        ('missing', sorted(set(baseline['metrics']) - set(current['metrics']))),
+        ('new', sorted(set(current['metrics']) - set(baseline['metrics']))),
+    ])
+
+
+def run(args):
+    sections = args.sections.split(',') if args.sections else list(SECTIONS)
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise SystemExit('Unknown sections: {0}'.format(', '.join(unknown)))
+    sizes = [int(size) for size in args.sizes.split(',')]
+    standin_options = dict(latency=args.latency, jitter=args.jitter)
+    metrics = OrderedDict()
+    errors = OrderedDict()
+    start = time.time()
+    if 'serialization' in sections or 'deserialization' in sections:
+        bench_models(Fleet.synthetic(servers=3, tasks=10, compose=1), metrics, sections, args.repeat)
+    if 'hydration' in sections:
+        bench_hydration(sizes, metrics, args.repeat, standin_options)
+    if 'modules' in sections:
+        bench_modules(metrics, errors, args.module_runs, standin_options)
+    if 'imports' in sections:
+        bench_imports(metrics, errors, args.import_runs)
+    return OrderedDict([
+        ('meta', OrderedDict([('time', time.strftime('%Y-%m-%dT%H:%M:%S')), ('python', platform.python_version()),
+                              ('platform', platform.platform()), ('sections', sections), ('sizes', sizes),
+                              ('elapsed', round(time.time() - start, 3))])),
+        ('metrics', metrics),
+        ('errors', errors),
+    ])
+
+
+def load(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the QEM client and modules against the local stand-in')
+    parser.add_argument('--sections', help='comma separated among {0}, all by default'.format(', '.join(SECTIONS)))
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES), help='task list sizes hydrated')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds of the micro benchmarks, the best one is kept')
+    parser.add_argument('--module-runs', type=int, default=20, help='runs of each module, the median is kept')
+    parser.add_argument('--import-runs', type=int, default=5, help='fresh interpreters per import, the median is kept')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added by the stand-in to every request')
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--output', help='write the results to this file instead of the standard output')
+    parser.add_argument('--baseline', help='previous results to compare with, exits with 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.25, help='slowdown ratio tolerated, 0.25 for 25%%')
+    parser.add_argument('--min-delta', type=float, default=0, help='slowdown in seconds tolerated whatever the ratio')
+    parser.add_argument('command', nargs='*', help='compare BASELINE CURRENT compares two results without running the suite')
+    args = parser.parse_args()
+
+    if args.command:
+        if args.command[0] != 'compare' or len(args.command) != 3:
+            parser.error('usage: compare BASELINE CURRENT')
+        results = load(args.command[2])
+        args.baseline = args.command[1]
+    else:
+        results = run(args)
+    if args.baseline:
+        results['comparison'] = compare(load(args.baseline), results, args.threshold, args.min_delta)
+
+    content = json.dumps(results, indent=2) + '\n'
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(content)
+    else:
+        sys.stdout.write(content)
+    for regression in results.get('comparison', dict()).get('regressions', []):
+        sys.stderr.write('regression: {metric} {baseline:.6g}s -> {current:.6g}s (x{ratio})\n'.format(**regression))
+    for name, error in results.get('errors', dict()).items():
+        sys.stderr.write('error: {0}: {1}\n'.format(name, error))
+    if results.get('comparison', dict()).get('regressions') or (results.get('errors') and not args.command):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
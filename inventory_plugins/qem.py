@@ -0,0 +1,187 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: qem
+    plugin_type: inventory
+    short_description: Qlik Replicate/Compose servers inventory from Qlik Enterprise Manager (QEM)
+    description:
+        - Build hosts and groups from the servers managed by Qlik Enterprise Manager.
+        - Servers are grouped by type (C(qem_replicate), C(qem_compose)), platform (eg. C(qem_platform_linux)), state (eg. C(qem_state_monitored)),
+          version (eg. C(qem_version_6_6)) and task states (eg. C(qem_tasks_error) holds the servers having at least one task in error).
+        - The server details are fetched concurrently, the result can be cached with any inventory cache plugin.
+        - Uses a YAML configuration file that ends with C(qem.yml) or C(qem.yaml).
+    extends_documentation_fragment:
+        - inventory_cache
+        - constructed
+    options:
+        plugin:
+            description: Token that ensures this is a source file for the plugin.
+            required: True
+            choices: ['qem']
+        qem_hostname:
+            description: Qlik Enterprise manager host name.
+            env:
+                - name: QEM_HOSTNAME
+        qem_domain:
+            description: Active Directory domain where to find the user.
+            env:
+                - name: QEM_DOMAIN
+        qem_username:
+            description: Active Directory user to connect to Qlik Enterprise Manager.
+            env:
+                - name: QEM_USERNAME
+        qem_password:
+            description: Active Directory user password.
+            env:
+                - name: QEM_PASSWORD
+        qem_verify_certificate:
+            description: Wether or not the server certificate should be verifies.
+            type: bool
+            default: True
+            env:
+                - name: QEM_VERIFY_CERTIFICATE
+        profile:
+            description: Security profile found in ~/.qem/credentials file.
+            env:
+                - name: QEM_PROFILE
+        qem_hedged_reads:
+            description:
+                - With several I(qem_hostname), a read request not answered within the 95th percentile of its recent latencies is also
+                  sent to the next host, the first answer is used.
+            type: bool
+            default: False
+            env:
+                - name: QEM_HEDGED_READS
+        hostnames:
+            description:
+                - If I(hostnames=name), the QEM server name is used as inventory hostname.
+                - If I(hostnames=host), the server host is used as inventory hostname.
+            default: name
+            choices: ['name', 'host']
+        skip_unmonitored:
+            description: Wether or not the details of servers not in the MONITORED state are fetched.
+            type: bool
+            default: True
+        parallelism:
+            description: The maximum number of server details fetched concurrently.
+            type: int
+            default: 16
+'''
+
+EXAMPLES = '''
+# qem.yml
+plugin: qem
+qem_hostname: qem.contoso.com
+qem_domain: CONTOSO
+qem_username: John
+cache: yes
+cache_plugin: jsonfile
+cache_connection: ~/.cache/ansible-qem
+cache_timeout: 600
+keyed_groups:
+    - key: qem_license.state
+      prefix: qem_license
+'''
+
+import os
+import runpy
+
+from ansible.errors import AnsibleError
+from ansible.inventory.group import to_safe_group_name
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+# Share the role module_utils with the controller side plugins, see module_utils/qem_paths.py
+runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))
+
+from ansible.module_utils.qem_common import QEM_ENV_MAPPING, create_qem_client, resolve_credentials
+from ansible.module_utils.qem_inventory import collect_inventory
+
+TASK_STATES = ('running', 'stopped', 'recovering', 'error')
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'qem'
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('qem.yml', 'qem.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        servers = None
+        if attempt_to_read_cache:
+            try:
+                servers = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+        if servers is None:
+            servers = self.fetch_servers()
+        if cache_needs_update:
+            self._cache[cache_key] = servers
+
+        self.populate(servers)
+
+    def fetch_servers(self):
+        params = dict((key, self.get_option(key)) for key in QEM_ENV_MAPPING)
+        credentials = resolve_credentials(params)
+        if not credentials:
+            raise AnsibleError('Impossible to retrieve credentials from (in order) the plugin options, env vars or ~/.qem/credentials profile file')
+        try:
+            aem_client = create_qem_client(**credentials)
+            return collect_inventory(
+                aem_client,
+                sections=('details',),
+                parallelism=self.get_option('parallelism'),
+                skip_unmonitored=self.get_option('skip_unmonitored')
+            )
+        except Exception as ex:
+            raise AnsibleError('Failed to load the QEM server list: {0}'.format(getattr(ex, 'message', None) or ex))
+
+    def populate(self, servers):
+        strict = self.get_option('strict')
+        for server in servers.values():
+            hostname = server['host'] if self.get_option('hostnames') == 'host' else server['name']
+            if not hostname:
+                continue
+            self.inventory.add_host(hostname)
+            hostvars = self.server_hostvars(server)
+            for key, value in hostvars.items():
+                self.inventory.set_variable(hostname, key, value)
+
+            for group in self.server_groups(server):
+                self.inventory.add_group(group)
+                self.inventory.add_child(group, hostname)
+
+            self._set_composite_vars(self.get_option('compose'), hostvars, hostname, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, hostname, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, hostname, strict=strict)
+
+    def server_hostvars(self, server):
+        hostvars = dict(('qem_{0}'.format(key), value) for key, value in server.items() if key not in ('skipped', 'name'))
+        hostvars['qem_server'] = server['name']
+        if server['host']:
+            hostvars['ansible_host'] = server['host']
+        return hostvars
+
+    def server_groups(self, server):
+        groups = ['qem_{0}'.format(server['type'])]
+        if server['platform']:
+            groups.append(to_safe_group_name('qem_platform_{0}'.format(server['platform'].lower())))
+        if server['state']:
+            groups.append(to_safe_group_name('qem_state_{0}'.format(server['state'].lower())))
+        version = server.get('version')
+        if version:
+            groups.append(to_safe_group_name('qem_version_{0}'.format('_'.join(version.split('.')[:2]))))
+        task_summary = server.get('task_summary') or dict()
+        for state in TASK_STATES:
+            if task_summary.get(state):
+                groups.append('qem_tasks_{0}'.format(state))
+        return groups
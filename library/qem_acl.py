@@ -81,7 +81,7 @@ from ansible.module_utils.qem_common import QemModuleBase
 
 class QemAclManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=True),
@@ -97,7 +97,7 @@ class QemAclManager(QemModuleBase):
         self.role = None
         self.type = None
 
-        super(QemAclManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemAclManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
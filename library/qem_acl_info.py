@@ -22,10 +22,18 @@ options:
     server:
         description:
             - The server where the acl is defined
-        type: str
+            - A list of servers or C(all) (every server managed by QEM) can be given, C(qem_acls) is then a dictionary keyed by server
+              and the per-server errors and timings are returned as C(server_errors) and C(server_timings).
+        type: raw
         required: True
         aliases:
             - replicate_server
+    parallelism:
+        description:
+            - The maximum number of servers queried concurrently when I(server) is a list or C(all).
+        type: int
+        default: 8
+        required: False
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -49,6 +57,16 @@ EXAMPLES = '''
 
 - name: Display info
     var: output.qem_acls.acl
+
+# ACL info of the whole fleet
+- name: Fleet acl info
+    qem_acl_info:
+        name: "CONTOSO\\User2"
+        server: all
+    register: output
+
+- name: Display info
+    var: output.qem_acls["My Sample Server"].acl
 '''
 
 import json
@@ -58,17 +76,19 @@ from ansible.module_utils.qem_common import QemModuleBase
 
 class QemACLInfoManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['acl_name']),
-            server=dict(required=True, aliases=['replicate_server']),
+            server=dict(required=True, type='raw', aliases=['replicate_server']),
+            parallelism=dict(required=False, type='int', default=8),
         )
 
         self.server = None
         self.name = None
+        self.parallelism = None
 
-        super(QemACLInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemACLInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -83,7 +103,13 @@ class QemACLInfoManager(QemModuleBase):
             changed=False,
             msg=""
         )
-        self.results['qem_acls'] = self.get_acls_info()
+        if self.is_fleet(self.server):
+            acls, errors, timings = self.gather_fleet(self.server, self.get_acls_info, self.parallelism)
+            self.results['qem_acls'] = acls
+            self.results['server_errors'] = errors
+            self.results['server_timings'] = timings
+        else:
+            self.results['qem_acls'] = self.get_acls_info(self.server)
         return self.results
 
 
@@ -97,17 +123,17 @@ class QemACLInfoManager(QemModuleBase):
         return acl
 
 
-    def get_server_acl(self):
+    def get_server_acl(self, server):
         try:
-            return self.aem_client.get_server_acl(self.server)
+            return self.aem_client.get_server_acl(server)
         except Exception as e:
-            if e.error_code == "AEM_SERVER_HAS_NO_ACL":
+            if getattr(e, 'error_code', None) == "AEM_SERVER_HAS_NO_ACL":
                 return self.init_acl()
-        return None
+            raise
 
 
-    def get_acls_info(self):
-        acl = self.get_server_acl()
+    def get_acls_info(self, server):
+        acl = self.get_server_acl(server)
         acl_list = []
         acl_list.extend(self.to_acl_list("admin", acl.admin_role))
         acl_list.extend(self.to_acl_list("designer", acl.designer_role))
@@ -0,0 +1,224 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_backup
+short_description: Incremental backup and restore of Qlik Replicate/Compose servers via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Back up the tasks and endpoints of Qlik Replicate/Compose servers into a content-addressed store, or restore them from any snapshot.
+    - Each server is exported (C(export_all)) concurrently and streamed to disk, every task, endpoint and server settings block is canonicalized
+      (sorted keys, C(_version) and C(task_uuid) removed) and stored once under C(objects/<sha256>.json).
+    - A snapshot is a manifest C(manifests/<snapshot>.json) referencing the objects of each server, unchanged objects are never written again
+      and no snapshot is created when nothing changed since the latest one. The servers not backed up by a run (not selected or failed)
+      keep in the new snapshot their entry of the latest one.
+    - A restored task is imported with the endpoints it uses and the version of the target server.
+options:
+    state:
+        description:
+            - If I(state=backup), the servers are backed up in a new snapshot
+            - If I(state=restore), the tasks of a snapshot are imported
+        default: backup
+        choices:
+            - backup
+            - restore
+    dest:
+        description:
+            - The backup store directory
+        type: path
+        required: True
+    server:
+        description:
+            - The server to back up, a list of servers or C(all) (every server managed by QEM)
+            - For I(state=restore), the servers of the snapshot to restore, all of them by default
+        type: raw
+        required: False
+        aliases:
+            - replicate_server
+            - compose_server
+    snapshot:
+        description:
+            - For I(state=restore), the snapshot to restore
+        type: str
+        default: latest
+    tasks:
+        description:
+            - For I(state=restore), the names of the tasks to restore, all the tasks of the snapshot by default
+        type: list
+        required: False
+    target_server:
+        description:
+            - For I(state=restore), import the tasks on this server instead of the server they were backed up from
+        type: str
+        required: False
+    parallelism:
+        description:
+            - The maximum number of concurrent exports/imports
+        type: int
+        default: 8
+        required: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Nightly backup of the fleet
+- name: Back up all the servers
+    qem_backup:
+        server: all
+        dest: "/backup/qem"
+    register: output
+
+- name: Display the snapshot
+    var: output.snapshot
+
+# Restore a task from a given snapshot on another server
+- name: Restore sample task
+    qem_backup:
+        state: restore
+        dest: "/backup/qem"
+        snapshot: "20240101T020000Z"
+        server: "My Sample Server"
+        tasks:
+            - "My Sample Task"
+        target_server: "My Other Server"
+'''
+
+import json
+import time
+from collections import OrderedDict
+from ansible.module_utils.qem_backup import BackupStore, server_version
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_parallel import run_parallel
+
+class QemBackupManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            state=dict(default='backup', choices=['backup', 'restore']),
+            dest=dict(required=True, type='path'),
+            server=dict(required=False, type='raw', aliases=['replicate_server', 'compose_server']),
+            snapshot=dict(required=False, default='latest'),
+            tasks=dict(required=False, type='list'),
+            target_server=dict(required=False),
+            parallelism=dict(required=False, type='int', default=8),
+        )
+
+        self.state = None
+        self.dest = None
+        self.server = None
+        self.snapshot = None
+        self.tasks = None
+        self.target_server = None
+        self.parallelism = None
+
+        super(QemBackupManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.store = BackupStore(self.dest)
+        states = {
+            "backup": self.backup,
+            "restore": self.restore,
+        }
+        self.results = dict(
+            changed=False,
+            msg=""
+        )
+
+        start = time.time()
+        states.get(self.state)()
+        self.results['elapsed'] = round(time.time() - start, 3)
+
+        if self.results.get('errors'):
+            self.results['msg'] = '{0} {1} failed'.format(len(self.results['errors']), self.state)
+            self.fail(**self.results)
+        return self.results
+
+    def backup(self):
+        if not self.server:
+            self.fail(msg="server is required to back up")
+        try:
+            servers = self.resolve_servers(self.server)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
+        outcomes = run_parallel(lambda server: self.store.backup_server(self.aem_client, server), servers, self.parallelism)
+        entries = OrderedDict()
+        self.results['servers'] = dict()
+        self.results['errors'] = dict()
+        for server, outcome in outcomes.items():
+            if outcome['error'] is not None:
+                self.results['errors'][server] = outcome['error']
+                continue
+            entry, stats = outcome['result']
+            entries[server] = entry
+            stats.update(tasks=len(entry['tasks']), endpoints=len(entry['endpoints']), elapsed=round(outcome['elapsed'], 3))
+            self.results['servers'][server] = stats
+
+        snapshot = self.store.save_manifest(entries) if entries else None
+        self.results['changed'] = snapshot is not None
+        self.results['snapshot'] = snapshot or (self.store.snapshots() or [None])[-1]
+
+    def restore(self):
+        manifest = self.store.load_manifest(self.snapshot)
+        if manifest is None:
+            self.fail(msg="Snapshot {0} not found in {1}".format(self.snapshot, self.dest))
+        self.results['snapshot'] = manifest['snapshot']
+
+        if not self.server:
+            servers = list(manifest['servers'].keys())
+        elif isinstance(self.server, list):
+            servers = self.server
+        else:
+            servers = [self.server]
+        unknown_servers = [server for server in servers if server not in manifest['servers']]
+        if unknown_servers:
+            self.fail(msg="Servers not in snapshot {0}: {1}".format(manifest['snapshot'], ', '.join(unknown_servers)))
+        if self.target_server and len(servers) > 1:
+            self.fail(msg="target_server requires a single server to restore")
+
+        imports = []
+        for server in servers:
+            task_names = self.tasks or list(manifest['servers'][server]['tasks'].keys())
+            unknown_tasks = [name for name in task_names if name not in manifest['servers'][server]['tasks']]
+            if unknown_tasks:
+                self.fail(msg="Tasks not in snapshot {0} for {1}: {2}".format(manifest['snapshot'], server, ', '.join(unknown_tasks)))
+            imports.extend((server, name) for name in task_names)
+
+        versions = dict()
+        for target in set(self.target_server or server for server in servers):
+            try:
+                versions[target] = server_version(self.aem_client, target)
+            except Exception as ex:
+                self.fail(msg=str(ex))
+
+        def restore_task(restore):
+            server, name = restore
+            target = self.target_server or server
+            document = self.store.task_document(manifest['servers'][server], name)
+            document['_version'] = versions[target]
+            self.aem_client.import_task(json.dumps(document), target, name)
+            return dict(server=server, task=name, target_server=target)
+
+        outcomes = run_parallel(restore_task, imports, self.parallelism)
+        self.results['restored'] = [outcome['result'] for outcome in outcomes.values() if outcome['error'] is None]
+        self.results['errors'] = dict(
+            ('{0}/{1}'.format(server, name), outcome['error']) for (server, name), outcome in outcomes.items() if outcome['error'] is not None
+        )
+        self.results['changed'] = len(self.results['restored']) > 0
+
+def main():
+    QemBackupManager()
+
+
+if __name__ == '__main__':
+    main()
@@ -42,6 +42,27 @@ options:
             - The endpoint definition in JSON
         type: str
         required: False
+    definitions:
+        description:
+            - A list of endpoint definitions (JSON strings or dictionaries) to import or delete in bulk.
+            - When set, I(name) and I(definition) are ignored.
+            - The endpoints are packed into as few carrier tasks as possible, sharing a single dummy source/target, and the cleanup is done once at the end.
+        type: list
+        required: False
+    carrier_max_targets:
+        description:
+            - In bulk mode, the maximum number of target endpoints attached to a single carrier task.
+            - Keep the default if your Replicate version does not support tasks with several targets.
+        type: int
+        default: 1
+        required: False
+    import_timeout:
+        description:
+            - The maximum time in seconds to wait for the carrier tasks and the imported endpoints to be available on the server.
+            - The server is polled with short initial intervals and an exponential backoff, the observed wait is returned as C(wait).
+        type: int
+        default: 60
+        required: False
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -80,13 +101,23 @@ EXAMPLES = '''
                 "name": "default"
             }
         }
+
+# Importing several endpoints at once
+- name: Import sample endpoints
+    qem_endpoint:
+        server: "My Sample Server"
+        state: present
+        definitions:
+            - "{{ lookup('file', 'endpoints/my-source.json') }}"
+            - "{{ lookup('file', 'endpoints/my-target.json') }}"
+            - "{{ lookup('file', 'endpoints/my-other-target.json') }}"
 '''
 
+import copy
 import json
-import time
 import uuid
 from collections import OrderedDict
-from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_common import QemModuleBase, wait_for
 
 DUMMY_TASK_TEMPLATE = '''
 {
@@ -207,21 +238,27 @@ DUMMY_TARGET = '''
 
 class QemEndpointManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['endpoint_name']),
             state=dict(default='present', choices=['present', 'absent']),
             server=dict(required=True, aliases=['replicate_server', 'compose_server']),
             definition=dict(required=False),
+            definitions=dict(required=False, type='list'),
+            carrier_max_targets=dict(required=False, type='int', default=1),
+            import_timeout=dict(required=False, type='int', default=60),
         )
 
         self.state = None
         self.server = None
         self.name = None
         self.definition = None
+        self.definitions = None
+        self.carrier_max_targets = None
+        self.import_timeout = None
 
-        super(QemEndpointManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemEndpointManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -235,9 +272,12 @@ class QemEndpointManager(QemModuleBase):
             else:
                 self.endpoint_object['name'] = self.name
 
+        if self.definitions:
+            self.endpoint_objects = [self.load_definition(definition) for definition in self.definitions]
+
         states = {
-            "present": self.import_endpoint,
-            "absent": self.delete_endpoint,
+            "present": self.import_endpoints if self.definitions else self.import_endpoint,
+            "absent": self.delete_endpoints if self.definitions else self.delete_endpoint,
         }
         self.results = dict(
             endpoint=dict(
@@ -252,6 +292,11 @@ class QemEndpointManager(QemModuleBase):
 
         return self.results
 
+    def load_definition(self, definition):
+        if isinstance(definition, dict):
+            return json.loads(json.dumps(definition), object_pairs_hook=OrderedDict)
+        return json.loads(definition, object_pairs_hook=OrderedDict)
+
     def get_endpoint_info(self):
         response = self.aem_client.get_endpoint_list(self.server)
         if not response:
@@ -278,72 +323,144 @@ class QemEndpointManager(QemModuleBase):
         # Since Task is a composed by a source and a target, depenending of what the user want to import we need to generate the dual:
         # - If we try to import a source, we generate a dummy target based on the handly NullTarget
         # - If we try to import a target, we generate a dummy source based on the FileSource
-        # Once imported, we wait a couple of seconds, it look like the task/endpoint creation is asyn thus we need to be sure everything exists before movin on
+        # Once imported, we poll the server until the task and the endpoint show up, it look like the task/endpoint creation is asyn thus we need to be sure everything exists before movin on
         # Once we are sure the creation succeed, we delete the dummy task and endpoint (source of target) to let on the server only the endpoint the user wants to import.
+        self.import_carriers([self.endpoint_object])
+        self.results['changed'] = True
+        self.results['msg'] = 'endpoint imported'
+
+    def import_endpoints(self):
+        # Bulk flavour of import_endpoint: the endpoints are packed into as few carrier tasks as possible.
+        # Each carrier takes one source and up to carrier_max_targets targets, a single dummy source/target is shared
+        # by all the carriers needing one and everything is cleaned up once all the carriers have been imported.
+        carriers = self.import_carriers(self.endpoint_objects)
+        self.results['endpoints'] = [dict(name=endpoint['name'], role=endpoint['role']) for endpoint in self.endpoint_objects]
+        self.results['carriers'] = carriers
+        self.results['changed'] = True
+        self.results['msg'] = '{0} endpoints imported'.format(len(self.endpoint_objects))
+
+    def build_carrier_task(self, task_name, source, targets):
         import_task = json.loads(DUMMY_TASK_TEMPLATE, object_pairs_hook=OrderedDict)
-        transaction_id = uuid.uuid1()
-        task_name = 'ansible-import-endpoint-{0}'.format(transaction_id)
-        import_task['cmd.replication_definition']['tasks'][0]['task']['name'] = task_name
-        dummy_endpoint_name = 'ansible-import-endpoint-dummy-{0}'.format(transaction_id)
         # Qlik Replicate backward compatibility consists in fallbacking to the default options if no explicit version set
         # We use the one from the target cluster, this means you need consistency accross your environments
-        import_task["_version"] = self.get_server_version()
-        if self.endpoint_object['role'] != 'SOURCE' and self.endpoint_object['role'] != 'TARGET':
-            self.fail(msg='Import a endpoint with Role=BOTH or ROLE=ALL is not yet implemented.')
-
-        if self.endpoint_object['role'] == 'SOURCE':
-            dummy_target = json.loads(DUMMY_TARGET, object_pairs_hook=OrderedDict)
-            dummy_target['name'] = dummy_endpoint_name
-            import_task['cmd.replication_definition']['tasks'][0]['task']['source_name'] = self.endpoint_object['name']
-            import_task['cmd.replication_definition']['tasks'][0]['task']['target_names'] = [dummy_target['name']]
-
-            import_task['cmd.replication_definition']['tasks'][0]['source']['rep_source']['source_name'] = self.endpoint_object['name']
-            import_task['cmd.replication_definition']['tasks'][0]['source']['rep_source']['database_name'] = self.endpoint_object['name']
-            import_task['cmd.replication_definition']['tasks'][0]['source']['source_tables']['name'] = self.endpoint_object['name']
-
-            import_task['cmd.replication_definition']['tasks'][0]['targets'][0]['rep_target']['target_name'] = dummy_target['name']
-            import_task['cmd.replication_definition']['tasks'][0]['targets'][0]['rep_target']['database_name'] = dummy_target['name']
-
-            import_task['cmd.replication_definition']['databases'].insert(0, self.endpoint_object)
-            import_task['cmd.replication_definition']['databases'].insert(1, dummy_target)
-
-        if self.endpoint_object['role'] == 'TARGET':
-            dummy_source = json.loads(DUMMY_SOURCE, object_pairs_hook=OrderedDict)
-            dummy_source['name'] = dummy_endpoint_name
-
-            import_task['cmd.replication_definition']['tasks'][0]['task']['source_name'] = dummy_source['name']
-            import_task['cmd.replication_definition']['tasks'][0]['task']['target_names'] = [self.endpoint_object['name']]
-
-            import_task['cmd.replication_definition']['tasks'][0]['source']['rep_source']['source_name'] = dummy_source['name']
-            import_task['cmd.replication_definition']['tasks'][0]['source']['rep_source']['database_name'] = dummy_source['name']
-            import_task['cmd.replication_definition']['tasks'][0]['source']['source_tables']['name'] = dummy_source['name']
-
-            import_task['cmd.replication_definition']['tasks'][0]['targets'][0]['rep_target']['target_name'] = self.endpoint_object['name']
-            import_task['cmd.replication_definition']['tasks'][0]['targets'][0]['rep_target']['database_name'] = self.endpoint_object['name']
-
-            import_task['cmd.replication_definition']['databases'].insert(0, dummy_source)
-            import_task['cmd.replication_definition']['databases'].insert(1, self.endpoint_object)
-
+        import_task['_version'] = self.server_version
+        replication_definition = import_task['cmd.replication_definition']
+        task = replication_definition['tasks'][0]
+        target_template = task['targets'][0]
+
+        task['task']['name'] = task_name
+        task['task']['source_name'] = source['name']
+        task['task']['target_names'] = [target['name'] for target in targets]
+
+        task['source']['rep_source']['source_name'] = source['name']
+        task['source']['rep_source']['database_name'] = source['name']
+        task['source']['source_tables']['name'] = source['name']
+
+        task['targets'] = []
+        for target in targets:
+            rep_target = copy.deepcopy(target_template)
+            rep_target['rep_target']['target_name'] = target['name']
+            rep_target['rep_target']['database_name'] = target['name']
+            task['targets'].append(rep_target)
+
+        replication_definition['databases'] = [source] + list(targets)
+        return import_task
+
+    def plan_carriers(self, endpoint_objects, transaction_id):
+        sources = [endpoint for endpoint in endpoint_objects if endpoint['role'] == 'SOURCE']
+        targets = [endpoint for endpoint in endpoint_objects if endpoint['role'] == 'TARGET']
+        step = max(self.carrier_max_targets, 1)
+        target_groups = [targets[i:i + step] for i in range(0, len(targets), step)]
+
+        dummy_source = None
+        dummy_target = None
+        carriers = []
+        for index in range(max(len(sources), len(target_groups))):
+            source = sources[index] if index < len(sources) else None
+            group = target_groups[index] if index < len(target_groups) else None
+            if source is None:
+                if dummy_source is None:
+                    dummy_source = json.loads(DUMMY_SOURCE, object_pairs_hook=OrderedDict)
+                    dummy_source['name'] = 'ansible-import-endpoint-dummy-source-{0}'.format(transaction_id)
+                source = dummy_source
+            if not group:
+                if dummy_target is None:
+                    dummy_target = json.loads(DUMMY_TARGET, object_pairs_hook=OrderedDict)
+                    dummy_target['name'] = 'ansible-import-endpoint-dummy-target-{0}'.format(transaction_id)
+                group = [dummy_target]
+            task_name = 'ansible-import-endpoint-{0}-{1}'.format(transaction_id, index)
+            carriers.append((task_name, self.build_carrier_task(task_name, source, group)))
+
+        dummy_endpoints = [dummy['name'] for dummy in (dummy_source, dummy_target) if dummy is not None]
+        return carriers, dummy_endpoints
+
+    def import_carriers(self, endpoint_objects):
+        for endpoint_object in endpoint_objects:
+            if endpoint_object['role'] != 'SOURCE' and endpoint_object['role'] != 'TARGET':
+                self.fail(msg='Import a endpoint with Role=BOTH or ROLE=ALL is not yet implemented.')
+
+        self.server_version = self.get_server_version()
+        carriers, dummy_endpoints = self.plan_carriers(endpoint_objects, uuid.uuid1())
+        imported = []
         try:
-            self.aem_client.import_task(
-                payload=json.dumps(import_task, indent=None),
-                server=self.server,
-                task=task_name
-            )
-            time.sleep(5) # Wait for task to be created... could be improved by an loop checking if aem_client.get_task_details returns actually the task
-            self.aem_client.delete_task(
-                server=self.server,
-                task=task_name,
-                deletetasklogs=True
-            )
-            self.aem_client.delete_endpoint(
-                server=self.server,
-                endpoint=dummy_endpoint_name
+            for task_name, import_task in carriers:
+                self.aem_client.import_task(
+                    payload=json.dumps(import_task, indent=None),
+                    server=self.server,
+                    task=task_name
+                )
+                imported.append(task_name)
+            endpoint_names = [endpoint_object['name'] for endpoint_object in endpoint_objects]
+            ready, wait = wait_for(
+                lambda: self.carriers_ready(imported, endpoint_names),
+                timeout=self.import_timeout
             )
-            self.results['changed'] = True
-            self.results['msg'] = 'endpoint imported'
+            self.results['wait'] = round(wait, 3)
+            if not ready:
+                raise Exception('Carrier tasks not ready after {0}s'.format(self.import_timeout))
+            self.cleanup_carriers(imported, dummy_endpoints)
         except Exception as ex:
+            self.cleanup_carriers(imported, dummy_endpoints, ignore_errors=True)
             self.fail(msg=str(ex))
+        return len(carriers)
+
+    def carriers_ready(self, task_names, endpoint_names):
+        # A single carrier is checked with get_task_details, bulk imports rely on one task list call per poll
+        try:
+            if len(task_names) == 1:
+                self.aem_client.get_task_details(self.server, task_names[0])
+            else:
+                response = self.aem_client.get_task_list(self.server)
+                known_tasks = set(task.name for task in response.taskList) if response else set()
+                if not known_tasks.issuperset(task_names):
+                    return False
+            response = self.aem_client.get_endpoint_list(self.server)
+        except Exception:
+            return False
+        known_endpoints = set(endpoint.name for endpoint in response.endpointList) if response else set()
+        return known_endpoints.issuperset(endpoint_names)
+
+    def cleanup_carriers(self, task_names, dummy_endpoints, ignore_errors=False):
+        # The dummy endpoints can only be removed once no carrier task references them anymore
+        for task_name in task_names:
+            try:
+                self.aem_client.delete_task(
+                    server=self.server,
+                    task=task_name,
+                    deletetasklogs=True
+                )
+            except Exception:
+                if not ignore_errors:
+                    raise
+        for dummy_endpoint_name in dummy_endpoints:
+            try:
+                self.aem_client.delete_endpoint(
+                    server=self.server,
+                    endpoint=dummy_endpoint_name
+                )
+            except Exception:
+                if not ignore_errors:
+                    raise
 
     def delete_endpoint(self):
         if self.get_endpoint_info():
@@ -357,6 +474,26 @@ class QemEndpointManager(QemModuleBase):
             except Exception as ex:
                 self.fail(msg=str(ex))
 
+    def delete_endpoints(self):
+        response = self.aem_client.get_endpoint_list(self.server)
+        existing = set(endpoint.name for endpoint in response.endpointList) if response else set()
+        deleted = []
+        for endpoint_object in self.endpoint_objects:
+            if endpoint_object['name'] not in existing:
+                continue
+            try:
+                self.aem_client.delete_endpoint(
+                    server=self.server,
+                    endpoint=endpoint_object['name']
+                )
+                deleted.append(endpoint_object['name'])
+            except Exception as ex:
+                self.fail(msg=str(ex), deleted=deleted)
+        self.results['endpoints'] = [dict(name=name) for name in deleted]
+        if deleted:
+            self.results['changed'] = True
+            self.results['msg'] = '{0} endpoints deleted'.format(len(deleted))
+
 
 def main():
     QemEndpointManager()
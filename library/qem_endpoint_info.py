@@ -22,10 +22,18 @@ options:
     server:
         description:
             - The server where the endpoint is defined
-        type: str
+            - A list of servers or C(all) (every server managed by QEM) can be given, C(qem_endpoints) is then a dictionary keyed by server
+              and the per-server errors and timings are returned as C(server_errors) and C(server_timings).
+        type: raw
         required: True
         aliases:
             - replicate_server
+    parallelism:
+        description:
+            - The maximum number of servers queried concurrently when I(server) is a list or C(all).
+        type: int
+        default: 8
+        required: False
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -49,26 +57,39 @@ EXAMPLES = '''
 
 - name: Display info
     var: output.qem_endpoints
+
+# Endpoint info of several servers
+- name: Fleet endpoint info
+    qem_endpoint_info:
+        server:
+            - "My Sample Server"
+            - "My Other Server"
+    register: output
+
+- name: Display info
+    var: output.qem_endpoints["My Other Server"]
 '''
 
 import json
 from collections import OrderedDict
 from ansible.module_utils.aem_client import AemTaskState, AemRunTaskReq, AemRunTaskOptions
-from ansible.module_utils.qem import QemModuleBase
+from ansible.module_utils.qem_common import QemModuleBase
 
 class QemEndpointInfoManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['endpoint_name']),
-            server=dict(required=True, aliases=['replicate_server']),
+            server=dict(required=True, type='raw', aliases=['replicate_server']),
+            parallelism=dict(required=False, type='int', default=8),
         )
 
         self.server = None
         self.name = None
+        self.parallelism = None
 
-        super(QemEndpointInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemEndpointInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -83,11 +104,17 @@ class QemEndpointInfoManager(QemModuleBase):
             changed=False,
             msg=""
         )
-        self.results['qem_endpoints'] = self.get_endpoints_info()
+        if self.is_fleet(self.server):
+            endpoints, errors, timings = self.gather_fleet(self.server, self.get_endpoints_info, self.parallelism)
+            self.results['qem_endpoints'] = endpoints
+            self.results['server_errors'] = errors
+            self.results['server_timings'] = timings
+        else:
+            self.results['qem_endpoints'] = self.get_endpoints_info(self.server)
         return self.results
 
-    def get_endpoints_info(self):
-        response = self.aem_client.get_endpoint_list(self.server)
+    def get_endpoints_info(self, server):
+        response = self.aem_client.get_endpoint_list(server)
         if not response:
             return None
         endpoints = []
@@ -95,7 +122,7 @@ class QemEndpointInfoManager(QemModuleBase):
             endpoints = [endpoint for endpoint in response.endpointList if endpoint.name == self.name]
         else:
             endpoints = response.endpointList
-        return map(self.endpoint_mapper, endpoints)
+        return list(map(self.endpoint_mapper, endpoints))
 
     def endpoint_mapper(self, endpoint):
         return {
@@ -0,0 +1,174 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_endpoint_test
+short_description: Test Qlik Replicate/Compose endpoints connectivity via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Test the connection of Qlik Replicate/Compose endpoints using the Qlik Enterprise Manager API Python client.
+    - The tests run concurrently, each one is bounded by I(timeout) on the server side and on the connection.
+    - Return the endpoint state, message and measured latency of every test and a summary of the failures.
+options:
+    server:
+        description:
+            - The server where the endpoints are defined, a list of servers or C(all) (every server managed by QEM)
+        type: raw
+        required: True
+        aliases:
+            - replicate_server
+            - compose_server
+    endpoints:
+        description:
+            - The names of the endpoints to test on each server, all the endpoints of the servers are tested by default
+        type: list
+        required: False
+        aliases:
+            - name
+            - endpoint_name
+    timeout:
+        description:
+            - The maximum time in seconds of a single test, an endpoint not answering in time is reported as failed
+        type: int
+        default: 60
+        required: False
+    parallelism:
+        description:
+            - The maximum number of concurrent tests
+        type: int
+        default: 8
+        required: False
+    fail_on_error:
+        description:
+            - Wether or not the module fails when an endpoint is not connected
+        type: bool
+        default: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Test two endpoints
+- name: Test sample endpoints
+    qem_endpoint_test:
+        server: "My Sample Server"
+        endpoints:
+            - "MyDB"
+            - "MyOtherDB"
+    register: output
+
+# Test every endpoint of the fleet before a cutover
+- name: Test all the endpoints
+    qem_endpoint_test:
+        server: all
+        timeout: 20
+        parallelism: 16
+        fail_on_error: yes
+    register: output
+
+- name: Display the failures
+    var: output.summary.failures
+'''
+
+import time
+from ansible.module_utils.aem_client import AemEndpointState
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_parallel import error_message, run_parallel
+
+# Time given to QEM on top of the test timeout to answer, before the connection gives up
+CONNECTION_GRACE = 10
+
+class QemEndpointTestManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            server=dict(required=True, type='raw', aliases=['replicate_server', 'compose_server']),
+            endpoints=dict(required=False, type='list', aliases=['name', 'endpoint_name']),
+            timeout=dict(required=False, type='int', default=60),
+            parallelism=dict(required=False, type='int', default=8),
+            fail_on_error=dict(required=False, type='bool', default=False),
+        )
+
+        self.server = None
+        self.endpoints = None
+        self.timeout = None
+        self.parallelism = None
+        self.fail_on_error = None
+
+        super(QemEndpointTestManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.results = dict(
+            changed=False,
+            msg=""
+        )
+
+        start = time.time()
+        try:
+            servers = self.resolve_servers(self.server)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
+        tests = []
+        self.results['server_errors'] = dict()
+        if self.endpoints:
+            tests = [(server, endpoint) for server in servers for endpoint in self.endpoints]
+        else:
+            listings = run_parallel(lambda server: self.aem_client.get_endpoint_list(server).endpointList, servers, self.parallelism)
+            for server, outcome in listings.items():
+                if outcome['error'] is not None:
+                    self.results['server_errors'][server] = outcome['error']
+                else:
+                    tests.extend((server, endpoint.name) for endpoint in outcome['result'])
+
+        outcomes = run_parallel(self.test_endpoint, tests, self.parallelism)
+        self.results['endpoints'] = [outcome['result'] for outcome in outcomes.values()]
+        failures = ['{0}/{1}'.format(result['server'], result['name']) for result in self.results['endpoints'] if not result['connected']]
+        self.results['summary'] = dict(
+            total=len(tests),
+            connected=len(tests) - len(failures),
+            failed=len(failures),
+            failures=failures
+        )
+        self.results['elapsed'] = round(time.time() - start, 3)
+
+        if self.fail_on_error and (failures or self.results['server_errors']):
+            self.results['msg'] = '{0} of {1} endpoints failed the connection test'.format(len(failures), len(tests))
+            self.fail(**self.results)
+        return self.results
+
+    def test_endpoint(self, test):
+        # Never raises: a call error or timeout is reported as the endpoint result
+        server, name = test
+        start = time.time()
+        try:
+            # The connection timeout is given per request, the client may be shared with other module runs (action plugins, broker)
+            response = self.aem_client.test_endpoint(server, name, self.timeout, request_timeout=self.timeout + CONNECTION_GRACE)
+            status, message, detailed_message = response.status, response.message, response.detailed_message
+        except Exception as ex:
+            status, message, detailed_message = AemEndpointState.ERROR, error_message(ex), None
+        return dict(
+            server=server,
+            name=name,
+            status=status.name,
+            connected=status == AemEndpointState.CONNECTED,
+            message=message,
+            detailed_message=detailed_message,
+            latency=round(time.time() - start, 3)
+        )
+
+def main():
+    QemEndpointTestManager()
+
+
+if __name__ == '__main__':
+    main()
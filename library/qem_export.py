@@ -0,0 +1,181 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_export
+short_description: Export Qlik Replicate/Compose tasks to files via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Export Qlik Replicate/Compose tasks (with their endpoints) or whole servers to JSON files using the Qlik Enterprise Manager API Python client.
+    - The exports are streamed to disk without being held in memory and several tasks/servers are exported concurrently.
+    - A file is only replaced (and the module reports a change) when the exported content differs from the existing one.
+options:
+    server:
+        description:
+            - The server to export from, a list of servers or C(all) (every server managed by QEM)
+        type: raw
+        required: True
+        aliases:
+            - replicate_server
+            - compose_server
+    tasks:
+        description:
+            - The names of the tasks to export from each server, written to C(<dest>/<server>/<task>.json)
+            - If not set, the whole server is exported (C(export_all)) to C(<dest>/<server>.json)
+        type: list
+        required: False
+        aliases:
+            - name
+            - task_name
+    with_endpoints:
+        description:
+            - Wether or not the task exports include the task endpoints definitions
+        type: bool
+        default: True
+    dest:
+        description:
+            - The directory where the exports are written
+        type: path
+        required: True
+    split:
+        description:
+            - If I(split=yes), each export is also split into C(<dest>/<server>/tasks/<task>.json) files, without the endpoints,
+              and C(<dest>/<server>/endpoints/<endpoint>.json) files, ready to be used as M(qem_task) and M(qem_endpoint) definitions
+        type: bool
+        default: False
+    parallelism:
+        description:
+            - The maximum number of concurrent exports
+        type: int
+        default: 8
+        required: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Export a task with its endpoints
+- name: Export sample task
+    qem_export:
+        server: "My Sample Server"
+        tasks:
+            - "My Sample Task"
+        dest: "exports"
+
+# Export every server and split the definitions into task/endpoint files
+- name: Export the fleet
+    qem_export:
+        server: all
+        dest: "definitions"
+        split: yes
+        parallelism: 16
+    register: output
+
+- name: Display the exported files
+    var: output.exports
+'''
+
+import os
+import time
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_export import safe_file_name, split_export, stream_to_file
+from ansible.module_utils.qem_parallel import run_parallel
+
+class QemExportManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            server=dict(required=True, type='raw', aliases=['replicate_server', 'compose_server']),
+            tasks=dict(required=False, type='list', aliases=['name', 'task_name']),
+            with_endpoints=dict(required=False, type='bool', default=True),
+            dest=dict(required=True, type='path'),
+            split=dict(required=False, type='bool', default=False),
+            parallelism=dict(required=False, type='int', default=8),
+        )
+
+        self.server = None
+        self.tasks = None
+        self.with_endpoints = None
+        self.dest = None
+        self.split = None
+        self.parallelism = None
+
+        super(QemExportManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.results = dict(
+            changed=False,
+            msg=""
+        )
+
+        start = time.time()
+        try:
+            servers = self.resolve_servers(self.server)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
+        exports = []
+        for server in servers:
+            if self.tasks:
+                exports.extend((server, task) for task in self.tasks)
+            else:
+                exports.append((server, None))
+
+        outcomes = run_parallel(self.export, exports, self.parallelism)
+        self.results['exports'] = [outcome['result'] for outcome in outcomes.values() if outcome['error'] is None]
+        self.results['errors'] = dict(
+            (server if task is None else '{0}/{1}'.format(server, task), outcome['error'])
+            for (server, task), outcome in outcomes.items() if outcome['error'] is not None
+        )
+        self.results['elapsed'] = round(time.time() - start, 3)
+        self.results['changed'] = any(
+            export['changed'] or any(split_file['changed'] for split_file in export['files'])
+            for export in self.results['exports']
+        )
+
+        if self.results['errors']:
+            self.results['msg'] = '{0} of {1} exports failed'.format(len(self.results['errors']), len(exports))
+            self.fail(**self.results)
+        return self.results
+
+    def export(self, export):
+        server, task = export
+        start = time.time()
+        if task is None:
+            path = os.path.join(self.dest, '{0}.json'.format(safe_file_name(server)))
+            changed = stream_to_file(lambda output: self.aem_client.export_all_to(server, output), path)
+        else:
+            path = os.path.join(self.dest, safe_file_name(server), '{0}.json'.format(safe_file_name(task)))
+            changed = stream_to_file(lambda output: self.aem_client.export_task_to(server, task, output, self.with_endpoints), path)
+
+        files = []
+        if self.split:
+            server_dir = os.path.join(self.dest, safe_file_name(server))
+            for kind, name, split_path, split_changed in split_export(path, os.path.join(server_dir, 'tasks'), os.path.join(server_dir, 'endpoints')):
+                files.append(dict(kind=kind, name=name, path=split_path, changed=split_changed))
+
+        return dict(
+            server=server,
+            task=task,
+            path=path,
+            size=os.path.getsize(path),
+            changed=changed,
+            files=files,
+            elapsed=round(time.time() - start, 3)
+        )
+
+def main():
+    QemExportManager()
+
+
+if __name__ == '__main__':
+    main()
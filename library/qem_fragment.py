@@ -6,6 +6,8 @@ options:
     qem_hostname:
         description:
             - Qlik Enterprise manager host name.
+            - Several host names separated by commas (eg. C(qem1.contoso.com,qem2.contoso.com)) are tried in this order, each one with its own session,
+              a host failing to answer is skipped for 30 seconds. Only the read requests are sent again to the next host after a failure.
         type: str
         required: False
     qem_domain:
@@ -33,15 +35,50 @@ options:
             - Security profile found in ~/.qem/credentials file.
         type: str
         required: False
+    qem_hedged_reads:
+        description:
+            - With several I(qem_hostname), a read request not answered within the 95th percentile of its recent latencies is also sent to the next host,
+              the first answer is used.
+        type: bool
+        default: False
+    qem_broker:
+        description:
+            - Wether or not the module connects through the local QEM session broker, started on demand, instead of logging in itself.
+        type: bool
+        default: False
+    qem_broker_socket:
+        description:
+            - The Unix socket of the local QEM session broker.
+        type: path
+        default: ~/.qem/broker.sock
+    qem_broker_idle_timeout:
+        description:
+            - How long in seconds the broker started by the module stays alive without any request.
+        type: int
+        default: 300
+    qem_circuit_failures:
+        description:
+            - The number of consecutive connection failures to a managed server after which its calls fail immediately, 0 disables the circuit breakers.
+            - When enabled, a server reported in C(ERROR) by the server list also fails its calls immediately.
+        type: int
+        default: 0
+    qem_circuit_reset_timeout:
+        description:
+            - How long in seconds the calls to an unavailable managed server fail before its state is checked again.
+        type: int
+        default: 30
 
 notes:
     - For authentication with Qlik Enterprise Manager you can pass parameters, set environment variables,
       use a profile stored in ~/.qem/credentials.
     - To authenticate via module parameters qem_hostname, qem_domain, qem_username, qem_password,
       qem_verify_certificate or set environment variables QEM_HOSTNAME, QEM_DOMAIN, QEM_USERNAME, QEM_PASSWORD,
-      QEM_VERIFY_CERTIFICATE.
+      QEM_VERIFY_CERTIFICATE, QEM_HEDGED_READS.
     - "Alternatively, credentials can be stored in ~/.qem/credentials. This is an ini file containing
       a [default] section and the following keys: qem_hostname, qem_domain, qem_username, qem_password,
       qem_verify_certificate. It is also possible to add additional profiles. Specify the profile by passing profile or
       setting QEM_PROFILE in the environment."
+    - The local session broker can also be enabled with the QEM_BROKER, QEM_BROKER_SOCKET and QEM_BROKER_IDLE_TIMEOUT environment variables.
+      It keeps logged-in clients (a few per QEM host and user) so the modules running in parallel forks share warm sessions.
+    - The circuit breakers can also be configured with the QEM_CIRCUIT_FAILURES and QEM_CIRCUIT_RESET_TIMEOUT environment variables.
 '''
\ No newline at end of file
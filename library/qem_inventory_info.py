@@ -0,0 +1,165 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_inventory_info
+short_description: Qlik Replicate/Compose fleet snapshot via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Return in one step the servers, server details (version, license, task summary, resource utilization), tasks, endpoints and ACLs of every server managed by Qlik Enterprise Manager
+    - The calls are done concurrently, servers which are not monitored by QEM are skipped without being called.
+options:
+    server:
+        description:
+            - Restrict the snapshot to a list of servers, all the servers are included by default
+        type: list
+        required: False
+        aliases:
+            - servers
+    sections:
+        description:
+            - The data to gather for each server, the server list entry is always included
+        type: list
+        default:
+            - details
+            - tasks
+            - endpoints
+            - acl
+    skip_unmonitored:
+        description:
+            - Wether or not the servers not in the MONITORED state are skipped
+        type: bool
+        default: True
+    parallelism:
+        description:
+            - The maximum number of concurrent calls
+        type: int
+        default: 8
+        required: False
+    dest:
+        description:
+            - If set, the snapshot is written as JSON to this file instead of being returned, only the summary is returned
+        type: path
+        required: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Full fleet snapshot
+- name: Fleet snapshot
+    qem_inventory_info:
+    register: output
+
+- name: Display the version of a server
+    var: output.qem_inventory["My Sample Server"].version
+
+# Tasks and license state of two servers
+- name: Partial snapshot
+    qem_inventory_info:
+        server:
+            - "My Sample Server"
+            - "My Other Server"
+        sections:
+            - details
+            - tasks
+    register: output
+
+# Large fleet snapshot written to a file
+- name: Fleet snapshot to file
+    qem_inventory_info:
+        dest: "/tmp/qem-inventory.json"
+        parallelism: 32
+    register: output
+
+- name: Display summary
+    var: output.summary
+'''
+
+import json
+import os
+import tempfile
+import time
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_inventory import INVENTORY_SECTIONS, collect_inventory, inventory_summary
+
+class QemInventoryInfoManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            server=dict(required=False, type='list', aliases=['servers']),
+            sections=dict(required=False, type='list', default=list(INVENTORY_SECTIONS)),
+            skip_unmonitored=dict(required=False, type='bool', default=True),
+            parallelism=dict(required=False, type='int', default=8),
+            dest=dict(required=False, type='path'),
+        )
+
+        self.server = None
+        self.sections = None
+        self.skip_unmonitored = None
+        self.parallelism = None
+        self.dest = None
+
+        super(QemInventoryInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        unknown_sections = [section for section in self.sections if section not in INVENTORY_SECTIONS]
+        if unknown_sections:
+            self.fail(msg="Unknown sections: {0}".format(', '.join(unknown_sections)))
+
+        self.results = dict(
+            changed=False,
+            msg=""
+        )
+
+        start = time.time()
+        try:
+            inventory = collect_inventory(
+                self.aem_client,
+                servers=self.server,
+                sections=self.sections,
+                parallelism=self.parallelism,
+                skip_unmonitored=self.skip_unmonitored
+            )
+        except Exception as ex:
+            self.fail(msg=str(ex))
+        self.results['elapsed'] = round(time.time() - start, 3)
+        self.results['summary'] = inventory_summary(inventory)
+
+        if self.dest:
+            self.results['dest'] = self.dest
+            self.results['changed'] = self.write_inventory(inventory)
+        else:
+            self.results['qem_inventory'] = inventory
+        return self.results
+
+    def write_inventory(self, inventory):
+        content = json.dumps(inventory, indent=2)
+        try:
+            with open(self.dest) as current:
+                if current.read() == content:
+                    return False
+        except (IOError, OSError):
+            pass
+        directory = os.path.dirname(os.path.abspath(self.dest))
+        handle, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'w') as snapshot:
+            snapshot.write(content)
+        os.rename(tmp_path, self.dest)
+        return True
+
+def main():
+    QemInventoryInfoManager()
+
+
+if __name__ == '__main__':
+    main()
@@ -90,12 +90,12 @@ EXAMPLES = '''
 '''
 
 import json
-from ansible.module_utils.qem import QemModuleBase
+from ansible.module_utils.qem_common import QemModuleBase
 from ansible.module_utils.aem_client import AemLicenseState
 
 class QemLicenseManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=True, aliases=['server', 'replicat_server', 'compose_server']),
@@ -107,7 +107,7 @@ class QemLicenseManager(QemModuleBase):
         self.name = None
         self.license = None
 
-        super(QemLicenseManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemLicenseManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
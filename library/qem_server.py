@@ -101,7 +101,7 @@ from ansible.module_utils.qem_common import QemModuleBase
 
 class QemServerManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=True, aliases=['server']),
@@ -127,7 +127,7 @@ class QemServerManager(QemModuleBase):
         self.monitored = None
         self.type = None
 
-        super(QemServerManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemServerManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -24,6 +24,17 @@ options:
             - The settings to apply
         type: str
         required: true
+    import_mode:
+        description:
+            - The current settings are exported and compared with I(settings), nothing is imported when there is no difference.
+            - If I(import_mode=full), the whole I(settings) document is imported as soon as a difference is found.
+            - If I(import_mode=sections), only the changed sections (and for tasks/endpoints only the added or changed items) are imported,
+              the endpoints used by the imported tasks are always imported with them.
+            - Items present on the server but missing from I(settings) are reported as C(removed) but never deleted.
+        default: full
+        choices:
+            - sections
+            - full
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -37,22 +48,30 @@ EXAMPLES = '''
 '''
 
 import json
+from collections import OrderedDict
 from ansible.module_utils.aem_client import AemReplicateServer, AemComposeServer
 from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_definitions import task_endpoint_names
+from ansible.module_utils.qem_fingerprint import diff_section, item_name
+
+# Top level keys describing the export itself rather than the server configuration
+ENVELOPE_KEYS = ('name', 'description', '_version')
 
 class QemSettingsManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=True, aliases=['server']),
-            settings=dict(required=False, default="")
+            settings=dict(required=False, default=""),
+            import_mode=dict(default='full', choices=['sections', 'full'])
         )
 
         self.name = None
         self.settings = None
+        self.import_mode = None
 
-        super(QemSettingsManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemSettingsManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -76,15 +95,71 @@ class QemSettingsManager(QemModuleBase):
         except Exception as e:
             return None
 
+    def load_settings(self, settings):
+        if isinstance(settings, bytes):
+            settings = settings.decode('utf-8')
+        if isinstance(settings, dict):
+            return settings
+        return json.loads(settings, object_pairs_hook=OrderedDict)
+
+    def diff_settings(self, current, desired):
+        # Sections are the keys of the replication definition (tasks, databases, ...) plus any other non envelope top level key
+        diff = OrderedDict()
+        for key, value in desired.items():
+            if key in ENVELOPE_KEYS:
+                continue
+            if isinstance(value, dict) and isinstance(current.get(key), dict):
+                for section, section_value in value.items():
+                    section_diff = diff_section(current[key].get(section), section_value)
+                    if section_diff:
+                        diff[(key, section)] = section_diff
+            else:
+                section_diff = diff_section(current.get(key), value)
+                if section_diff:
+                    diff[(key,)] = section_diff
+        return diff
+
+    def build_partial_settings(self, desired, diff):
+        partial = OrderedDict((key, value) for key, value in desired.items() if key in ENVELOPE_KEYS)
+        for path, section_diff in diff.items():
+            value = desired[path[0]] if len(path) == 1 else desired[path[0]][path[1]]
+            if isinstance(section_diff, dict):
+                names = set(section_diff['added'] + section_diff['changed'])
+                value = [item for item in value if item_name(item) in names]
+            if len(path) == 1:
+                partial[path[0]] = value
+            else:
+                partial.setdefault(path[0], OrderedDict())[path[1]] = value
+        self.add_task_endpoints(desired, partial)
+        return partial
+
+    def add_task_endpoints(self, desired, partial):
+        # An imported task must come with the endpoints it uses, even unchanged ones
+        for key, value in partial.items():
+            if not isinstance(value, dict) or not value.get('tasks'):
+                continue
+            names = set(name for task in value['tasks'] for name in task_endpoint_names(task))
+            databases = value.setdefault('databases', [])
+            names.difference_update(item_name(database) for database in databases)
+            databases.extend(database for database in desired[key].get('databases', []) if item_name(database) in names)
+
     def import_settings(self):
         if self.is_server_present():
             try:
+                desired = self.load_settings(self.settings)
+                current = self.load_settings(self.aem_client.export_all(self.name))
+                diff = self.diff_settings(current, desired)
+                self.results['diff'] = dict(('.'.join(path), section_diff) for path, section_diff in diff.items())
+                if not diff:
+                    self.results['msg'] = 'Settings up to date'
+                    return
+                payload = desired if self.import_mode == 'full' else self.build_partial_settings(desired, diff)
                 self.aem_client.import_all(
-                    payload=self.settings,
+                    payload=json.dumps(payload, indent=None),
                     server=self.name
                 )
                 self.results['changed'] = True
-                self.results['msg'] = 'Settings imported'
+                self.results['msg'] = 'Settings imported ({0} sections changed)'.format(len(diff))
             except Exception as ex:
                 self.fail(msg=str(ex))
 
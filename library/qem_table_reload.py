@@ -0,0 +1,196 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_table_reload
+short_description: Reload Qlik Replicate task tables via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Reload tables of a Qlik Replicate task using the Qlik Enterprise Manager API Python client.
+    - The reloads are submitted concurrently, with an optional rate limit so the source database is not overwhelmed.
+    - Return the result and timings of every table reload.
+options:
+    name:
+        description:
+            - The name of the task
+        type: str
+        required: True
+        aliases:
+            - task_name
+    server:
+        description:
+            - The server where the task is defined
+        type: str
+        required: True
+        aliases:
+            - replicate_server
+            - compose_server
+    tables:
+        description:
+            - The tables to reload, as C(SCHEMA.TABLE) strings or C(schema)/C(table) dictionaries
+            - Schema and table names may be patterns (C(*), C(?), C([seq])), they are resolved against the explicitly included tables of the task definition
+        type: list
+        required: True
+    parallelism:
+        description:
+            - The maximum number of concurrent reload requests
+        type: int
+        default: 4
+        required: False
+    rate_limit:
+        description:
+            - The maximum number of reload requests submitted per second, 0 disables the limit
+        type: float
+        default: 0
+        required: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Reload two tables
+- name: Reload sample tables
+    qem_table_reload:
+        name: "My Sample Task"
+        server: "My Sample Server"
+        tables:
+            - "HR.EMPLOYEES"
+            - schema: "HR"
+              table: "DEPARTMENTS"
+
+# Reload every table of a schema, 2 requests per second at most
+- name: Reload the HR schema
+    qem_table_reload:
+        name: "My Sample Task"
+        server: "My Sample Server"
+        tables:
+            - "HR.*"
+        parallelism: 8
+        rate_limit: 2
+    register: output
+
+- name: Display the reloads
+    var: output.tables
+'''
+
+import json
+import time
+from fnmatch import fnmatchcase
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_parallel import run_parallel
+
+class QemTableReloadManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            name=dict(required=True, aliases=['task_name']),
+            server=dict(required=True, aliases=['replicate_server', 'compose_server']),
+            tables=dict(required=True, type='list'),
+            parallelism=dict(required=False, type='int', default=4),
+            rate_limit=dict(required=False, type='float', default=0),
+        )
+
+        self.name = None
+        self.server = None
+        self.tables = None
+        self.parallelism = None
+        self.rate_limit = None
+
+        super(QemTableReloadManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.results = dict(
+            task=dict(
+                name=self.name,
+                server=self.server
+            ),
+            changed=False,
+            msg=""
+        )
+
+        start = time.time()
+        try:
+            selectors = [self.parse_table(table) for table in self.tables]
+            tables = self.resolve_tables(selectors)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
+        outcomes = run_parallel(self.reload_table, tables, self.parallelism, self.rate_limit)
+        self.results['tables'] = [
+            dict(
+                schema=schema,
+                table=table,
+                reloaded=outcome['error'] is None,
+                error=outcome['error'],
+                elapsed=round(outcome['elapsed'], 3),
+                wait=round(outcome['wait'], 3)
+            )
+            for (schema, table), outcome in outcomes.items()
+        ]
+        failures = ['{0}.{1}'.format(result['schema'], result['table']) for result in self.results['tables'] if not result['reloaded']]
+        self.results['summary'] = dict(
+            total=len(tables),
+            reloaded=len(tables) - len(failures),
+            failed=len(failures),
+            failures=failures
+        )
+        self.results['changed'] = len(failures) < len(tables)
+        self.results['elapsed'] = round(time.time() - start, 3)
+
+        if failures:
+            self.results['msg'] = '{0} of {1} table reloads failed'.format(len(failures), len(tables))
+            self.fail(**self.results)
+        return self.results
+
+    def parse_table(self, table):
+        if isinstance(table, dict):
+            if not table.get('schema') or not table.get('table'):
+                raise ValueError('A table dictionary requires schema and table: {0}'.format(table))
+            return table['schema'], table['table']
+        if '.' not in table:
+            raise ValueError('A table must be given as SCHEMA.TABLE: {0}'.format(table))
+        return tuple(table.split('.', 1))
+
+    def is_pattern(self, name):
+        return any(character in name for character in '*?[')
+
+    def resolve_tables(self, selectors):
+        # Literal tables are reloaded as given, patterns are matched against the task definition (exported once)
+        tables = []
+        seen = set()
+        if any(self.is_pattern(schema) or self.is_pattern(table) for schema, table in selectors):
+            definition = json.loads(self.aem_client.export_task(self.server, self.name))
+            task = definition['cmd.replication_definition']['tasks'][0]
+            included = [(item['owner'], item['name']) for item in task['source'].get('source_tables', {}).get('explicit_included_tables', [])]
+        for schema, table in selectors:
+            if self.is_pattern(schema) or self.is_pattern(table):
+                matches = [(owner, name) for owner, name in included if fnmatchcase(owner, schema) and fnmatchcase(name, table)]
+                if not matches:
+                    raise ValueError('No table of task {0} matches {1}.{2}'.format(self.name, schema, table))
+            else:
+                matches = [(schema, table)]
+            for match in matches:
+                if match not in seen:
+                    seen.add(match)
+                    tables.append(match)
+        return tables
+
+    def reload_table(self, table):
+        schema, name = table
+        self.aem_client.reload_table(self.server, self.name, schema, name)
+
+def main():
+    QemTableReloadManager()
+
+
+if __name__ == '__main__':
+    main()
@@ -31,11 +31,27 @@ options:
     server:
         description:
             - The server to import the task
+            - If I(server=auto), the task is placed on one of the I(candidates), the server already defining the task if any,
+              otherwise the least loaded eligible one (monitored, valid license, version not older than the definition C(_version))
+            - The load score weights the Replicate CPU usage (40%), the running tasks (30%), the memory usage (20%) and the defined tasks (10%),
+              each relative to the most loaded candidate
         type: str
         required: True
         aliases:
             - replicate_server
             - compose_server
+    candidates:
+        description:
+            - The servers the task may be placed on when I(server=auto), a list of servers or C(all) (every server managed by QEM)
+            - The candidates are examined concurrently
+        type: raw
+        required: False
+    parallelism:
+        description:
+            - The maximum number of candidates examined concurrently
+        type: int
+        default: 8
+        required: False
     definition:
         description:
             - The task definition in JSON
@@ -56,6 +72,31 @@ options:
         type: int
         default: 60
         required: False
+    update:
+        description:
+            - If I(update=yes) and the task already exists, the live task is exported and compared with the definition, the task is re-imported only if the content differs.
+            - Both documents are canonicalized before the comparison, volatile fields (C(_version), C(task_uuid)) are ignored.
+            - Depending on the Replicate version, the task may need to be stopped to be re-imported.
+        type: bool
+        default: False
+    update_ignore_keys:
+        description:
+            - Additional keys to ignore, at any depth, when comparing the definition with the live task.
+        type: list
+        default: []
+        required: False
+    fingerprint_cache:
+        description:
+            - Local file where the task fingerprints are cached per QEM host, server and task.
+        type: str
+        default: ~/.qem/cache/fingerprints.json
+        required: False
+    fingerprint_cache_ttl:
+        description:
+            - How long in seconds a cached fingerprint confirms a task is up to date without exporting it, 0 disables the cache.
+        type: int
+        default: 3600
+        required: False
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -161,6 +202,28 @@ EXAMPLES = '''
                 "databases": []
             }    
         }
+
+# Updating a task only when its definition changed
+- name: Import or update sample task
+    qem_task:
+        name: "My Sample Task"
+        server: "My Sample Server"
+        state: present
+        update: yes
+        definition: "{{ lookup('template', 'tasks/my-sample-task.json') }}"
+
+# Importing a task on the least loaded Replicate server of the inventory
+- name: Import sample task on the best server
+    qem_task:
+        name: "My Sample Task"
+        server: auto
+        candidates: "{{ groups['qem_replicate'] | map('extract', hostvars, 'qem_server') | list }}"
+        state: present
+        definition: "{{ lookup('template', 'tasks/my-sample-task.json') }}"
+    register: output
+
+- name: Display the chosen server and the scores
+    var: output.placement
 '''
 
 import json
@@ -168,11 +231,13 @@ import ast
 from collections import OrderedDict
 from ansible.module_utils.aem_client import AemTaskState
 from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_fingerprint import FingerprintCache, fingerprint, VOLATILE_KEYS, DEFAULT_FINGERPRINT_CACHE
+from ansible.module_utils.qem_placement import place_task
 
 
 class QemTaskManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['task_name']),
@@ -182,6 +247,12 @@ class QemTaskManager(QemModuleBase):
             delete_task_logs=dict(required=False, type='bool', default=True),
             force_task_stop=dict(required=False, type='bool', default=False),
             force_task_timeout=dict(required=False, type='int', default=60),
+            update=dict(required=False, type='bool', default=False),
+            update_ignore_keys=dict(required=False, type='list', default=[]),
+            fingerprint_cache=dict(required=False, default=DEFAULT_FINGERPRINT_CACHE),
+            fingerprint_cache_ttl=dict(required=False, type='int', default=3600),
+            candidates=dict(required=False, type='raw'),
+            parallelism=dict(required=False, type='int', default=8),
         )
 
         self.state = None
@@ -191,8 +262,15 @@ class QemTaskManager(QemModuleBase):
         self.delete_task_logs = None
         self.force_task_stop = None
         self.force_task_timeout = None
+        self.update = None
+        self.update_ignore_keys = None
+        self.fingerprint_cache = None
+        self.fingerprint_cache_ttl = None
+        self.candidates = None
+        self.parallelism = None
+        self.placement = None
 
-        super(QemTaskManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemTaskManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def get_server_version(self):
         response = self.aem_client.get_server_details(server=self.server)
@@ -217,8 +295,16 @@ class QemTaskManager(QemModuleBase):
             else:
                 self.task_object['cmd.replication_definition']['tasks'][0]['task']['name'] = self.name
 
-            if not self.task_object['_version']:
-                self.task_object['_version'] = self.get_server_version()
+        if self.server == 'auto':
+            self.place_task()
+
+        # server is None when server=auto found the task to delete on no candidate
+        if self.definition and self.server is not None:
+            if not self.task_object.get('_version'):
+                try:
+                    self.task_object['_version'] = self.get_server_version()
+                except Exception as ex:
+                    self.fail(msg=str(ex))
 
         states = {
             "present": self.import_task,
@@ -232,13 +318,42 @@ class QemTaskManager(QemModuleBase):
             changed=False,
             msg=""
         )
+        if self.placement:
+            self.results['placement'] = self.placement
 
         states.get(self.state)()
 
         return self.results
 
 
+    def place_task(self):
+        # Resolves server=auto to a candidate, the definition version (if any) must be supported by the chosen server
+        if not self.candidates:
+            self.fail(msg="candidates is required when server is auto")
+        if not self.name:
+            self.fail(msg="name or definition is required when server is auto")
+        try:
+            candidates = self.resolve_servers(self.candidates)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+        required_version = None
+        if self.definition and self.task_object.get('_version'):
+            required_version = self.task_object['_version'].get('version')
+        server, reason, scores, errors = place_task(self.aem_client, candidates, self.name, required_version, self.parallelism)
+        if self.state == 'absent' and not errors and not any(score['has_task'] for score in scores):
+            # nothing to delete on any candidate
+            server, reason = None, 'task not defined'
+        self.placement = dict(server=server, reason=reason, scores=scores, errors=errors)
+        if server is None:
+            if reason == 'task not defined':
+                self.server = None
+                return
+            self.fail(msg="No server to place task \"{0}\" on: {1}".format(self.name, reason), placement=self.placement)
+        self.server = server
+
     def get_task_info(self):
+        if self.server is None:
+            return None
         response = self.aem_client.get_task_list(self.server)
         if not response:
             return None
@@ -248,7 +363,10 @@ class QemTaskManager(QemModuleBase):
         return None
 
     def import_task(self):
-        if not self.get_task_info():
+        if self.get_task_info():
+            if self.update:
+                self.update_task()
+        else:
             try:
                 self.aem_client.import_task(
                     payload=json.dumps(self.task_object, indent=None),
@@ -260,6 +378,46 @@ class QemTaskManager(QemModuleBase):
             except Exception as ex:
                 self.fail(msg=str(ex))
 
+    def task_fingerprint(self, document):
+        # Only the replication definition is compared, the export envelope (name, description, version) is regenerated on each export
+        if isinstance(document, (bytes, str)):
+            document = json.loads(document)
+        ignored_keys = tuple(VOLATILE_KEYS) + tuple(self.update_ignore_keys)
+        return fingerprint(document.get('cmd.replication_definition'), ignored_keys)
+
+    def live_fingerprint(self):
+        return self.task_fingerprint(self.aem_client.export_task(self.server, self.name))
+
+    def update_task(self):
+        # The cache records, per QEM host/server/task, the desired fingerprint last applied and the live fingerprint observed afterwards.
+        # While the entry is fresh the task is trusted to be up to date; once expired the live task is exported again and
+        # is still considered up to date if it matches either the desired definition or what we observed after our last import.
+        cache = FingerprintCache(self.fingerprint_cache, self.fingerprint_cache_ttl)
+        cache_key = '{0}/{1}/{2}'.format(self.qem_hostname, self.server, self.name)
+        desired = self.task_fingerprint(self.task_object)
+        self.results['fingerprint'] = desired
+        try:
+            entry = cache.get(cache_key)
+            if entry and entry.get('desired') == desired:
+                self.results['msg'] = 'task up to date (cached fingerprint)'
+                return
+            live = self.live_fingerprint()
+            previous = cache.entries.get(cache_key) or dict()
+            if live == desired or (previous.get('desired') == desired and previous.get('live') == live):
+                cache.put(cache_key, desired=desired, live=live)
+                self.results['msg'] = 'task up to date'
+                return
+            self.aem_client.import_task(
+                payload=json.dumps(self.task_object, indent=None),
+                server=self.server,
+                task=self.name
+            )
+            cache.put(cache_key, desired=desired, live=self.live_fingerprint())
+            self.results['changed'] = True
+            self.results['msg'] = 'task updated'
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
     def delete_task(self):
         task_info = self.get_task_info()
         if task_info:
@@ -22,11 +22,19 @@ options:
     server:
         description:
             - The server where the task is defined
-        type: str
+            - A list of servers or C(all) (every server managed by QEM) can be given, C(qem_tasks) is then a dictionary keyed by server
+              and the per-server errors and timings are returned as C(server_errors) and C(server_timings).
+        type: raw
         required: True
         aliases:
             - replicate_server
             - compose_server
+    parallelism:
+        description:
+            - The maximum number of servers queried concurrently when I(server) is a list or C(all).
+        type: int
+        default: 8
+        required: False
 
 author:
     - Daniel Petisme (daniel.petisme@michelin.com)
@@ -50,6 +58,16 @@ EXAMPLES = '''
 
 - name: Display facts
     var: output.qem_tasks
+
+# Task facts of the whole fleet
+- name: Fleet task facts
+    qem_task_info:
+        server: all
+        parallelism: 16
+    register: output
+
+- name: Display facts
+    var: output.qem_tasks["My Sample Server"]
 '''
 
 import json
@@ -59,17 +77,19 @@ from ansible.module_utils.qem_common import QemModuleBase
 
 class QemTaskInfoManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['task_name']),
-            server=dict(required=True, aliases=['task_server']),
+            server=dict(required=True, type='raw', aliases=['task_server']),
+            parallelism=dict(required=False, type='int', default=8),
         )
 
         self.server = None
         self.task = None
+        self.parallelism = None
 
-        super(QemTaskInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemTaskInfoManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -84,11 +104,17 @@ class QemTaskInfoManager(QemModuleBase):
             changed=False,
             msg=""
         )
-        self.results['qem_tasks'] = self.get_tasks_info()
+        if self.is_fleet(self.server):
+            tasks, errors, timings = self.gather_fleet(self.server, self.get_tasks_info, self.parallelism)
+            self.results['qem_tasks'] = tasks
+            self.results['server_errors'] = errors
+            self.results['server_timings'] = timings
+        else:
+            self.results['qem_tasks'] = self.get_tasks_info(self.server)
         return self.results
 
-    def get_tasks_info(self):
-        response = self.aem_client.get_task_list(self.server)
+    def get_tasks_info(self, server):
+        response = self.aem_client.get_task_list(server)
         if not response:
             return None
         tasks = []
@@ -96,7 +122,7 @@ class QemTaskInfoManager(QemModuleBase):
             tasks = [task for task in response.taskList if task.name == self.name]
         else:
             tasks = response.taskList
-        return map(self.task_mapper, tasks)
+        return list(map(self.task_mapper, tasks))
 
     def task_mapper(self, task):
       return {
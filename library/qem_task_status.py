@@ -15,10 +15,77 @@ options:
     name:
         description:
             - The name of the task you wan to start/stop
+            - Required unless the tasks are selected with I(names), I(pattern) or I(tags)
         type: str
-        required: True
+        required: False
         aliases:
             - task_name
+    names:
+        description:
+            - Bulk mode, the names of the tasks to start/stop
+        type: list
+        required: False
+    pattern:
+        description:
+            - Bulk mode, select the tasks whose name matches this regular expression (searched anywhere in the name, use C(^) and C($) to anchor it)
+        type: str
+        required: False
+    tags:
+        description:
+            - Bulk mode, select the tasks having at least one of these assigned tags
+        type: list
+        required: False
+    parallelism:
+        description:
+            - Bulk mode, the maximum number of tasks started/stopped concurrently
+        type: int
+        default: 8
+        required: False
+    waves:
+        description:
+            - Bulk mode, a list of regular expressions ordering the selected tasks in waves, a wave starts once the previous one is done
+            - A task belongs to the first wave whose expression matches its name, the tasks matching none of them form a last wave
+        type: list
+        required: False
+    max_cpu_percentage:
+        description:
+            - Bulk mode admission control, a task is started only while the Replicate CPU usage of the server is below this percentage
+        type: int
+        required: False
+    max_memory_mb:
+        description:
+            - Bulk mode admission control, a task is started only while the Replicate memory usage of the server is below this value
+        type: int
+        required: False
+    max_disk_usage_mb:
+        description:
+            - Bulk mode admission control, a task is started only while the Replicate disk usage of the server is below this value
+        type: int
+        required: False
+    max_running_tasks:
+        description:
+            - Bulk mode admission control, a task is started only while fewer tasks are running or recovering on the server
+        type: int
+        required: False
+    sample_interval:
+        description:
+            - Bulk mode admission control, the interval in seconds between two samples of the server utilization
+            - At most I(admission_burst) starts are admitted between two samples
+        type: int
+        default: 10
+        required: False
+    admission_burst:
+        description:
+            - Bulk mode admission control, the maximum number of starts admitted between two samples of the server utilization
+        type: int
+        default: 4
+        required: False
+    admission_timeout:
+        description:
+            - Bulk mode admission control, the maximum time in seconds a start may be queued before being reported as failed
+        type: int
+        default: 600
+        required: False
     state:
         description:
             - If I(state=started), task will be started
@@ -38,9 +105,17 @@ options:
     timeout:
         description:
             - A timeout in seconds before raising an issue during the task starting/stopping
+            - The start/stop request returns after I(submit_timeout), the task states are then polled (one task list call per round
+              for all the tasks, at an interval growing while nothing changes) until they are reached or the timeout expires
         type: int
         default: 60
         required: False
+    submit_timeout:
+        description:
+            - The time in seconds QEM may hold a start/stop request before answering with the current task state
+        type: int
+        default: 5
+        required: False
     option:
         description:
             - If I(option=resume_processing), resumes task execution from the point that it was stopped.
@@ -80,32 +155,93 @@ EXAMPLES = '''
         name: "My Sample Task"
         server: "My Sample Server"
         state: stopped
+
+# Stopping every task tagged "maintenance", the "_loader" tasks first
+- name: Stop the maintenance tasks
+    qem_task_status:
+        server: "My Sample Server"
+        tags:
+            - maintenance
+        waves:
+            - "_loader$"
+        parallelism: 16
+        state: stopped
+    register: output
+
+- name: Display the final states
+    var: output.tasks
+
+# Starting the full load tasks without saturating the server
+- name: Start the loaders
+    qem_task_status:
+        server: "My Sample Server"
+        pattern: "_loader$"
+        max_cpu_percentage: 70
+        max_memory_mb: 16384
+        max_running_tasks: 20
+        state: started
+    register: output
+
+- name: Display how long each start was queued
+    var: output.tasks | map(attribute='queue_delay') | list
 '''
 
 import json
+import re
+import time
 from collections import OrderedDict
 from ansible.module_utils.aem_client import AemTaskState, AemRunTaskReq, AemRunTaskOptions
+from ansible.module_utils.qem_admission import AdmissionController
 from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_parallel import run_parallel
+from ansible.module_utils.qem_wait import TaskStateWaiter
 
 class QemTaskStatusManager(QemModuleBase):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
         self.module_arg_spec = dict(
             name=dict(required=False, aliases=['task_name']),
             state=dict(default='present', choices=['present', 'absent', 'started', 'stopped']),
             server=dict(required=True, aliases=['replicate_server', 'compose_server']),
             timeout=dict(required=False, type='int', default=60),
-            option=dict(required=False, choices=[e.name.lower() for e in AemRunTaskOptions], default=AemRunTaskOptions.RESUME_PROCESSING.name.lower())
+            submit_timeout=dict(required=False, type='int', default=5),
+            option=dict(required=False, choices=[e.name.lower() for e in AemRunTaskOptions], default=AemRunTaskOptions.RESUME_PROCESSING.name.lower()),
+            names=dict(required=False, type='list'),
+            pattern=dict(required=False),
+            tags=dict(required=False, type='list'),
+            parallelism=dict(required=False, type='int', default=8),
+            waves=dict(required=False, type='list'),
+            max_cpu_percentage=dict(required=False, type='int'),
+            max_memory_mb=dict(required=False, type='int'),
+            max_disk_usage_mb=dict(required=False, type='int'),
+            max_running_tasks=dict(required=False, type='int'),
+            sample_interval=dict(required=False, type='int', default=10),
+            admission_burst=dict(required=False, type='int', default=4),
+            admission_timeout=dict(required=False, type='int', default=600),
         )
 
         self.state = None
         self.server = None
         self.name = None
         self.timeout = None
+        self.submit_timeout = None
         self.option = None
+        self.names = None
+        self.pattern = None
+        self.tags = None
+        self.parallelism = None
+        self.waves = None
+        self.max_cpu_percentage = None
+        self.max_memory_mb = None
+        self.max_disk_usage_mb = None
+        self.max_running_tasks = None
+        self.sample_interval = None
+        self.admission_burst = None
+        self.admission_timeout = None
+        self.admission = None
 
-        super(QemTaskStatusManager, self).__init__(derived_arg_spec=self.module_arg_spec)
+        super(QemTaskStatusManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
 
     def exec_module(self, **kwargs):
 
@@ -125,7 +261,10 @@ class QemTaskStatusManager(QemModuleBase):
             msg=""
         )
 
-        states.get(self.state)()
+        if self.names or self.pattern or self.tags:
+            self.change_tasks()
+        else:
+            states.get(self.state)()
 
         return self.results
 
@@ -151,12 +290,13 @@ class QemTaskStatusManager(QemModuleBase):
                     server=self.server,
                     task=self.name,
                     option=AemRunTaskOptions[self.option.upper()],
-                    timeout=self.timeout)
-                if result.state == AemTaskState.RUNNING:
-                    self.results['changed'] = True
-                    self.results['msg'] = 'task started'
+                    timeout=self.submit_timeout)
             except Exception as ex:
                 self.fail(msg=str(ex))
+            self.results['changed'] = True
+            self.results['msg'] = 'task started'
+            if result.state != AemTaskState.RUNNING:
+                self.wait_task(task_info, 'running')
 
 
     def stop_task(self):
@@ -168,12 +308,141 @@ class QemTaskStatusManager(QemModuleBase):
                 result = self.aem_client.stop_task(
                     server=self.server,
                     task=self.name,
-                    timeout=self.timeout
+                    timeout=self.submit_timeout
                 )
-                self.results['changed'] = True
-                self.results['msg'] = 'task started'
             except Exception as ex:
                 self.fail(msg=str(ex))
+            self.results['changed'] = True
+            self.results['msg'] = 'task stopped'
+            if result.state != AemTaskState.STOPPED:
+                self.wait_task(task_info, 'stopped')
+
+
+    def wait_task(self, task_info, target):
+        key = (self.server, task_info.name)
+        outcome = TaskStateWaiter(self.aem_client, timeout=self.timeout).wait({key: target}, {key: task_info.state.name})[key]
+        self.results['wait'] = round(outcome['elapsed'], 3)
+        if not outcome['reached']:
+            self.fail(msg="Task \"{0}\" did not reach the {1} state within {2}s, last state: {3}{4}".format(
+                task_info.name, target, self.timeout, outcome['state'], ', {0}'.format(outcome['error']) if outcome['error'] else ''), changed=True)
+
+
+    def select_tasks(self, task_list):
+        # A task is selected if it matches any of the given selectors
+        selected = []
+        for task in task_list:
+            if (self.names and task.name in self.names) \
+                    or (self.pattern and re.search(self.pattern, task.name)) \
+                    or (self.tags and set(self.tags) & set(task.assigned_tags or [])):
+                selected.append(task)
+        return selected
+
+    def plan_waves(self, tasks):
+        waves = [[] for wave in range(len(self.waves or []) + 1)]
+        for task in tasks:
+            index = next((index for index, wave in enumerate(self.waves or []) if re.search(wave, task.name)), len(waves) - 1)
+            waves[index].append(task)
+        return [wave for wave in waves if wave]
+
+    def change_tasks(self):
+        # One task list download, then the tasks not already in the desired state are started/stopped concurrently, wave after wave
+        if self.state not in ('started', 'stopped'):
+            self.fail(msg="Tasks can only be started or stopped in bulk")
+        try:
+            task_list = self.aem_client.get_task_list(self.server).taskList
+        except Exception as ex:
+            self.fail(msg=str(ex))
+        tasks = self.select_tasks(task_list)
+        missing = [name for name in self.names or [] if name not in [task.name for task in task_list]]
+        if missing:
+            self.fail(msg="Tasks not found on server \"{0}\": {1}".format(self.server, ', '.join(missing)))
+
+        start = time.time()
+        thresholds = [self.max_cpu_percentage, self.max_memory_mb, self.max_disk_usage_mb, self.max_running_tasks]
+        if self.state == 'started' and any(threshold is not None for threshold in thresholds):
+            self.admission = AdmissionController(
+                self.aem_client, [self.server],
+                max_cpu_percentage=self.max_cpu_percentage,
+                max_memory_mb=self.max_memory_mb,
+                max_disk_usage_mb=self.max_disk_usage_mb,
+                max_running=self.max_running_tasks,
+                interval=self.sample_interval,
+                burst=self.admission_burst,
+                timeout=self.admission_timeout)
+            self.admission.start()
+        try:
+            self.run_waves(tasks)
+        finally:
+            if self.admission is not None:
+                self.admission.stop()
+                self.results['admission'] = self.admission.report()
+
+        failures = [result['name'] for result in self.results['tasks'] if result['error'] is not None]
+        self.results['changed'] = any(result['changed'] for result in self.results['tasks'])
+        self.results['summary'] = dict(
+            total=len(tasks),
+            changed=len([result for result in self.results['tasks'] if result['changed']]),
+            failed=len(failures),
+            failures=failures
+        )
+        self.results['elapsed'] = round(time.time() - start, 3)
+        if failures:
+            self.results['msg'] = '{0} of {1} tasks failed to be {2}'.format(len(failures), len(tasks), self.state)
+            self.fail(**self.results)
+
+    def run_waves(self, tasks):
+        target = 'running' if self.state == 'started' else 'stopped'
+        waiter = TaskStateWaiter(self.aem_client, timeout=self.timeout)
+        self.results['tasks'] = []
+        for index, wave in enumerate(self.plan_waves(tasks)):
+            wave_start = time.time()
+            outcomes = run_parallel(self.change_task, wave, self.parallelism)
+            # The submitted tasks not yet in the target state are waited for together, the next wave starts once they are done
+            waiting = dict(
+                ((self.server, task.name), task.state.name) for task, outcome in outcomes.items()
+                if outcome['error'] is None and outcome['result']['final_state'] != target.upper()
+            )
+            wait_start = time.time()
+            waits = waiter.wait(dict((key, target) for key in waiting), waiting) if waiting else dict()
+            for task, outcome in outcomes.items():
+                result = outcome['result'] or dict(final_state=None, changed=False, queue_delay=None)
+                result.update(
+                    name=task.name,
+                    wave=index,
+                    previous_state=task.state.name,
+                    error=outcome['error'],
+                    elapsed=round(outcome['elapsed'], 3)
+                )
+                wait = waits.get((self.server, task.name))
+                if wait is not None:
+                    result['final_state'] = wait['state']
+                    result['elapsed'] = round(wait_start - wave_start + wait['elapsed'], 3)
+                    if not wait['reached']:
+                        result['error'] = wait['error'] or 'the {0} state was not reached within {1}s'.format(target, self.timeout)
+                self.results['tasks'].append(result)
+
+    def change_task(self, task_info):
+        queue_delay = 0
+        if self.state == 'started':
+            if task_info.state == AemTaskState.RUNNING:
+                return dict(final_state=task_info.state.name, changed=False, queue_delay=queue_delay)
+            if self.admission is not None:
+                # raises AdmissionTimeout, reported as the task error, when the server stays too loaded
+                queue_delay = round(self.admission.admit(self.server), 3)
+            result = self.aem_client.run_task(
+                payload=AemRunTaskReq(),
+                server=self.server,
+                task=task_info.name,
+                option=AemRunTaskOptions[self.option.upper()],
+                timeout=self.submit_timeout)
+        else:
+            if task_info.state == AemTaskState.STOPPED:
+                return dict(final_state=task_info.state.name, changed=False, queue_delay=queue_delay)
+            result = self.aem_client.stop_task(
+                server=self.server,
+                task=task_info.name,
+                timeout=self.submit_timeout)
+        return dict(final_state=result.state.name, changed=True, queue_delay=queue_delay)
 
 
 def main():
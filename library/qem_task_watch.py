@@ -0,0 +1,164 @@
+#!/usr/bin/python
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: qem_task_watch
+short_description: Report Qlik Replicate/Compose task state transitions via Qlik Enterprise Manager (QEM)
+version_added: "1.0"
+description:
+    - Compare the tasks of Qlik Replicate/Compose servers with the snapshot of the previous run and return only the transitions
+      (state, stop reason or message changes, added and removed tasks) using the Qlik Enterprise Manager API Python client.
+    - The snapshot is persisted in I(snapshot), a server seen for the first time only records its baseline.
+    - With I(duration), the servers are watched for that many seconds, each one polled at an interval halved when its tasks
+      change and growing while they do not, between I(min_interval) and I(max_interval).
+options:
+    server:
+        description:
+            - The server to watch, a list of servers or C(all) (every server managed by QEM)
+        type: raw
+        required: True
+        aliases:
+            - replicate_server
+            - compose_server
+    snapshot:
+        description:
+            - The file where the last task states of each server are kept between runs
+        type: path
+        default: ~/.qem/task_states.json
+        required: False
+    duration:
+        description:
+            - How long in seconds the servers are watched, 0 polls them once
+        type: int
+        default: 0
+        required: False
+    min_interval:
+        description:
+            - The shortest interval in seconds between two polls of a server
+        type: int
+        default: 5
+        required: False
+    max_interval:
+        description:
+            - The longest interval in seconds between two polls of a server
+        type: int
+        default: 120
+        required: False
+    events_file:
+        description:
+            - A file where the transitions are appended as JSON lines
+        type: path
+        required: False
+    parallelism:
+        description:
+            - The maximum number of servers polled concurrently
+        type: int
+        default: 8
+        required: False
+
+author:
+    - Daniel Petisme (daniel.petisme@michelin.com)
+'''
+EXAMPLES = '''
+# Report what changed since the previous run (eg. from cron)
+- name: Task transitions
+    qem_task_watch:
+        server: all
+        events_file: "/var/log/qem/task_events.jsonl"
+    register: output
+
+- name: Display the tasks which stopped on error
+    var: output.events | selectattr('state', 'equalto', 'ERROR') | list
+
+# Follow the fleet for 10 minutes during a maintenance
+- name: Watch the tasks
+    qem_task_watch:
+        server: all
+        duration: 600
+        min_interval: 2
+'''
+
+import json
+from os.path import expanduser
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.module_utils.qem_watch import DEFAULT_WATCH_SNAPSHOT, TaskWatcher
+
+class QemTaskWatchManager(QemModuleBase):
+
+    def __init__(self, **kwargs):
+
+        self.module_arg_spec = dict(
+            server=dict(required=True, type='raw', aliases=['replicate_server', 'compose_server']),
+            snapshot=dict(required=False, type='path', default=DEFAULT_WATCH_SNAPSHOT),
+            duration=dict(required=False, type='int', default=0),
+            min_interval=dict(required=False, type='int', default=5),
+            max_interval=dict(required=False, type='int', default=120),
+            events_file=dict(required=False, type='path'),
+            parallelism=dict(required=False, type='int', default=8),
+        )
+
+        self.server = None
+        self.snapshot = None
+        self.duration = None
+        self.min_interval = None
+        self.max_interval = None
+        self.events_file = None
+        self.parallelism = None
+
+        super(QemTaskWatchManager, self).__init__(derived_arg_spec=self.module_arg_spec, **kwargs)
+
+    def exec_module(self, **kwargs):
+
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.results = dict(
+            changed=False,
+            msg=""
+        )
+
+        try:
+            servers = self.resolve_servers(self.server)
+            watcher = TaskWatcher(
+                self.aem_client, servers,
+                snapshot_path=self.snapshot,
+                min_interval=self.min_interval,
+                max_interval=self.max_interval,
+                parallelism=self.parallelism)
+        except Exception as ex:
+            self.fail(msg=str(ex))
+
+        events = []
+        events_file = None
+        if self.events_file:
+            try:
+                events_file = open(expanduser(self.events_file), 'a')
+            except (IOError, OSError) as ex:
+                self.fail(msg="Failed to open events_file {0}: {1}".format(self.events_file, ex))
+        try:
+            def emit(event):
+                events.append(event)
+                if events_file:
+                    events_file.write(json.dumps(event, sort_keys=True) + '\n')
+                    events_file.flush()
+            watcher.watch(emit, self.duration)
+        finally:
+            if events_file:
+                events_file.close()
+
+        self.results['events'] = events
+        self.results['server_errors'] = watcher.errors
+        self.results['polls'] = watcher.polls
+        self.results['intervals'] = dict((server, round(interval, 3)) for server, interval in watcher.intervals.items())
+        return self.results
+
+def main():
+    QemTaskWatchManager()
+
+
+if __name__ == '__main__':
+    main()
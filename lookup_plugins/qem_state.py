@@ -0,0 +1,139 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    name: qem_state
+    short_description: Qlik Replicate/Compose task or endpoint state via Qlik Enterprise Manager (QEM)
+    description:
+        - Return the information of the given tasks (or endpoints) of a server, as returned by M(qem_task_info) (or M(qem_endpoint_info)).
+        - The lookup runs on the controller, one logged-in client is reused per QEM host and user for the whole process
+          and the task/endpoint lists are memoized for a short time (in memory and on disk to be shared by the forks),
+          so many lookups in a play do not log in or call QEM again.
+    options:
+        _terms:
+            description: The task (or endpoint) names.
+            required: True
+        server:
+            description: The server where the tasks/endpoints are defined.
+            required: True
+        kind:
+            description: Wether the terms are task or endpoint names.
+            default: task
+            choices: ['task', 'endpoint']
+        field:
+            description: If set, only this field (eg. C(state)) is returned instead of the whole information.
+        ttl:
+            description: How long in seconds a task/endpoint list is reused, 0 disables the memoization.
+            type: int
+            default: 10
+        cache_dir:
+            description: The directory where the lists are shared between the forks.
+            default: ~/.qem/cache/results
+        qem_hostname:
+            description: Qlik Enterprise manager host name.
+            env:
+                - name: QEM_HOSTNAME
+        qem_domain:
+            description: Active Directory domain where to find the user.
+            env:
+                - name: QEM_DOMAIN
+        qem_username:
+            description: Active Directory user to connect to Qlik Enterprise Manager.
+            env:
+                - name: QEM_USERNAME
+        qem_password:
+            description: Active Directory user password.
+            env:
+                - name: QEM_PASSWORD
+        qem_verify_certificate:
+            description: Wether or not the server certificate should be verifies.
+            type: bool
+            default: True
+            env:
+                - name: QEM_VERIFY_CERTIFICATE
+        profile:
+            description: Security profile found in ~/.qem/credentials file.
+            env:
+                - name: QEM_PROFILE
+        qem_hedged_reads:
+            description:
+                - With several I(qem_hostname), a read request not answered within the 95th percentile of its recent latencies is also
+                  sent to the next host, the first answer is used.
+            type: bool
+            default: False
+            env:
+                - name: QEM_HEDGED_READS
+'''
+
+EXAMPLES = '''
+- name: Restart the task only if it is not running
+  qem_task_status:
+    name: "My Task"
+    server: "My Sample Server"
+    state: started
+  when: lookup('qem_state', 'My Task', server='My Sample Server', field='state') != 'RUNNING'
+
+- name: Display the tasks information
+  debug:
+    msg: "{{ lookup('qem_state', 'My Task', 'My Other Task', server='My Sample Server', wantlist=True) }}"
+
+- name: Display an endpoint role
+  debug:
+    msg: "{{ lookup('qem_state', 'MyDB', kind='endpoint', server='My Sample Server', field='role') }}"
+'''
+
+RETURN = '''
+    _list:
+        description: The task (or endpoint) information, or the requested field, None for unknown names.
+        type: list
+'''
+
+import os
+import runpy
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+# Share the role module_utils with the controller side plugins, see module_utils/qem_paths.py
+runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))
+
+from ansible.module_utils.qem_client_cache import cached_call
+from ansible.module_utils.qem_common import QEM_ENV_MAPPING, resolve_credentials
+from ansible.module_utils.qem_inventory import endpoint_mapper, task_mapper
+
+KINDS = dict(
+    task=('get_task_list', lambda response: [task_mapper(task) for task in response.taskList]),
+    endpoint=('get_endpoint_list', lambda response: [endpoint_mapper(endpoint) for endpoint in response.endpointList]),
+)
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+
+        params = dict((key, self.get_option(key)) for key in QEM_ENV_MAPPING)
+        credentials = resolve_credentials(params)
+        if not credentials:
+            raise AnsibleError('Impossible to retrieve credentials from (in order) the lookup options, env vars or ~/.qem/credentials profile file')
+
+        method, mapper = KINDS[self.get_option('kind')]
+        try:
+            items = cached_call(
+                credentials,
+                method,
+                self.get_option('server'),
+                mapper,
+                ttl=self.get_option('ttl'),
+                cache_dir=self.get_option('cache_dir')
+            )
+        except Exception as ex:
+            raise AnsibleError('qem_state lookup failed: {0}'.format(getattr(ex, 'message', None) or ex))
+
+        by_name = dict((item['name'], item) for item in items)
+        field = self.get_option('field')
+        results = []
+        for term in terms:
+            item = by_name.get(term)
+            results.append(item.get(field) if item is not None and field else item)
+        return results
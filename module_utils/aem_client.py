@@ -14,7 +14,7 @@
 """
 
 # coding: utf-8
-import os, sys, ssl, base64
+import os, sys, ssl, base64, shutil
 from collections import OrderedDict
 import json
 
@@ -30,6 +30,7 @@ else:
 
 HEADERS_CONTENT_TYPE = 'Content-Type'
 HEADERS_CONTENT_LENGTH = 'Content-Length'
+STREAM_CHUNK_SIZE = 64 * 1024
 
 # import Enum # if 3.4 its supported in python, else use: pip install enum34
 from enum import Enum
@@ -106,13 +107,18 @@ class AemClientException(Exception):
 class AttConnector(object):
 	def __init__(self, b64_username_password, verify_certificate=True):
 		self.verify_certificate = verify_certificate
+		# socket timeout in seconds of every request, None keeps the global default
+		self.timeout = None
 		self.headers = { 'Authorization' : 'Basic %s' %  b64_username_password }
+		# per connector context, the process wide default stays untouched for the other HTTPS clients of the process
 		if verify_certificate:
-			ssl._create_default_https_context = ssl.create_default_context
+			self.ssl_context = ssl.create_default_context()
 		else:
-			ssl._create_default_https_context = ssl._create_unverified_context
+			self.ssl_context = ssl._create_unverified_context()
 
-	def att_request(self, method, url, payload=None, get_raw_error=False):
+	def att_request(self, method, url, payload=None, get_raw_error=False, timeout=None):
+		# timeout bounds this request only, self.timeout is used otherwise
+		timeout = timeout or self.timeout
 		req_headers = {}
 		for key in self.headers:
 			req_headers[key] = self.headers[key]
@@ -126,7 +132,10 @@ class AttConnector(object):
 		request_pyx = Request(url, data=payload, headers=req_headers)
 		request_pyx.get_method = lambda: method
 		try:
-			att_response = urlopen(request_pyx)
+			if timeout:
+				att_response = urlopen(request_pyx, timeout=timeout, context=self.ssl_context)
+			else:
+				att_response = urlopen(request_pyx, context=self.ssl_context)
 		except HTTPError as ex:
 			if get_raw_error:
 				att_response = ex
@@ -157,11 +166,13 @@ class AttConnector(object):
 #region infrastructure
 
 class AttClient(object):
-	def __init__(self, b64_username_password, url="", verify_certificate=True):
+	def __init__(self, b64_username_password, url="", verify_certificate=True, timeout=None):
+		# timeout (seconds) bounds the login and the following requests, see set_timeout
 		if 'https' not in url:
 			raise Exception('The Aem access URL must start with "https".')
 		self.url = url
 		self.attconnector = AttConnector(b64_username_password, verify_certificate)
+		self.attconnector.timeout = timeout
 		login_url = '{0}/api/v1/login'.format(self.url)
 		response = self.attconnector.att_request(method='GET', url=login_url, get_raw_error=True)
 		if hasattr(response, 'code') and response.code == 200:
@@ -170,12 +181,15 @@ class AttClient(object):
 			self.attconnector = None
 			if hasattr(response, 'reason') and response.reason:
 				raise Exception("Http Error: {0}".format(response.reason))
+			elif isinstance(response, Exception):
+				# eg. a socket timeout
+				raise response
 			else:
 				resp_json = json.loads(response)
 				raise AemClientException(resp_json['error_code'], resp_json['error_message'])
 	# END function __init__
 
-	def do_web_request(self, resp_class=None, address=None, http_method='GET', req = None, stream_req = False):
+	def do_web_request(self, resp_class=None, address=None, http_method='GET', req = None, stream_req = False, timeout = None):
 		full_url = '{0}/{1}'.format(self.url, address)
 		payload = None
 		if req:
@@ -184,13 +198,16 @@ class AttClient(object):
 			else:
 				att_json = AttUtil.attobject_to_json(req)
 				payload = json.dumps( att_json, sort_keys=True )
-		response_t = self.attconnector.att_request(method=http_method, url=full_url, payload=payload)
+		response_t = self.attconnector.att_request(method=http_method, url=full_url, payload=payload, timeout=timeout)
 		response_text = None
 		try:
 			response_text = response_t.read()
 		except Exception as ex:
 			if hasattr(response_t, 'reason') and response_t.reason:
 				raise Exception('Http Error: {0}'.format(response_t.reason))
+			elif isinstance(response_t, Exception):
+				# eg. a socket timeout
+				raise response_t
 			else:
 				response_t = json.loads(response_t)
 		if 'error_code' in response_t or 'status_code' in response_t:
@@ -200,6 +217,24 @@ class AttClient(object):
 		return response_text
 	# END function do_web_request
 
+	def set_timeout(self, timeout):
+		# Bounds the time a request may block on the connection, the login is bounded by the constructor timeout
+		self.attconnector.timeout = timeout
+
+	def do_stream_request(self, address=None, http_method='GET', output=None, chunk_size=STREAM_CHUNK_SIZE):
+		# Same as do_web_request for STREAM responses, the body is copied by chunks to the output file object instead of being read at once
+		full_url = '{0}/{1}'.format(self.url, address)
+		response_t = self.attconnector.att_request(method=http_method, url=full_url)
+		if not hasattr(response_t, 'read'):
+			if hasattr(response_t, 'reason') and response_t.reason:
+				raise Exception('Http Error: {0}'.format(response_t.reason))
+			if isinstance(response_t, Exception):
+				raise response_t
+			response_t = json.loads(response_t)
+			raise AemClientException(response_t['error_code'], response_t['error_message'])
+		shutil.copyfileobj(response_t, output, chunk_size)
+	# END function do_stream_request
+
 #endregion infrastructure
 
 
@@ -327,11 +362,31 @@ class AemTaskInfoDetailedBase(object):
 			self.target_endpoint = None
 			self.assigned_tags = []
 			self.message = None
+			# progress and performance figures, only returned for Replicate tasks
+			self.full_load_completed = False
+			self.full_load_start = None
+			self.full_load_finish = None
+			self.full_load_counters = None
+			self.full_load_throughput = None
+			self.cdc_event_counters = None
+			self.cdc_transactions_counters = None
+			self.cdc_throughput = None
+			self.cdc_latency = None
+			self.memory_mb = 0
+			self.disk_usage_mb = 0
+			self.cpu_percentage = 0
+			self.data_error_count = 0
 		else:
 			self.__dict__ = AttUtil.attobject_from_json(j)
 			self.state = AemTaskState[self.state]
 			self.source_endpoint = TaskEndpoint(self.source_endpoint)
 			self.target_endpoint = TaskEndpoint(self.target_endpoint)
+			self.full_load_counters = AemFullLoadCounters(self.__dict__.get('full_load_counters')) if self.__dict__.get('full_load_counters') else None
+			self.full_load_throughput = AemThroughput(self.__dict__.get('full_load_throughput')) if self.__dict__.get('full_load_throughput') else None
+			self.cdc_event_counters = AemCdcEventCounters(self.__dict__.get('cdc_event_counters')) if self.__dict__.get('cdc_event_counters') else None
+			self.cdc_transactions_counters = AemCdcTransactionsCounters(self.__dict__.get('cdc_transactions_counters')) if self.__dict__.get('cdc_transactions_counters') else None
+			self.cdc_throughput = AemThroughput(self.__dict__.get('cdc_throughput')) if self.__dict__.get('cdc_throughput') else None
+			self.cdc_latency = AemCdcLatency(self.__dict__.get('cdc_latency')) if self.__dict__.get('cdc_latency') else None
 
 #child classes
 class ReplicateServerDetails(AemServerDetails):
@@ -562,12 +617,77 @@ class AemTasksSummary(object):
 		else:
 			self.__dict__ = AttUtil.attobject_from_json(j)
 
+class AemFullLoadCounters(object):
+	def __init__(self, j = None):
+		if not j:
+			self.tables_completed_count = 0
+			self.tables_loading_count = 0
+			self.tables_queued_count = 0
+			self.tables_with_error_count = 0
+			self.records_completed_count = 0
+			self.estimated_records_for_all_tables_count = 0
+		else:
+			self.__dict__ = AttUtil.attobject_from_json(j)
+
+class AemThroughput(object):
+	# full load and CDC throughput, records and volume (KB) per second
+	def __init__(self, j = None):
+		if not j:
+			self.source_throughput_records_count = 0
+			self.source_throughput_volume = 0
+			self.target_throughput_records_count = 0
+			self.target_throughput_volume = 0
+		else:
+			self.__dict__ = AttUtil.attobject_from_json(j)
+
+class AemCdcEventCounters(object):
+	def __init__(self, j = None):
+		if not j:
+			self.applied_insert_count = 0
+			self.applied_update_count = 0
+			self.applied_delete_count = 0
+			self.applied_ddl_count = 0
+		else:
+			self.__dict__ = AttUtil.attobject_from_json(j)
+
+class AemCdcTransactionsCounters(object):
+	def __init__(self, j = None):
+		if not j:
+			self.commit_change_records_count = 0
+			self.rollback_transaction_count = 0
+			self.rollback_change_records_count = 0
+			self.rollback_change_volume_mb = 0
+			self.applied_transactions_in_progress_count = 0
+			self.applied_records_in_progress_count = 0
+			self.applied_comitted_transaction_count = 0
+			self.applied_records_comitted_count = 0
+			self.applied_volume_comitted_mb = 0
+			self.incoming_accumulated_changes_in_memory_count = 0
+			self.incoming_accumulated_changes_on_disk_count = 0
+			self.incoming_applying_changes_in_memory_count = 0
+			self.incoming_applying_changes_on_disk_count = 0
+		else:
+			self.__dict__ = AttUtil.attobject_from_json(j)
+
+class AemCdcLatency(object):
+	# latencies as returned by QEM, "HH:MM:SS"
+	def __init__(self, j = None):
+		if not j:
+			self.source_latency = None
+			self.total_latency = None
+		else:
+			self.__dict__ = AttUtil.attobject_from_json(j)
+
 
 #endregion models
 
 
 class AemClient(AttClient):
-	def __init__(self, b64_username_password, machine_name, port=443, url="https://{0}/attunityenterprisemanager", verify_certificate=True):
+	def __init__(self, b64_username_password, machine_name, port=443, url="https://{0}/attunityenterprisemanager", verify_certificate=True, attclient=None):
+		# attclient: an object exposing do_web_request (eg. a proxy to an already logged-in client), no login is done when given
+		if attclient is not None:
+			self.attclient = attclient
+			return
 		if port != 443:
 			machine_name = '{0}:{1}'.format(machine_name, port)
 		if url.find('{0}'):
@@ -623,6 +743,16 @@ class AemClient(AttClient):
 		resp = self.attclient.do_web_request(None, address, 'GET', None)
 		return resp
 
+	def export_all_to(self, server, output):
+		"""
+		response payload: STREAM, written to the output file object
+		parameters:
+			server - string
+		"""
+		AttUtil.validate_params({ 'server':{'value':server,'type':base_string_type } })
+		address = "api/v1/servers/" + AttUtil.quote_param(server) + "/?action=export"
+		self.attclient.do_stream_request(address, 'GET', output)
+
 	def export_task(self, server, task, withendpoints = False):
 		"""
 		response payload: STREAM
@@ -636,6 +766,18 @@ class AemClient(AttClient):
 		resp = self.attclient.do_web_request(None, address, 'GET', None)
 		return resp
 
+	def export_task_to(self, server, task, output, withendpoints = False):
+		"""
+		response payload: STREAM, written to the output file object
+		parameters:
+			server - string
+			task - string
+			withendpoints - bool
+		"""
+		AttUtil.validate_params({ 'server':{'value':server,'type':base_string_type }, 'task':{'value':task,'type':base_string_type }, 'withendpoints':{'value':withendpoints,'type':bool } })
+		address = "api/v1/servers/" + AttUtil.quote_param(server) + "/tasks/" + AttUtil.quote_param(task) + "?action=export&withendpoints=" + AttUtil.quote_param(withendpoints) + ""
+		self.attclient.do_stream_request(address, 'GET', output)
+
 	def get_endpoint_list(self, server):
 		"""
 		response payload: AemGetEndpointListResp
@@ -815,16 +957,17 @@ class AemClient(AttClient):
 		resp = self.attclient.do_web_request(AemStopTaskResp, address, 'POST', None)
 		return resp
 
-	def test_endpoint(self, server, endpoint, timeout = 60):
+	def test_endpoint(self, server, endpoint, timeout = 60, request_timeout = None):
 		"""
 		response payload: AemTestEndpointResp
 		parameters:
 			server - string
 			endpoint - string
 			timeout - int32
+			request_timeout - seconds the connection waits for the answer, the client timeout by default
 		"""
 		AttUtil.validate_params({ 'server':{'value':server,'type':base_string_type }, 'endpoint':{'value':endpoint,'type':base_string_type }, 'timeout':{'value':timeout,'type':int } })
 		address = "api/v1/servers/" + AttUtil.quote_param(server) + "/endpoints/" + AttUtil.quote_param(endpoint) + "/?action=test&timeout=" + AttUtil.quote_param(timeout) + ""
-		resp = self.attclient.do_web_request(AemTestEndpointResp, address, 'GET', None)
+		resp = self.attclient.do_web_request(AemTestEndpointResp, address, 'GET', None, timeout=request_timeout)
 		return resp
 
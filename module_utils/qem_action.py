@@ -0,0 +1,141 @@
+import inspect
+import json
+import os
+from ansible.module_utils.qem_client_cache import get_client
+from ansible.module_utils.qem_common import QemModuleBase
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+    from ansible.module_utils.common.parameters import remove_values
+    from ansible.module_utils.common.text.converters import jsonify
+    HAS_ARG_SPEC_VALIDATOR = True
+except ImportError:
+    HAS_ARG_SPEC_VALIDATOR = False
+
+display = Display()
+
+# Controller side only: the qem_* modules always talk to QEM from the controller (connection: local), the action plugins
+# run their exec_module in the controller process instead of packaging and spawning them with AnsiballZ.
+# The normal module execution is used whenever running in-process would not behave the same.
+
+_LIBRARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'library')
+_module_classes = dict()
+
+
+class QemModuleExit(BaseException):
+    # Raised by exit_json/fail_json, like the SystemExit of AnsibleModule it must not be caught by the modules "except Exception"
+
+    def __init__(self, result):
+        super(QemModuleExit, self).__init__(result.get('msg'))
+        self.result = result
+
+
+def no_log_values(argument_spec, validation):
+    # The values to mask in the result. ValidationResult only keeps them in a private attribute, without it the values
+    # of the no_log parameters are masked
+    values = getattr(validation, '_no_log_values', None)
+    if values is None:
+        params = validation.validated_parameters
+        values = set(str(params[name]) for name, spec in argument_spec.items() if spec.get('no_log') and params.get(name) is not None)
+    return values
+
+
+class QemModuleShim(object):
+    # Stands for AnsibleModule: the parameters are validated the same way and the result is raised instead of printed
+
+    def __init__(self, argument_spec, params, log=None):
+        self.check_mode = False
+        self.warnings = []
+        self.debug = log or (lambda msg: None)
+        validation = ArgumentSpecValidator(argument_spec).validate(params)
+        self.params = validation.validated_parameters
+        self.no_log_values = no_log_values(argument_spec, validation)
+        if validation.error_messages:
+            self.fail_json(msg=validation.errors.msg)
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+    def exit_json(self, **kwargs):
+        result = dict(kwargs)
+        result['invocation'] = dict(module_args=self.params)
+        if self.warnings:
+            result['warnings'] = self.warnings
+        # Same masking and JSON types as a module result, the result does not share objects with the cached clients
+        raise QemModuleExit(json.loads(jsonify(remove_values(result, self.no_log_values))))
+
+    def fail_json(self, msg, **kwargs):
+        kwargs['failed'] = True
+        self.exit_json(msg=msg, **kwargs)
+
+
+def load_module_class(module_name):
+    # Returns the QemModuleBase subclass defined by library/<module_name>.py, None if there is no such module
+    if module_name not in _module_classes:
+        path = os.path.join(_LIBRARY, '{0}.py'.format(module_name))
+        module_class = None
+        if os.path.isfile(path):
+            import importlib.util
+            spec = importlib.util.spec_from_file_location('_qem_action_{0}'.format(module_name), path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            for value in vars(module).values():
+                if inspect.isclass(value) and issubclass(value, QemModuleBase) and value.__module__ == module.__name__:
+                    module_class = value
+        _module_classes[module_name] = module_class
+    return _module_classes[module_name]
+
+
+def run_module(module_class, params, log=None, broker_default=False):
+    # Runs the module in the current process with a logged-in client reused per QEM host and user, returns its result.
+    # broker_default=True connects through the session broker unless qem_broker/QEM_BROKER say otherwise
+    try:
+        module_class(
+            module_factory=lambda argument_spec: QemModuleShim(argument_spec, params, log),
+            client_factory=lambda **credentials: get_client(credentials),
+            broker_default=broker_default
+        )
+    except QemModuleExit as module_exit:
+        return module_exit.result
+    return dict(failed=True, msg='{0} did not return a result'.format(module_class.__name__))
+
+
+class QemActionBase(ActionBase):
+
+    TRANSFERS_FILES = False
+
+    def fallback_reason(self, module_name):
+        if os.environ.get('QEM_ACTION_IN_PROCESS', 'true').lower() in ('0', 'false', 'no', 'off'):
+            return 'disabled by QEM_ACTION_IN_PROCESS'
+        if not HAS_ARG_SPEC_VALIDATOR:
+            return 'ansible-core 2.11 or later is required'
+        if self._connection.transport != 'local':
+            return 'the task does not run with the local connection'
+        if self._task.async_val:
+            return 'async task'
+        if self._play_context.check_mode:
+            return 'check mode'
+        if any(self._task.environment or []):
+            return 'the task environment only applies to a module process'
+        if load_module_class(module_name) is None:
+            return 'no QEM module {0} found in {1}'.format(module_name, _LIBRARY)
+        return None
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(QemActionBase, self).run(tmp, task_vars)
+        del tmp
+
+        module_name = self._task.action.split('.')[-1]
+        reason = self.fallback_reason(module_name)
+        if reason:
+            display.vvv('{0}: running as a module, {1}'.format(module_name, reason))
+            result.update(self._execute_module(module_name=self._task.action, module_args=self._task.args, task_vars=task_vars))
+            return result
+
+        # Ansible runs each task in a forked worker, the clients cached in the worker do not outlive the task: the session
+        # broker keeps them logged in for the following tasks
+        display.vvv('{0}: running in the controller process'.format(module_name))
+        result.update(run_module(load_module_class(module_name), self._task.args, log=display.vvvv, broker_default=True))
+        return result
@@ -0,0 +1,135 @@
+import threading
+import time
+from ansible.module_utils.qem_parallel import run_parallel
+
+
+class AdmissionTimeout(Exception):
+    pass
+
+
+def server_load(server_details):
+    # The figures of a get_server_details answer the admission thresholds apply to
+    utilization = server_details.resource_utilization
+    summary = server_details.task_summary
+    return dict(
+        cpu_percentage=utilization.attunity_cpu_percentage,
+        memory_mb=utilization.memory_mb,
+        disk_usage_mb=utilization.disk_usage_mb,
+        running=summary.running + summary.recovering
+    )
+
+
+class AdmissionController(object):
+    # Admits task starts per server while its load stays below the thresholds (None disables a threshold).
+    # The servers are sampled with get_server_details every interval by a background thread, between two samples
+    # at most burst starts are admitted per server and each one counts as a running task, so that a batch of
+    # starts cannot overshoot the thresholds before the utilization they cause shows up in the next sample.
+    # A server whose sampling fails admits nothing until a sample succeeds.
+
+    def __init__(self, aem_client, servers, max_cpu_percentage=None, max_memory_mb=None, max_disk_usage_mb=None,
+                 max_running=None, interval=10, burst=4, timeout=None):
+        self.aem_client = aem_client
+        self.servers = list(servers)
+        self.thresholds = dict(
+            cpu_percentage=max_cpu_percentage,
+            memory_mb=max_memory_mb,
+            disk_usage_mb=max_disk_usage_mb,
+            running=max_running
+        )
+        self.interval = interval
+        self.burst = burst
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.samples = dict()
+        self.errors = dict()
+        self.budgets = dict()
+        self.admitted = dict((server, []) for server in self.servers)
+        self.sample_count = 0
+        self.stopping = False
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        self.sample_all()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait(self.interval)
+                if self.stopping:
+                    return
+            self.sample_all()
+
+    def sample_all(self):
+        sample_start = time.time()
+        outcomes = run_parallel(lambda server: server_load(self.aem_client.get_server_details(server).server_details), self.servers, len(self.servers))
+        with self.condition:
+            self.sample_count += 1
+            for server, outcome in outcomes.items():
+                if outcome['error'] is not None:
+                    self.errors[server] = outcome['error']
+                    self.samples.pop(server, None)
+                    continue
+                self.errors.pop(server, None)
+                self.samples[server] = outcome['result']
+                self.budgets[server] = self.burst
+                # the starts admitted before the sample request are assumed to be counted by QEM
+                self.admitted[server] = [admitted for admitted in self.admitted[server] if admitted >= sample_start]
+            self.condition.notify_all()
+
+    def blocking_thresholds(self, server):
+        # The thresholds preventing a start on server, an empty list when it can be admitted
+        sample = self.samples.get(server)
+        if sample is None:
+            return ['sample']
+        if self.budgets.get(server, 0) <= 0:
+            return ['burst']
+        load = dict(sample, running=sample['running'] + len(self.admitted[server]))
+        return [name for name, threshold in self.thresholds.items() if threshold is not None and load[name] >= threshold]
+
+    def admit(self, server):
+        # Blocks until a start on server is admitted, returns the queue delay in seconds.
+        # Raises AdmissionTimeout when it is not admitted within timeout.
+        start = time.time()
+        deadline = start + self.timeout if self.timeout is not None else None
+        with self.condition:
+            while self.blocking_thresholds(server):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise AdmissionTimeout('Start not admitted on server "{0}" within {1}s ({2})'.format(
+                        server, self.timeout, self.describe(server)))
+                self.condition.wait(remaining)
+            self.budgets[server] -= 1
+            self.admitted[server].append(time.time())
+        return time.time() - start
+
+    def describe(self, server):
+        if server in self.errors:
+            return 'sampling failed: {0}'.format(self.errors[server])
+        blocking = self.blocking_thresholds(server)
+        sample = self.samples.get(server) or dict()
+        return ', '.join('{0} {1} >= {2}'.format(name, sample.get(name), self.thresholds.get(name)) if name in self.thresholds else name
+                         for name in blocking) or 'admissible'
+
+    def report(self):
+        with self.condition:
+            return dict(
+                samples=self.sample_count,
+                servers=dict((server, dict(load=self.samples.get(server), error=self.errors.get(server))) for server in self.servers)
+            )
@@ -0,0 +1,140 @@
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from os.path import expanduser
+from ansible.module_utils.qem_definitions import task_endpoint_names
+from ansible.module_utils.qem_export import ensure_directory, stream_to_file
+from ansible.module_utils.qem_fingerprint import canonical_dump
+
+# Incremental backups: every task, endpoint and server envelope (the export without its tasks and databases) of an
+# export_all is canonicalized (sorted keys, volatile keys removed) and stored once under objects/<sha256>.json.
+# A snapshot is a manifest mapping each server task/endpoint name to its object hash, so a nightly backup of an
+# unchanged fleet only writes a manifest, or nothing at all when it is identical to the latest one.
+#
+#   <store>/objects/ab/ab12...ef.json
+#   <store>/manifests/20240101T020000Z.json
+
+
+def server_version(aem_client, server):
+    # The _version block of an export, it is not part of the stored objects
+    version = aem_client.get_server_details(server=server).server_details.version
+    version_parts = version.split('.')
+    return dict(
+        version=version,
+        version_major=version_parts[0],
+        version_minor=version_parts[1],
+        version_revision=version_parts[3]
+    )
+
+
+class BackupStore(object):
+
+    def __init__(self, path):
+        self.path = expanduser(path)
+
+    def object_path(self, digest):
+        return os.path.join(self.path, 'objects', digest[:2], '{0}.json'.format(digest))
+
+    def manifest_path(self, snapshot):
+        return os.path.join(self.path, 'manifests', '{0}.json'.format(snapshot))
+
+    def put_object(self, document):
+        # Returns (hash, bytes written), nothing is written when the object is already stored
+        content = canonical_dump(document).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        stream_to_file(lambda output: output.write(content), path)
+        return digest, len(content)
+
+    def get_object(self, digest):
+        with open(self.object_path(digest)) as object_file:
+            return json.load(object_file, object_pairs_hook=OrderedDict)
+
+    def snapshots(self):
+        directory = os.path.join(self.path, 'manifests')
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len('.json')] for name in os.listdir(directory) if name.endswith('.json'))
+
+    def load_manifest(self, snapshot='latest'):
+        if snapshot == 'latest':
+            snapshots = self.snapshots()
+            if not snapshots:
+                return None
+            snapshot = snapshots[-1]
+        try:
+            with open(self.manifest_path(snapshot)) as manifest_file:
+                return json.load(manifest_file, object_pairs_hook=OrderedDict)
+        except (IOError, OSError):
+            return None
+
+    def save_manifest(self, servers):
+        # Returns the new snapshot id, or None when the content is the same as the latest snapshot.
+        # The servers of the latest snapshot missing from servers (not selected or failed) keep their previous entry.
+        latest = self.load_manifest()
+        if latest is not None:
+            merged = OrderedDict(latest['servers'])
+            merged.update(servers)
+            servers = merged
+        if latest is not None and json.dumps(latest['servers'], sort_keys=True) == json.dumps(servers, sort_keys=True):
+            return None
+        timestamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        snapshot, sequence = timestamp, 0
+        while os.path.exists(self.manifest_path(snapshot)):
+            sequence += 1
+            snapshot = '{0}-{1}'.format(timestamp, sequence)
+        manifest = OrderedDict([('snapshot', snapshot), ('created', time.time()), ('servers', servers)])
+        content = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+        stream_to_file(lambda output: output.write(content), self.manifest_path(snapshot))
+        return snapshot
+
+    def backup_server(self, aem_client, server):
+        # Streams the server export to a temporary file, then stores its objects.
+        # Returns the manifest entry and the written/reused objects and written bytes counters.
+        handle, tmp_path = tempfile.mkstemp(dir=ensure_directory(os.path.join(self.path, 'tmp', 'export')), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                aem_client.export_all_to(server, output)
+            with open(tmp_path) as export_file:
+                document = json.load(export_file, object_pairs_hook=OrderedDict)
+        finally:
+            os.remove(tmp_path)
+        return self.store_export(document)
+
+    def store_export(self, document):
+        replication_definition = document.get('cmd.replication_definition', OrderedDict())
+        envelope = copy.copy(document)
+        envelope['cmd.replication_definition'] = copy.copy(replication_definition)
+        envelope['cmd.replication_definition']['tasks'] = []
+        envelope['cmd.replication_definition']['databases'] = []
+
+        stats = dict(written=0, reused=0, bytes=0)
+
+        def put(item):
+            digest, size = self.put_object(item)
+            stats['written' if size else 'reused'] += 1
+            stats['bytes'] += size
+            return digest
+
+        entry = OrderedDict([
+            ('envelope', put(envelope)),
+            ('tasks', OrderedDict((task['task']['name'], put(task)) for task in replication_definition.get('tasks', []))),
+            ('endpoints', OrderedDict((endpoint['name'], put(endpoint)) for endpoint in replication_definition.get('databases', []))),
+        ])
+        return entry, stats
+
+    def task_document(self, entry, task_name):
+        # Rebuilds an export_task(withendpoints=True) like document of a stored task, ready for import_task
+        document = self.get_object(entry['envelope'])
+        task = self.get_object(entry['tasks'][task_name])
+        document['cmd.replication_definition']['tasks'] = [task]
+        document['cmd.replication_definition']['databases'] = [
+            self.get_object(entry['endpoints'][name]) for name in task_endpoint_names(task) if name in entry['endpoints']
+        ]
+        return document
@@ -0,0 +1,346 @@
+import fcntl
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from os.path import expanduser
+from ansible.module_utils.aem_client import AemClient, AemClientException, AttUtil
+from ansible.module_utils.qem_common import create_qem_client, wait_for
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+DEFAULT_BROKER_SOCKET = '~/.qem/broker.sock'
+DEFAULT_BROKER_IDLE_TIMEOUT = 300
+DEFAULT_BROKER_POOL_SIZE = 4
+
+# Every qem_* module runs in its own process: the broker is a local daemon, started on demand by the first module
+# needing it, holding logged-in AemClient instances (a small pool per QEM host/user) and serving the modules web
+# requests over a Unix socket. Messages are JSON documents, one per line.
+
+_broker_clients = dict()
+_broker_clients_lock = threading.Lock()
+
+
+def is_session_error(ex):
+    # An expired or revoked session is answered with a 401, whose error document names the session or the authorization
+    text = ' '.join(str(part) for part in (getattr(ex, 'error_code', ''), getattr(ex, 'message', ''), ex)).lower()
+    return any(marker in text for marker in ('unauthorized', 'session', '401'))
+
+
+def credentials_key(credentials):
+    material = json.dumps([credentials.get(key) for key in ('qem_hostname', 'qem_domain', 'qem_username', 'qem_password', 'qem_verify_certificate')])
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def send_message(stream, message):
+    stream.write((json.dumps(message) + '\n').encode('utf-8'))
+    stream.flush()
+
+
+def read_message(stream):
+    line = stream.readline()
+    if not line:
+        raise EOFError('QEM broker connection closed')
+    return json.loads(line.decode('utf-8'))
+
+
+class ClientPool(object):
+    # Logged-in clients for one set of credentials, at most max_size of them are created and concurrent requests wait for a free one
+
+    def __init__(self, credentials, max_size=DEFAULT_BROKER_POOL_SIZE):
+        self.credentials = credentials
+        self.max_size = max_size
+        self.idle = []
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def checkout(self, fresh=False):
+        # fresh=True logs a new client in instead of reusing an idle one, which is dropped if the pool is full
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                self.condition.wait()
+            if self.idle and not fresh:
+                return self.idle.pop()
+            if self.idle and self.size >= self.max_size:
+                self.idle.pop(0)
+                self.size -= 1
+            self.size += 1
+        try:
+            return create_qem_client(**self.credentials)
+        except Exception:
+            self.discard()
+            raise
+
+    def checkin(self, aem_client):
+        with self.condition:
+            self.idle.append(aem_client)
+            self.condition.notify()
+
+    def discard(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+
+class BrokerRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        broker = self.server.broker
+        broker.touch(1)
+        try:
+            pool = None
+            while True:
+                try:
+                    message = read_message(self.rfile)
+                except EOFError:
+                    return
+                if message.get('op') == 'login':
+                    pool = broker.get_pool(message['credentials'])
+                    response = broker.call(pool, None)
+                else:
+                    response = broker.call(pool, message)
+                send_message(self.wfile, response)
+        finally:
+            broker.touch(-1)
+
+
+class BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class QemBroker(object):
+
+    def __init__(self, socket_path=DEFAULT_BROKER_SOCKET, idle_timeout=DEFAULT_BROKER_IDLE_TIMEOUT, pool_size=DEFAULT_BROKER_POOL_SIZE):
+        self.socket_path = expanduser(socket_path)
+        self.idle_timeout = idle_timeout
+        self.pool_size = pool_size
+        self.pools = dict()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.last_activity = time.time()
+
+    def touch(self, delta):
+        with self.lock:
+            self.active += delta
+            self.last_activity = time.time()
+
+    def get_pool(self, credentials):
+        key = credentials_key(credentials)
+        with self.lock:
+            if key not in self.pools:
+                self.pools[key] = ClientPool(credentials, self.pool_size)
+            return self.pools[key]
+
+    def call(self, pool, message, retry=True):
+        if pool is None:
+            return dict(ok=False, error='QEM broker connection not logged in')
+        try:
+            aem_client = pool.checkout(fresh=not retry)
+        except AemClientException as ex:
+            return dict(ok=False, error_code=ex.error_code, error_message=ex.message)
+        except Exception as ex:
+            return dict(ok=False, error=str(ex))
+        if message is None:
+            pool.checkin(aem_client)
+            return dict(ok=True)
+        try:
+            body = aem_client.attclient.do_web_request(None, message['address'], message['method'], message.get('payload'), True,
+                                                       timeout=message.get('timeout'))
+        except Exception as ex:
+            if is_session_error(ex):
+                # The session of this client expired: drop it and retry once with a fresh login
+                pool.discard()
+                if retry:
+                    return self.call(pool, message, retry=False)
+            elif isinstance(ex, AemClientException):
+                pool.checkin(aem_client)
+            else:
+                pool.discard()
+            if isinstance(ex, AemClientException):
+                return dict(ok=False, error_code=ex.error_code, error_message=ex.message)
+            return dict(ok=False, error=str(ex))
+        pool.checkin(aem_client)
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        return dict(ok=True, body=body)
+
+    def serve(self):
+        # The socket is created 0600 by bind, there is no window where another user could connect to it
+        umask = os.umask(0o177)
+        try:
+            server = BrokerServer(self.socket_path, BrokerRequestHandler)
+        finally:
+            os.umask(umask)
+        server.broker = self
+        watchdog = threading.Thread(target=self.watch_idle, args=(server,))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def watch_idle(self, server):
+        while True:
+            time.sleep(min(5, self.idle_timeout))
+            with self.lock:
+                idle = self.active == 0 and time.time() - self.last_activity > self.idle_timeout
+            if idle:
+                server.shutdown()
+                return
+
+
+def spawn_broker(socket_path, idle_timeout, pool_size=DEFAULT_BROKER_POOL_SIZE):
+    # Double fork so the broker is re-parented to init and detached from the module stdout (Ansible waits for it to be closed).
+    # A lock file serializes the forks trying to start the broker at the same time.
+    socket_path = expanduser(socket_path)
+    directory = os.path.dirname(socket_path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    lock_file = open(socket_path + '.lock', 'w')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    try:
+        if is_broker_alive(socket_path):
+            return
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        pid = os.fork()
+        if pid == 0:
+            os.setsid()
+            if os.fork() != 0:
+                os._exit(0)
+            try:
+                devnull = os.open(os.devnull, os.O_RDWR)
+                for fd in (0, 1, 2):
+                    os.dup2(devnull, fd)
+                QemBroker(socket_path, idle_timeout, pool_size).serve()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        ready, elapsed = wait_for(lambda: is_broker_alive(socket_path), timeout=10, initial_interval=0.05, max_interval=0.5)
+        if not ready:
+            raise Exception('QEM broker did not start on {0}'.format(socket_path))
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def is_broker_alive(socket_path):
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        probe.close()
+
+
+class BrokerAttClient(object):
+    # Drop-in replacement of AttClient forwarding the web requests to the broker. Each thread has its own connection, logged in on
+    # first use, so the requests of concurrent threads (eg. run_parallel) are served in parallel by the broker pool.
+
+    def __init__(self, credentials, socket_path=DEFAULT_BROKER_SOCKET):
+        self.credentials = credentials
+        self.socket_path = expanduser(socket_path)
+        self.timeout = None
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+        # Connects now so an unreachable broker is reported at creation
+        self.connection()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None or connection not in self.connections:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            connection = (sock, sock.makefile('rwb'))
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+            self.send(connection, dict(op='login', credentials=self.credentials))
+        return connection
+
+    def send(self, connection, message, timeout=None):
+        sock, stream = connection
+        sock.settimeout(timeout or self.timeout)
+        try:
+            send_message(stream, message)
+            response = read_message(stream)
+        except socket.timeout:
+            # the late response would be read by the next request: the connection can not be used anymore
+            self.disconnect(connection)
+            raise
+        if not response['ok']:
+            if 'error_code' in response:
+                raise AemClientException(response['error_code'], response['error_message'])
+            raise Exception(response['error'])
+        return response
+
+    def exchange(self, message, timeout=None):
+        return self.send(self.connection(), message, timeout)
+
+    def disconnect(self, connection):
+        if getattr(self.local, 'connection', None) is connection:
+            self.local.connection = None
+        with self.lock:
+            if connection in self.connections:
+                self.connections.remove(connection)
+        sock, stream = connection
+        stream.close()
+        sock.close()
+
+    def do_web_request(self, resp_class=None, address=None, http_method='GET', req=None, stream_req=False, timeout=None):
+        payload = None
+        if req:
+            if stream_req:
+                payload = req
+            else:
+                payload = json.dumps(AttUtil.attobject_to_json(req), sort_keys=True)
+        # The broker bounds its own request with the timeout too
+        response = self.exchange(dict(op='request', address=address, method=http_method, payload=payload, timeout=timeout), timeout)
+        if resp_class:
+            return resp_class(response['body'])
+        return response['body']
+
+    def set_timeout(self, timeout):
+        # The broker request itself is not bounded, the wait for its response is. Applied to the connections at each request.
+        self.timeout = timeout
+
+    def do_stream_request(self, address=None, http_method='GET', output=None):
+        # The broker protocol carries whole bodies, the response is written once received
+        body = self.do_web_request(None, address, http_method)
+        output.write(body.encode('utf-8') if not isinstance(body, bytes) else body)
+
+    def close(self):
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            self.disconnect(connection)
+
+
+def create_broker_client(credentials, socket_path=DEFAULT_BROKER_SOCKET, idle_timeout=DEFAULT_BROKER_IDLE_TIMEOUT):
+    # Returns an AemClient whose requests go through the local broker, starting it if needed.
+    # One client per process, credentials and socket: the action plugins run several modules in the same worker (eg. a loop)
+    socket_path = expanduser(socket_path)
+    key = (credentials_key(credentials), socket_path)
+    with _broker_clients_lock:
+        alive = is_broker_alive(socket_path)
+        if not alive:
+            spawn_broker(socket_path, idle_timeout)
+        aem_client = _broker_clients.get(key)
+        # the connections of a client to a broker which exited are dead
+        if aem_client is None or not alive:
+            aem_client = AemClient(None, None, attclient=BrokerAttClient(credentials, socket_path))
+            _broker_clients[key] = aem_client
+        return aem_client
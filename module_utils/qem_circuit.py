@@ -0,0 +1,209 @@
+import re
+import socket
+import threading
+import time
+from ansible.module_utils.aem_client import AemClientException, AemServerState
+
+try:
+    from urllib.error import HTTPError, URLError
+except ImportError:
+    from urllib2 import HTTPError, URLError
+
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:
+    from inspect import getargspec
+
+# The AemClient calls answered by QEM itself (server definitions, ACLs, monitoring details): they never reach the
+# managed server and are not guarded. get_server_details is also the probe of an open circuit.
+UNGUARDED_METHODS = ('get_server_details', 'get_server', 'put_server', 'delete_server',
+                     'get_server_acl', 'put_server_acl', 'delete_server_acl')
+
+# QEM error codes meaning the managed server could not be reached, any other QEM error is an answer of a live server
+SERVER_FAILURE_CODES = re.compile(r'TIMEOUT|TIMED_OUT|NOT_CONNECTED|UNREACHABLE|CONNECTION')
+# Messages of the transport errors once turned into a plain Exception: AttClient reports the reason of a failed connection
+# as 'Http Error: <reason>' and the broker relays its errors as text
+TRANSPORT_ERROR_MESSAGES = re.compile(r'^(Http Error:|timed out)', re.IGNORECASE)
+
+
+class CircuitOpenError(AemClientException):
+    def __init__(self, server, reason):
+        AemClientException.__init__(self, 'CIRCUIT_OPEN', 'Server "{0}" is unavailable, call not sent: {1}'.format(server, reason))
+
+
+def is_server_failure(ex):
+    # Transport errors (timeouts, connection resets, 5xx HTTP errors of the gateway) and QEM errors about the managed server
+    # connection. Any other error (a bad parameter, a bug of the caller) says nothing about the server.
+    if isinstance(ex, AemClientException):
+        return bool(SERVER_FAILURE_CODES.search(str(ex.error_code or '')))
+    if isinstance(ex, HTTPError):
+        return ex.code >= 500
+    if isinstance(ex, (socket.error, socket.timeout, URLError)):
+        return True
+    return bool(TRANSPORT_ERROR_MESSAGES.search(str(ex)))
+
+
+class CircuitBreaker(object):
+    # The circuit of one managed server: closed (calls go through), open (calls fail fast) or half_open (one probe in flight).
+    # It opens after failure_threshold consecutive failures or when QEM reports the server in ERROR, once open the
+    # server is probed every reset_timeout seconds and the circuit closes when the probe succeeds.
+
+    def __init__(self, server, failure_threshold=3, reset_timeout=30):
+        self.server = server
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.reason = None
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.metrics = dict(calls=0, failures=0, rejected=0, trips=0, probes=0)
+
+    def before_call(self, probe):
+        # Raises CircuitOpenError when the call must not be sent, probe() -> (ok, reason) checks an open server
+        with self.lock:
+            self.metrics['calls'] += 1
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.time() >= self.opened_at + self.reset_timeout:
+                self.state = 'half_open'
+                self.metrics['probes'] += 1
+            else:
+                self.metrics['rejected'] += 1
+                raise CircuitOpenError(self.server, self.reason)
+        # only the thread switching to half_open gets here, the others are rejected until the probe is done
+        try:
+            ok, reason = probe()
+        except Exception as ex:
+            ok, reason = False, getattr(ex, 'message', None) or str(ex)
+        with self.lock:
+            if ok:
+                self.close()
+                return
+            self.open(reason)
+            self.metrics['rejected'] += 1
+            raise CircuitOpenError(self.server, self.reason)
+
+    def record_success(self):
+        with self.lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self, reason):
+        with self.lock:
+            self.metrics['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == 'closed' and self.consecutive_failures >= self.failure_threshold:
+                self.open('{0} consecutive failures, last: {1}'.format(self.consecutive_failures, reason))
+
+    def trip(self, reason):
+        with self.lock:
+            if self.state == 'closed':
+                self.open(reason)
+
+    def open(self, reason):
+        # lock held by the caller
+        if self.state == 'closed':
+            self.metrics['trips'] += 1
+        self.state = 'open'
+        self.reason = reason
+        self.opened_at = time.time()
+
+    def close(self):
+        # lock held by the caller
+        self.state = 'closed'
+        self.reason = None
+        self.opened_at = None
+        self.consecutive_failures = 0
+
+    def report(self):
+        with self.lock:
+            return dict(self.metrics, state=self.state, reason=self.reason, consecutive_failures=self.consecutive_failures)
+
+
+class CircuitBreakerClient(object):
+    # AemClient proxy guarding every call taking a server argument with the circuit of that server.
+    # The breakers are kept on the wrapped client, so the wrappers of a shared (cached) client share them.
+
+    def __init__(self, aem_client, failure_threshold=3, reset_timeout=30):
+        self.aem_client = aem_client
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        if not hasattr(aem_client, 'circuit_breakers'):
+            aem_client.circuit_breakers = dict()
+            aem_client.circuit_breakers_lock = threading.Lock()
+        self.breakers = aem_client.circuit_breakers
+        self.breakers_lock = aem_client.circuit_breakers_lock
+        self.server_arguments = dict()
+
+    def breaker(self, server):
+        with self.breakers_lock:
+            breaker = self.breakers.get(server)
+            if breaker is None:
+                breaker = CircuitBreaker(server, self.failure_threshold, self.reset_timeout)
+                self.breakers[server] = breaker
+            return breaker
+
+    def probe(self, server):
+        details = self.aem_client.get_server_details(server).server_details
+        if details.state == AemServerState.MONITORED:
+            return True, None
+        return False, 'server state is {0}{1}'.format(details.state.name, ': {0}'.format(details.message) if details.message else '')
+
+    def server_argument(self, name, method):
+        # The position of the server argument of method, None when it has none
+        if name not in self.server_arguments:
+            try:
+                arguments = getargspec(method).args[1:]
+            except TypeError:
+                arguments = []
+            self.server_arguments[name] = arguments.index('server') if 'server' in arguments else None
+        return self.server_arguments[name]
+
+    def __getattr__(self, name):
+        if name == 'aem_client':
+            raise AttributeError(name)
+        attribute = getattr(self.aem_client, name)
+        if name == 'get_server_list':
+            return self.observe_server_list(attribute)
+        if not callable(attribute) or name in UNGUARDED_METHODS or name.startswith('_'):
+            return attribute
+        position = self.server_argument(name, attribute)
+        if position is None:
+            return attribute
+
+        def guarded(*args, **kwargs):
+            server = kwargs['server'] if 'server' in kwargs else (args[position] if position < len(args) else None)
+            if server is None:
+                return attribute(*args, **kwargs)
+            breaker = self.breaker(server)
+            breaker.before_call(lambda: self.probe(server))
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as ex:
+                if is_server_failure(ex):
+                    breaker.record_failure(getattr(ex, 'message', None) or str(ex))
+                else:
+                    breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
+        return guarded
+
+    def observe_server_list(self, method):
+        # The servers QEM reports in ERROR are tripped without waiting for failed calls
+        def observed(*args, **kwargs):
+            response = method(*args, **kwargs)
+            for server_info in response.serverList:
+                if server_info.state == AemServerState.ERROR:
+                    self.breaker(server_info.name).trip('server state is ERROR{0}'.format(
+                        ': {0}'.format(server_info.message) if server_info.message else ''))
+            return response
+        return observed
+
+    def report(self):
+        # The circuits which rejected calls or are not closed, keyed by server
+        with self.breakers_lock:
+            breakers = list(self.breakers.values())
+        reports = dict((breaker.server, breaker.report()) for breaker in breakers)
+        return dict((server, report) for server, report in reports.items()
+                    if report['state'] != 'closed' or report['rejected'] or report['trips'])
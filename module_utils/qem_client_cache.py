@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from os.path import expanduser
+from ansible.module_utils.qem_common import create_qem_client
+
+DEFAULT_RESULT_CACHE_DIR = '~/.qem/cache/results'
+
+# Controller side plugins live as long as the ansible process (or the fork running the task): the logged-in clients
+# and the recent list results are kept here so several lookups/tasks do not log in or call QEM again.
+_clients = dict()
+_results = dict()
+_lock = threading.Lock()
+
+
+def client_key(credentials):
+    # The password is part of the key (hashed) so a credential change never reuses a session opened with the old one
+    password_digest = hashlib.sha256(str(credentials.get('qem_password')).encode('utf-8')).hexdigest()
+    return (credentials.get('qem_hostname'), credentials.get('qem_domain'), credentials.get('qem_username'), password_digest)
+
+
+def get_client(credentials):
+    key = client_key(credentials)
+    with _lock:
+        aem_client = _clients.get(key)
+        if aem_client is None:
+            aem_client = create_qem_client(**credentials)
+            _clients[key] = aem_client
+        return aem_client
+
+
+def forget_client(credentials):
+    with _lock:
+        _clients.pop(client_key(credentials), None)
+
+
+def _result_path(cache_dir, memo_key):
+    digest = hashlib.sha256(json.dumps(memo_key).encode('utf-8')).hexdigest()
+    return os.path.join(expanduser(cache_dir), '{0}.json'.format(digest))
+
+
+def _read_result(path, now):
+    try:
+        with open(path) as result_file:
+            entry = json.load(result_file)
+        if entry['expires'] > now:
+            return entry
+    except Exception:
+        pass
+    return None
+
+
+def _write_result(path, entry):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    handle, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(handle, 'w') as result_file:
+        json.dump(entry, result_file)
+    os.rename(tmp_path, path)
+
+
+def cached_call(credentials, method, server, mapper, ttl=10, cache_dir=DEFAULT_RESULT_CACHE_DIR):
+    # Memoizes mapper(aem_client.<method>(server)) for ttl seconds, in memory and, since Ansible runs each task in a fork,
+    # in cache_dir so the other forks of the play get the result without a round trip. ttl=0 disables the memoization.
+    # The full client key, password digest included, so a result fetched with other credentials is never served
+    memo_key = list(client_key(credentials)) + [method, server]
+    if ttl <= 0:
+        return mapper(getattr(get_client(credentials), method)(server))
+    now = time.time()
+    memo = tuple(memo_key)
+    with _lock:
+        entry = _results.get(memo)
+    if entry is None or entry['expires'] <= now:
+        path = _result_path(cache_dir, memo_key) if cache_dir else None
+        entry = _read_result(path, now) if path else None
+        if entry is None:
+            entry = dict(value=mapper(getattr(get_client(credentials), method)(server)), expires=now + ttl)
+            if path:
+                _write_result(path, entry)
+        with _lock:
+            _results[memo] = entry
+    return entry['value']
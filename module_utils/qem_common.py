@@ -2,10 +2,14 @@ import ast
 import base64
 import json
 import os
+import time
 from os.path import expanduser
 from ansible.module_utils.aem_client import *
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.six.moves import configparser
+from ansible.module_utils.qem_circuit import CircuitBreakerClient
+from ansible.module_utils.qem_failover import MultiHostAttClient, parse_hosts
+from ansible.module_utils.qem_parallel import run_parallel
 
 try:
     from ansible.module_utils.basic import missing_required_lib
@@ -20,7 +24,24 @@ QEM_COMMON_ARGS = dict(
     qem_username=dict(required=False),
     qem_password=dict(required=False, no_log=True),
     qem_verify_certificate=dict(required=False, type='bool', default=True),
-    profile=dict(required=False)
+    profile=dict(required=False),
+    qem_hedged_reads=dict(required=False, type='bool'),
+    qem_broker=dict(required=False, type='bool'),
+    qem_broker_socket=dict(required=False, type='path'),
+    qem_broker_idle_timeout=dict(required=False, type='int'),
+    qem_circuit_failures=dict(required=False, type='int'),
+    qem_circuit_reset_timeout=dict(required=False, type='int'),
+)
+
+QEM_BROKER_ENV_MAPPING = dict(
+    qem_broker='QEM_BROKER',
+    qem_broker_socket='QEM_BROKER_SOCKET',
+    qem_broker_idle_timeout='QEM_BROKER_IDLE_TIMEOUT'
+)
+
+QEM_CIRCUIT_ENV_MAPPING = dict(
+    qem_circuit_failures='QEM_CIRCUIT_FAILURES',
+    qem_circuit_reset_timeout='QEM_CIRCUIT_RESET_TIMEOUT'
 )
 
 QEM_ENV_MAPPING = dict(
@@ -29,11 +50,117 @@ QEM_ENV_MAPPING = dict(
     qem_username='QEM_USERNAME',
     qem_password='QEM_PASSWORD',
     qem_verify_certificate='QEM_VERIFY_CERTIFICATE',
-    profile='QEM_PROFILE'
+    profile='QEM_PROFILE',
+    qem_hedged_reads='QEM_HEDGED_READS'
 )
 
+def wait_for(condition, timeout=60, initial_interval=0.2, max_interval=5, backoff=2):
+    # Polls condition() until it returns a truthy value, the interval grows exponentially up to max_interval
+    # and the last sleep is shortened so the overall deadline is honoured.
+    # Returns a (value, elapsed seconds) tuple, value being the last falsy result if the deadline expired.
+    start = time.time()
+    deadline = start + timeout
+    interval = initial_interval
+    while True:
+        value = condition()
+        now = time.time()
+        if value or now >= deadline:
+            return value, now - start
+        time.sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)
+
+
+def read_profile(profile="default"):
+    path = expanduser("~/.qem/credentials")
+    try:
+        config = configparser.ConfigParser()
+        config.read(path)
+    except Exception as exc:
+        raise Exception("Failed to access {0}. Check that the file exists and you have read "
+                        "access. {1}".format(path, str(exc)))
+    credentials = dict()
+    for key in QEM_ENV_MAPPING:
+        try:
+            credentials[key] = config.get(profile, key, raw=True)
+        except Exception:
+            pass
+
+    if credentials.get('qem_hostname'):
+        return credentials
+
+    return None
+
+
+def read_env_credentials():
+    env_credentials = dict()
+    for attribute, env_variable in QEM_ENV_MAPPING.items():
+        env_credentials[attribute] = os.environ.get(env_variable, None)
+
+    if env_credentials['profile']:
+        return read_profile(env_credentials['profile'])
+
+    if env_credentials.get('qem_hostname') is not None:
+        return env_credentials
+
+    return None
+
+
+def resolve_credentials(params, log=None):
+    # precedence: module parameters -> environment variables -> default profile in ~/.qem/credentials
+    log = log or (lambda msg: None)
+    arg_credentials = dict()
+    for attribute, env_variable in QEM_ENV_MAPPING.items():
+        arg_credentials[attribute] = params.get(attribute, None)
+
+    # try module params
+    if arg_credentials['profile'] is not None:
+        log('Retrieving credentials with profile parameter.')
+        return read_profile(arg_credentials['profile'])
+
+    if arg_credentials['qem_hostname']:
+        log('Received credentials from parameters.')
+        return arg_credentials
+
+    # try environment
+    env_credentials = read_env_credentials()
+    if env_credentials:
+        log('Received credentials from env.')
+        return env_credentials
+
+    # try default profile from ~./qem/credentials
+    default_credentials = read_profile()
+    if default_credentials:
+        log('Retrieved default profile credentials from ~/.qem/credentials.')
+        return default_credentials
+
+
+def create_qem_client(qem_hostname=None, qem_domain=None, qem_username=None, qem_password=None, qem_verify_certificate=None,
+                      qem_hedged_reads=None, **kwargs):
+    # qem_hostname may list several hosts separated by commas, in order of preference, see MultiHostAttClient
+    if type(qem_verify_certificate) is str:
+        qem_verify_certificate = ast.literal_eval(qem_verify_certificate)
+    if isinstance(qem_hedged_reads, str):
+        qem_hedged_reads = qem_hedged_reads.lower() in ('1', 'true', 'yes', 'on')
+    b64_username_password = base64.b64encode(
+        '{0}\\{1}:{2}'.format(qem_domain, qem_username, qem_password).encode('utf-8')
+    ).decode('utf-8')
+    hosts = parse_hosts(qem_hostname) if qem_hostname else []
+    if len(hosts) > 1:
+        urls = ['https://{0}/attunityenterprisemanager'.format(host) for host in hosts]
+        return AemClient(None, None, attclient=MultiHostAttClient(
+            b64_username_password, urls, verify_certificate=qem_verify_certificate, hedge=bool(qem_hedged_reads)))
+    return AemClient(
+        b64_username_password=b64_username_password,
+        machine_name=qem_hostname,
+        verify_certificate=qem_verify_certificate
+    )
+
+
 class QemModuleBase(object):
-    def __init__(self, derived_arg_spec):
+    def __init__(self, derived_arg_spec, module_factory=AnsibleModule, client_factory=None, broker_default=False):
+        # module_factory/client_factory let the action plugins run the module in the controller process:
+        # module_factory(argument_spec=...) builds the AnsibleModule-like object, client_factory(**credentials) the AemClient.
+        # broker_default is the qem_broker value used when neither the parameter nor QEM_BROKER is set
 
         merged_arg_spec = dict()
         merged_arg_spec.update(QEM_COMMON_ARGS)
@@ -41,103 +168,108 @@ class QemModuleBase(object):
         if derived_arg_spec:
             merged_arg_spec.update(derived_arg_spec)
 
-        self.module = AnsibleModule(argument_spec=merged_arg_spec)
+        self.client_factory = client_factory
+        self.broker_default = broker_default
+        self.module = module_factory(argument_spec=merged_arg_spec)
         credentials = self._get_credentials(self.module.params)
         if not credentials:
             self.fail(msg="Impossible to retrieve credentials from (in order) the module parameters, env vars or ~/.qem/credentials profile file")
+        self.qem_hostname = credentials.get('qem_hostname')
         try:
             self.aem_client = self.get_qem_client(**credentials)
         except Exception as e:
             self.fail(msg=str(e))
 
         result = self.exec_module(**self.module.params)
-        self.module.exit_json(**result)
+        self.module.exit_json(**self.with_circuit_report(result))
 
     def exec_module(self, **kwargs):
         self.fail("Error: {0} failed to implement exec_module method.".format(self.__class__.__name__))
 
 
-    def get_qem_client(self, qem_hostname=None, qem_domain=None, qem_username=None, qem_password=None, qem_verify_certificate=None, **kwargs):
-        if type(qem_verify_certificate) is str:
-            qem_verify_certificate = ast.literal_eval(qem_verify_certificate)
-        try:
-            b64_username_password = base64.b64encode(
-                '{0}\\{1}:{2}'.format(qem_domain, qem_username, qem_password).encode('utf-8')
-            ).decode('utf-8')
-            return AemClient(
-                b64_username_password=b64_username_password,
-                machine_name=qem_hostname,
-                verify_certificate=qem_verify_certificate
+    def get_qem_client(self, **credentials):
+        aem_client = None
+        broker_options = self._get_broker_options(self.module.params)
+        if broker_options['qem_broker']:
+            # Imported here, the broker module depends on this one
+            from ansible.module_utils.qem_broker import create_broker_client
+            try:
+                aem_client = create_broker_client(
+                    credentials,
+                    socket_path=broker_options['qem_broker_socket'],
+                    idle_timeout=broker_options['qem_broker_idle_timeout']
+                )
+            except Exception as e:
+                self.log('QEM broker unavailable, using a direct connection: {0}'.format(e))
+        if aem_client is None:
+            aem_client = (self.client_factory or create_qem_client)(**credentials)
+        circuit_options = self._get_circuit_options(self.module.params)
+        if circuit_options['qem_circuit_failures'] > 0:
+            aem_client = CircuitBreakerClient(
+                aem_client,
+                failure_threshold=circuit_options['qem_circuit_failures'],
+                reset_timeout=circuit_options['qem_circuit_reset_timeout']
             )
-        except Exception as e:
-            raise
+        return aem_client
 
+    def _get_broker_options(self, params):
+        # precedence: module parameters -> environment variables -> defaults
+        options = dict(qem_broker=self.broker_default, qem_broker_socket='~/.qem/broker.sock', qem_broker_idle_timeout=300)
+        for attribute, env_variable in QEM_BROKER_ENV_MAPPING.items():
+            if params.get(attribute) is not None:
+                options[attribute] = params[attribute]
+            elif os.environ.get(env_variable):
+                options[attribute] = os.environ[env_variable]
+        if isinstance(options['qem_broker'], str):
+            options['qem_broker'] = options['qem_broker'].lower() in ('1', 'true', 'yes', 'on')
+        options['qem_broker_idle_timeout'] = int(options['qem_broker_idle_timeout'])
+        return options
 
-    def _get_credentials(self, params):
-        arg_credentials = dict()
-        for attribute, env_variable in QEM_ENV_MAPPING.items():
-            arg_credentials[attribute] = params.get(attribute, None)
-
-        # precedence: module parameters -> environment variables -> default profile in ~/.qem/credentials
-        # try module params
-        if arg_credentials['profile'] is not None:
-            self.log('Retrieving credentials with profile parameter.')
-            credentials = self._get_profile(arg_credentials['profile'])
-            return credentials
-
-        if arg_credentials['qem_hostname']:
-            self.log('Received credentials from parameters.')
-            return arg_credentials
-
-        # try environment
-        env_credentials = self._get_env_credentials()
-        if env_credentials:
-            self.log('Received credentials from env.')
-            return env_credentials
-
-        # try default profile from ~./qem/credentials
-        default_credentials = self._get_profile()
-        if default_credentials:
-            self.log('Retrieved default profile credentials from ~/.qem/credentials.')
-            return default_credentials
-
-    def _get_profile(self, profile="default"):
-        path = expanduser("~/.qem/credentials")
-        try:
-            config = configparser.ConfigParser()
-            config.read(path)
-        except Exception as exc:
-            self.fail("Failed to access {0}. Check that the file exists and you have read "
-                        "access. {1}".format(path, str(exc)))
-        credentials = dict()
-        for key in QEM_ENV_MAPPING:
-            try:
-                credentials[key] = config.get(profile, key, raw=True)
-            except Exception:
-                pass
+    def _get_circuit_options(self, params):
+        # precedence: module parameters -> environment variables -> defaults. The circuit breakers are opt-in, qem_circuit_failures=0 disables them
+        options = dict(qem_circuit_failures=0, qem_circuit_reset_timeout=30)
+        for attribute, env_variable in QEM_CIRCUIT_ENV_MAPPING.items():
+            if params.get(attribute) is not None:
+                options[attribute] = params[attribute]
+            elif os.environ.get(env_variable):
+                options[attribute] = os.environ[env_variable]
+        return dict((attribute, int(value)) for attribute, value in options.items())
 
-        if credentials.get('qem_hostname'):
-            return credentials
+    def with_circuit_report(self, result):
+        # The servers whose circuit rejected calls or is not closed are reported under circuit_breakers
+        if isinstance(getattr(self, 'aem_client', None), CircuitBreakerClient):
+            report = self.aem_client.report()
+            if report:
+                result = dict(result, circuit_breakers=report)
+        return result
 
-        return None
+    def is_fleet(self, server):
+        return isinstance(server, list) or server == 'all'
 
-    def _get_env_credentials(self):
-        env_credentials = dict()
-        for attribute, env_variable in QEM_ENV_MAPPING.items():
-            env_credentials[attribute] = os.environ.get(env_variable, None)
+    def resolve_servers(self, server):
+        if server == 'all':
+            return [server_info.name for server_info in self.aem_client.get_server_list().serverList]
+        if isinstance(server, list):
+            return server
+        return [server]
 
-        if env_credentials['profile']:
-            credentials = self._get_profile(env_credentials['profile'])
-            return credentials
+    def gather_fleet(self, server, func, parallelism=8):
+        # Runs func(server_name) concurrently over the shared client, returns (results, errors, timings) keyed by server name
+        outcomes = run_parallel(func, self.resolve_servers(server), parallelism)
+        results = dict((name, outcome['result']) for name, outcome in outcomes.items() if outcome['error'] is None)
+        errors = dict((name, outcome['error']) for name, outcome in outcomes.items() if outcome['error'] is not None)
+        timings = dict((name, round(outcome['elapsed'], 3)) for name, outcome in outcomes.items())
+        return results, errors, timings
 
-        if env_credentials.get('qem_hostname') is not None:
-            return env_credentials
-
-        return None
+    def _get_credentials(self, params):
+        try:
+            return resolve_credentials(params, self.log)
+        except Exception as exc:
+            self.fail(msg=str(exc))
 
 
     def fail(self, msg, **kwargs):
-        self.module.fail_json(msg=msg, **kwargs)
+        self.module.fail_json(msg=msg, **self.with_circuit_report(kwargs))
 
     def log(self, msg, pretty_print=False):
         if pretty_print:
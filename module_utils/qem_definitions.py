@@ -0,0 +1,8 @@
+# Helpers reading the task definitions of an export (cmd.replication_definition.tasks)
+
+
+def task_endpoint_names(task):
+    # The endpoints a task uses, as referenced by its source and targets
+    names = [task.get('source', {}).get('rep_source', {}).get('database_name')]
+    names.extend(target.get('rep_target', {}).get('database_name') for target in task.get('targets', []))
+    return [name for name in names if name]
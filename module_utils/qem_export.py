@@ -0,0 +1,77 @@
+import copy
+import filecmp
+import json
+import os
+import re
+import tempfile
+from collections import OrderedDict
+
+_UNSAFE_CHARACTERS = re.compile(r'[^\w .@()+-]')
+
+
+def safe_file_name(name):
+    # Task/endpoint/server names may contain characters not allowed in a file name (eg. "/" or ":")
+    return _UNSAFE_CHARACTERS.sub('_', name).strip() or '_'
+
+
+def ensure_directory(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # created meanwhile by a concurrent export
+            if not os.path.isdir(directory):
+                raise
+    return directory
+
+
+def replace_if_changed(tmp_path, path):
+    # Moves tmp_path over path unless both have the same content, returns whether path changed
+    if os.path.isfile(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.rename(tmp_path, path)
+    return True
+
+
+def stream_to_file(write, path):
+    # write(output) streams the content to a binary file object: the content goes to a temporary file of the same
+    # directory first so an interrupted export never leaves a truncated file behind
+    handle, tmp_path = tempfile.mkstemp(dir=ensure_directory(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            write(output)
+        return replace_if_changed(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(document, path):
+    def write(output):
+        output.write(json.dumps(document, indent=4).encode('utf-8'))
+    return stream_to_file(write, path)
+
+
+def split_export(export_path, task_dir, endpoint_dir):
+    # Splits an export (one task with its endpoints or a whole server) into one task file per task, with an empty
+    # "databases" section, and one file per endpoint: the definitions expected by qem_task and qem_endpoint.
+    # Returns a list of (kind, name, path, changed) tuples.
+    with open(export_path) as export_file:
+        document = json.load(export_file, object_pairs_hook=OrderedDict)
+    replication_definition = document.get('cmd.replication_definition', OrderedDict())
+    files = []
+    for task in replication_definition.get('tasks', []):
+        task_document = copy.copy(document)
+        task_document['cmd.replication_definition'] = copy.copy(replication_definition)
+        task_document['cmd.replication_definition']['tasks'] = [task]
+        task_document['cmd.replication_definition']['databases'] = []
+        name = task['task']['name']
+        path = os.path.join(task_dir, '{0}.json'.format(safe_file_name(name)))
+        files.append(('task', name, path, write_json(task_document, path)))
+    for endpoint in replication_definition.get('databases', []):
+        path = os.path.join(endpoint_dir, '{0}.json'.format(safe_file_name(endpoint['name'])))
+        files.append(('endpoint', endpoint['name'], path, write_json(endpoint, path)))
+    return files
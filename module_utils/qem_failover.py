@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import deque
+from ansible.module_utils.aem_client import AemClientException, AttClient, STREAM_CHUNK_SIZE
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+# How long a host which failed to answer is skipped before being health checked again
+HOST_RETRY_INTERVAL = 30
+# Bound of the login to a host (when no timeout is set) and of its health check, a silent host must not stall the failover
+LOGIN_TIMEOUT = 30
+HEALTH_CHECK_TIMEOUT = 5
+# Latency samples kept per request kind, and the number of samples needed before the p95 is trusted to hedge.
+# With few samples the p95 is close to the slowest latency seen, which only hedges the requests slower than all the others
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 5
+# The path segments following these ones are server, task or endpoint names
+NAMED_COLLECTIONS = ('servers', 'tasks', 'endpoints')
+
+
+def parse_hosts(qem_hostname):
+    # 'qem1.contoso.com, qem2.contoso.com' -> ['qem1.contoso.com', 'qem2.contoso.com']
+    return [host.strip() for host in str(qem_hostname).split(',') if host.strip()]
+
+
+def percentile(samples, ratio):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def route_template(address):
+    # 'api/v1/servers/S1/tasks/T1?action=export&withendpoints=true' -> 'api/v1/servers/{}/tasks/{}?action=export'
+    # The latencies are kept per route rather than per address, which embeds the server and task names
+    path, _, query = address.partition('?')
+    parts = path.strip('/').split('/')
+    template = '/'.join('{}' if index and parts[index - 1] in NAMED_COLLECTIONS else part for index, part in enumerate(parts))
+    actions = [param for param in query.split('&') if param.startswith('action=')]
+    return template + ('?' + actions[0] if actions else '')
+
+
+# The latency windows of the clients of the same hosts, shared in the process: the clients of the broker pool (and the
+# following modules served by the broker) hedge with the latencies already seen
+_latency_windows = dict()
+_latency_windows_lock = threading.Lock()
+
+
+class HostSession(object):
+    # The session of one QEM host, logged in on first use
+
+    def __init__(self, url, b64_username_password, verify_certificate):
+        self.url = url
+        self.b64_username_password = b64_username_password
+        self.verify_certificate = verify_certificate
+        self.attclient = None
+        self.lock = threading.Lock()
+        self.check_lock = threading.Lock()
+        self.down_until = 0
+        self.last_error = None
+        self.metrics = dict(requests=0, failures=0, hedges=0, hedge_wins=0, health_checks=0)
+
+    def client(self, timeout):
+        with self.lock:
+            if self.attclient is None:
+                self.attclient = AttClient(self.b64_username_password, self.url, self.verify_certificate,
+                                           timeout=timeout or LOGIN_TIMEOUT)
+            self.attclient.set_timeout(timeout)
+            return self.attclient
+
+    def available(self, now):
+        return self.down_until <= now
+
+    def mark_down(self, error):
+        self.down_until = time.time() + HOST_RETRY_INTERVAL
+        self.last_error = error
+        self.metrics['failures'] += 1
+
+    def mark_up(self):
+        self.down_until = 0
+
+    def begin_check(self, now):
+        # True when the host is down and its retry interval is over, it stays skipped while it is checked
+        with self.check_lock:
+            if not self.down_until or self.down_until > now:
+                return False
+            self.down_until = now + HOST_RETRY_INTERVAL
+            return True
+
+    def check(self):
+        # Health check: a new login, which becomes the session of the host when it succeeds
+        self.metrics['health_checks'] += 1
+        try:
+            attclient = AttClient(self.b64_username_password, self.url, self.verify_certificate, timeout=HEALTH_CHECK_TIMEOUT)
+        except AemClientException:
+            # an answer of the host (eg. the login is refused), the requests get the same answer
+            self.mark_up()
+            return
+        except Exception as ex:
+            self.down_until = time.time() + HOST_RETRY_INTERVAL
+            self.last_error = getattr(ex, 'message', None) or str(ex)
+            return
+        with self.lock:
+            self.attclient = attclient
+        self.mark_up()
+
+
+class MultiHostAttClient(object):
+    # AttClient for several QEM hosts (in order of preference), each one with its own session.
+    # A host failing to log in or to answer (transport error, not a QEM error answer) is skipped for HOST_RETRY_INTERVAL seconds,
+    # it is then health checked in the background and used again once it answers.
+    # GET requests fail over to the next host, the other requests are never replayed (they may have been applied):
+    # the error is raised and the following requests go to the next host.
+    # With hedge=True, a GET still unanswered after the p95 latency of its kind is also sent to another host, the first answer wins.
+
+    def __init__(self, b64_username_password, urls, verify_certificate=True, hedge=False):
+        self.sessions = [HostSession(url, b64_username_password, verify_certificate) for url in urls]
+        self.hedge = hedge
+        self.timeout = None
+        with _latency_windows_lock:
+            self.latencies = _latency_windows.setdefault(tuple(urls), dict())
+        self.latencies_lock = _latency_windows_lock
+        # the first reachable host logs in now, as a single host AttClient does
+        self.call(lambda attclient: None, idempotent=True)
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+        for session in self.sessions:
+            if session.attclient is not None:
+                session.attclient.set_timeout(timeout)
+
+    def candidates(self):
+        # The available hosts in order of preference, then the unavailable ones (all of them may be down)
+        now = time.time()
+        for session in self.sessions:
+            if session.begin_check(now):
+                thread = threading.Thread(target=session.check)
+                thread.daemon = True
+                thread.start()
+        return [session for session in self.sessions if session.available(now)] + \
+               [session for session in self.sessions if not session.available(now)]
+
+    def attempt(self, session, func):
+        session.metrics['requests'] += 1
+        try:
+            result = func(session.client(self.timeout))
+        except AemClientException:
+            # an answer of the host
+            session.mark_up()
+            raise
+        except Exception as ex:
+            session.mark_down(getattr(ex, 'message', None) or str(ex))
+            raise
+        session.mark_up()
+        return result
+
+    def call(self, func, idempotent):
+        last_error = None
+        for session in self.candidates():
+            try:
+                return self.attempt(session, func)
+            except AemClientException:
+                raise
+            except Exception as ex:
+                last_error = ex
+                if not idempotent and session.attclient is not None:
+                    # the request may have reached the host, it is not replayed elsewhere
+                    raise
+        raise last_error
+
+    def record_latency(self, kind, elapsed):
+        with self.latencies_lock:
+            self.latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+
+    def hedge_delay(self, kind):
+        with self.latencies_lock:
+            samples = self.latencies.get(kind) or []
+            if len(samples) < HEDGE_MIN_SAMPLES:
+                samples = [latency for window in self.latencies.values() for latency in window]
+            if len(samples) < HEDGE_MIN_SAMPLES:
+                return None
+            return percentile(samples, 0.95)
+
+    def hedged_call(self, func, kind):
+        # Sends func to the preferred host, and to the next one if no answer came within the p95 latency
+        sessions = [session for session in self.candidates() if session.available(time.time())]
+        delay = self.hedge_delay(kind)
+        if len(sessions) < 2 or delay is None:
+            return self.call(func, idempotent=True)
+        answers = Queue()
+
+        def send(session):
+            try:
+                answers.put((session, self.attempt(session, func), None))
+            except Exception as ex:
+                answers.put((session, None, ex))
+
+        def start(session):
+            thread = threading.Thread(target=send, args=(session,))
+            thread.daemon = True
+            thread.start()
+
+        start(sessions[0])
+        pending = 1
+        hedged = False
+        try:
+            first = answers.get(timeout=delay)
+        except Exception:
+            # no answer within the p95, the request is hedged to the next host
+            first = None
+            sessions[1].metrics['hedges'] += 1
+            start(sessions[1])
+            pending += 1
+            hedged = True
+        error = None
+        while True:
+            session, result, ex = first if first is not None else answers.get()
+            first = None
+            pending -= 1
+            if ex is None or isinstance(ex, AemClientException):
+                if hedged and session is sessions[1]:
+                    session.metrics['hedge_wins'] += 1
+                if ex is not None:
+                    raise ex
+                return result
+            error = ex
+            if pending == 0:
+                break
+        # every host tried so far failed, the remaining ones are tried in turn
+        for session in sessions[2 if hedged else 1:]:
+            try:
+                return self.attempt(session, func)
+            except AemClientException:
+                raise
+            except Exception as ex:
+                error = ex
+        raise error
+
+    def do_web_request(self, resp_class=None, address=None, http_method='GET', req=None, stream_req=False, timeout=None):
+        func = lambda attclient: attclient.do_web_request(resp_class, address, http_method, req, stream_req, timeout=timeout)
+        if http_method != 'GET':
+            return self.call(func, idempotent=False)
+        kind = resp_class.__name__ if resp_class else route_template(address)
+        start = time.time()
+        if self.hedge:
+            result = self.hedged_call(func, kind)
+        else:
+            result = self.call(func, idempotent=True)
+        self.record_latency(kind, time.time() - start)
+        return result
+
+    def do_stream_request(self, address=None, http_method='GET', output=None, chunk_size=STREAM_CHUNK_SIZE):
+        # The output may be partially written, a stream is never replayed
+        return self.call(lambda attclient: attclient.do_stream_request(address, http_method, output, chunk_size), idempotent=False)
+
+    def report(self):
+        return [dict(session.metrics, url=session.url, available=session.available(time.time()), last_error=session.last_error)
+                for session in self.sessions]
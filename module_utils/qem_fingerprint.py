@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from os.path import expanduser
+
+# Keys rewritten by the server on every import/export, they never reflect a definition change
+VOLATILE_KEYS = ('_version', 'task_uuid')
+
+DEFAULT_FINGERPRINT_CACHE = '~/.qem/cache/fingerprints.json'
+
+
+def _strip(value, ignored_keys):
+    if isinstance(value, dict):
+        return dict((key, _strip(item, ignored_keys)) for key, item in value.items() if key not in ignored_keys)
+    if isinstance(value, list):
+        return [_strip(item, ignored_keys) for item in value]
+    return value
+
+
+def canonicalize(document, ignored_keys=VOLATILE_KEYS):
+    # Returns a copy of the document without the ignored keys (at any depth), a raw export (str/bytes) is decoded first.
+    # Key ordering is irrelevant since fingerprints are computed on a key-sorted dump.
+    if isinstance(document, bytes):
+        document = document.decode('utf-8')
+    if isinstance(document, str):
+        document = json.loads(document)
+    return _strip(document, ignored_keys)
+
+
+def canonical_dump(document, ignored_keys=VOLATILE_KEYS):
+    return json.dumps(canonicalize(document, ignored_keys), sort_keys=True, separators=(',', ':'))
+
+
+def fingerprint(document, ignored_keys=VOLATILE_KEYS):
+    return hashlib.sha256(canonical_dump(document, ignored_keys).encode('utf-8')).hexdigest()
+
+
+class FingerprintCache(object):
+    # Local JSON file mapping a key (eg. "<qem host>/<server>/<task>") to the last confirmed fingerprints.
+    # Several modules may run at the same time (forks), entries are merged with the file content on save
+    # and the file is replaced atomically.
+
+    def __init__(self, path=DEFAULT_FINGERPRINT_CACHE, ttl=3600):
+        self.path = expanduser(path)
+        self.ttl = ttl
+        self.entries = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except Exception:
+            return dict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        if self.ttl <= 0 or time.time() - entry.get('timestamp', 0) > self.ttl:
+            return None
+        return entry
+
+    def put(self, key, **fingerprints):
+        entry = dict(fingerprints)
+        entry['timestamp'] = time.time()
+        self.entries[key] = entry
+        self.save({key: entry})
+
+    def save(self, updates):
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        entries = self._read()
+        entries.update(updates)
+        handle, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'w') as cache_file:
+            json.dump(entries, cache_file, sort_keys=True)
+        os.rename(tmp_path, self.path)
+
+
+def item_name(item):
+    # Named items of a repository section: endpoints/notifications carry a name, tasks are named by their "task" block
+    if isinstance(item, dict):
+        if 'name' in item:
+            return item['name']
+        if isinstance(item.get('task'), dict):
+            return item['task'].get('name')
+    return None
+
+
+def is_named_list(value):
+    return isinstance(value, list) and len(value) > 0 and all(item_name(item) is not None for item in value)
+
+
+def diff_section(current, desired, ignored_keys=VOLATILE_KEYS):
+    # Returns None when both values are equal, a {added, changed, removed} dict of item names for named lists, "changed" otherwise
+    if (desired == [] or is_named_list(desired)) and (current is None or current == [] or is_named_list(current)):
+        current_items = dict((item_name(item), fingerprint(item, ignored_keys)) for item in current or [])
+        desired_items = dict((item_name(item), fingerprint(item, ignored_keys)) for item in desired)
+        diff = dict(
+            added=sorted(name for name in desired_items if name not in current_items),
+            changed=sorted(name for name in desired_items if name in current_items and current_items[name] != desired_items[name]),
+            removed=sorted(name for name in current_items if name not in desired_items)
+        )
+        return diff if diff['added'] or diff['changed'] else None
+    if current is not None and fingerprint(current, ignored_keys) == fingerprint(desired, ignored_keys):
+        return None
+    return 'changed'
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from ansible.module_utils.aem_client import AemServerState, ReplicateServerInfo
+from ansible.module_utils.qem_parallel import run_parallel
+
+INVENTORY_SECTIONS = ('details', 'tasks', 'endpoints', 'acl')
+
+
+def enum_name(value):
+    return value.name if value is not None and hasattr(value, 'name') else value
+
+
+def server_mapper(server_info):
+    return OrderedDict([
+        ('name', server_info.name),
+        ('type', 'replicate' if isinstance(server_info, ReplicateServerInfo) else 'compose'),
+        ('description', server_info.description),
+        ('host', server_info.host),
+        ('port', server_info.port),
+        ('platform', enum_name(server_info.platform)),
+        ('version', server_info.version),
+        ('state', enum_name(server_info.state)),
+        ('message', server_info.message),
+        ('last_connection', server_info.last_connection),
+    ])
+
+
+def details_mapper(details):
+    license = details.license
+    summary = details.task_summary
+    utilization = details.resource_utilization
+    return OrderedDict([
+        ('version', details.version),
+        ('license', OrderedDict([
+            ('state', enum_name(license.state)),
+            ('issue_date', license.issue_date),
+            ('expiration', license.expiration),
+            ('days_to_expiration', license.days_to_expiration),
+        ]) if license else None),
+        ('task_summary', OrderedDict([
+            ('total', summary.total),
+            ('running', summary.running),
+            ('stopped', summary.stopped),
+            ('recovering', summary.recovering),
+            ('error', summary.error),
+        ]) if summary else None),
+        ('resource_utilization', OrderedDict([
+            ('disk_usage_mb', utilization.disk_usage_mb),
+            ('memory_mb', utilization.memory_mb),
+            ('attunity_cpu_percentage', utilization.attunity_cpu_percentage),
+            ('machine_cpu_percentage', utilization.machine_cpu_percentage),
+        ]) if utilization else None),
+    ])
+
+
+def task_mapper(task):
+    return OrderedDict([
+        ('name', task.name),
+        ('state', enum_name(task.state)),
+        ('stop_reason', enum_name(task.stop_reason)),
+        ('message', task.message),
+        ('assigned_tags', task.assigned_tags),
+    ])
+
+
+def endpoint_mapper(endpoint):
+    return OrderedDict([
+        ('name', endpoint.name),
+        ('description', endpoint.description),
+        ('role', enum_name(endpoint.role)),
+        ('type', endpoint.type),
+        ('is_licensed', endpoint.is_licensed),
+    ])
+
+
+def acl_mapper(acl):
+    acl_list = []
+    for role in ('admin', 'designer', 'operator', 'viewer'):
+        role_def = getattr(acl, '{0}_role'.format(role))
+        acl_list.extend({'name': ref.name, 'type': 'user', 'role': role} for ref in role_def.users)
+        acl_list.extend({'name': ref.name, 'type': 'group', 'role': role} for ref in role_def.groups)
+    return OrderedDict([('disable_inheritance', acl.disable_inheritance), ('acl', acl_list)])
+
+
+def fetch_section(aem_client, server, section):
+    if section == 'details':
+        return details_mapper(aem_client.get_server_details(server).server_details)
+    if section == 'tasks':
+        return [task_mapper(task) for task in aem_client.get_task_list(server).taskList]
+    if section == 'endpoints':
+        return [endpoint_mapper(endpoint) for endpoint in aem_client.get_endpoint_list(server).endpointList]
+    if section == 'acl':
+        try:
+            return acl_mapper(aem_client.get_server_acl(server))
+        except Exception as ex:
+            if getattr(ex, 'error_code', None) == 'AEM_SERVER_HAS_NO_ACL':
+                return OrderedDict([('disable_inheritance', False), ('acl', [])])
+            raise
+    raise ValueError('Unknown inventory section "{0}"'.format(section))
+
+
+def collect_inventory(aem_client, servers=None, sections=INVENTORY_SECTIONS, parallelism=8, skip_unmonitored=True):
+    # One get_server_list call, then every (server, section) call runs concurrently.
+    # Servers QEM does not monitor (or monitors in error) are skipped without being called when skip_unmonitored is set,
+    # they would only make the calls wait for the proxied timeout.
+    server_list = aem_client.get_server_list().serverList
+    if servers:
+        server_list = [server_info for server_info in server_list if server_info.name in servers]
+
+    inventory = OrderedDict()
+    calls = []
+    for server_info in server_list:
+        entry = server_mapper(server_info)
+        entry['skipped'] = skip_unmonitored and server_info.state != AemServerState.MONITORED
+        entry['errors'] = OrderedDict()
+        inventory[server_info.name] = entry
+        if not entry['skipped']:
+            calls.extend((server_info.name, section) for section in sections)
+
+    outcomes = run_parallel(lambda call: fetch_section(aem_client, call[0], call[1]), calls, parallelism)
+    for (server, section), outcome in outcomes.items():
+        if outcome['error'] is not None:
+            inventory[server]['errors'][section] = outcome['error']
+        elif section == 'details':
+            inventory[server].update(outcome['result'])
+        else:
+            inventory[server][section] = outcome['result']
+    return inventory
+
+
+def inventory_summary(inventory):
+    return OrderedDict([
+        ('servers', len(inventory)),
+        ('skipped', len([entry for entry in inventory.values() if entry['skipped']])),
+        ('with_errors', len([entry for entry in inventory.values() if entry['errors']])),
+        ('tasks', sum(len(entry.get('tasks') or []) for entry in inventory.values())),
+        ('endpoints', sum(len(entry.get('endpoints') or []) for entry in inventory.values())),
+    ])
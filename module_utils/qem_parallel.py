@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def error_message(ex):
+    # AemClientException carries the QEM error message, other exceptions are rendered as is
+    return getattr(ex, 'message', None) or str(ex)
+
+
+class RateLimiter(object):
+    # Spaces the calls so that at most rate calls start per second, whatever the number of threads calling acquire()
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until the caller's slot, returns the time waited
+        with self.lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+        return slot - now
+
+
+def run_parallel(func, items, max_workers=8, rate_limit=None, offsets=None):
+    # Calls func(item) for every item with at most max_workers concurrent calls, and at most rate_limit calls started per second if set.
+    # offsets maps items to the delay in seconds after which their call is submitted: the calling thread waits, not the workers.
+    # Returns an OrderedDict (in items order) mapping each item to dict(result, error, elapsed, wait), a failing call never aborts the others.
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    def timed_call(item):
+        wait = limiter.acquire() if limiter else 0
+        start = time.time()
+        try:
+            return dict(result=func(item), error=None, elapsed=time.time() - start, wait=wait)
+        except Exception as ex:
+            return dict(result=None, error=error_message(ex), elapsed=time.time() - start, wait=wait)
+
+    items = list(items)
+    outcomes = OrderedDict()
+    if not items:
+        return outcomes
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        if offsets:
+            start = time.time()
+            futures = dict()
+            for item in sorted(items, key=lambda item: offsets.get(item, 0)):
+                delay = start + offsets.get(item, 0) - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                futures[item] = executor.submit(timed_call, item)
+            for item in items:
+                outcomes[item] = futures[item].result()
+        else:
+            for item, outcome in zip(items, executor.map(timed_call, items)):
+                outcomes[item] = outcome
+    return outcomes
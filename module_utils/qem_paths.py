@@ -0,0 +1,20 @@
+# Makes the role module_utils importable as ansible.module_utils.* from the controller side code (action, lookup and
+# inventory plugins, tools and benchmarks), where Ansible does not add it. The modules themselves get it from AnsiballZ.
+# This file cannot be imported before it ran, the callers run it by path:
+#
+#   runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))
+
+import os
+
+import ansible.module_utils
+
+MODULE_UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLE_DIR = os.path.dirname(MODULE_UTILS_DIR)
+
+
+def register_module_utils():
+    if MODULE_UTILS_DIR not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.append(MODULE_UTILS_DIR)
+
+
+register_module_utils()
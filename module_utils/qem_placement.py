@@ -0,0 +1,80 @@
+from ansible.module_utils.aem_client import AemLicenseState, AemServerState
+from ansible.module_utils.qem_parallel import run_parallel
+
+# Weight of each load figure in the placement score, the figures are normalized to 0-100 over the candidates
+SCORE_WEIGHTS = dict(
+    cpu_percentage=0.4,
+    running=0.3,
+    memory_mb=0.2,
+    total=0.1,
+)
+
+
+def version_tuple(version):
+    # '6.6.0.1' -> (6, 6), the major/minor a task definition can be imported on
+    try:
+        return tuple(int(part) for part in str(version).split('.')[:2])
+    except ValueError:
+        return None
+
+
+def candidate_load(aem_client, server, task_name=None):
+    # The figures of a candidate server, with whether it already has the task when task_name is given
+    details = aem_client.get_server_details(server).server_details
+    load = dict(
+        server=server,
+        state=details.state.name,
+        version=details.version,
+        license=details.license.state.name if details.license else None,
+        cpu_percentage=details.resource_utilization.attunity_cpu_percentage,
+        memory_mb=details.resource_utilization.memory_mb,
+        running=details.task_summary.running + details.task_summary.recovering,
+        total=details.task_summary.total,
+        has_task=False
+    )
+    if task_name:
+        load['has_task'] = any(task.name == task_name for task in aem_client.get_task_list(server).taskList)
+    return load
+
+
+def ineligibility_reasons(load, required_version=None):
+    reasons = []
+    if load['state'] != AemServerState.MONITORED.name:
+        reasons.append('server state is {0}'.format(load['state']))
+    if load['license'] not in (None, AemLicenseState.VALID_LICENSE.name):
+        reasons.append('license state is {0}'.format(load['license']))
+    required = version_tuple(required_version) if required_version else None
+    actual = version_tuple(load['version'])
+    if required and (actual is None or actual < required):
+        reasons.append('version {0} is older than the definition version {1}'.format(load['version'], required_version))
+    return reasons
+
+
+def score_candidates(loads, required_version=None):
+    # Returns the candidates sorted from the best to the worst: eligible ones first, lowest score first.
+    # The score is the weighted sum of each figure relative to the most loaded candidate (0 = idle, 100 = the most loaded on every figure).
+    peaks = dict((name, max([load[name] for load in loads] + [0])) for name in SCORE_WEIGHTS)
+    scores = []
+    for load in loads:
+        score = sum(weight * (100.0 * load[name] / peaks[name] if peaks[name] else 0) for name, weight in SCORE_WEIGHTS.items())
+        reasons = ineligibility_reasons(load, required_version)
+        scores.append(dict(load, score=round(score, 2), eligible=not reasons, reasons=reasons))
+    return sorted(scores, key=lambda score: (not score['eligible'], score['score'], score['server']))
+
+
+def place_task(aem_client, candidates, task_name=None, required_version=None, parallelism=8):
+    # Picks the server of a task among candidates: the one already having the task if any (so that a placement is stable),
+    # the best scored eligible one otherwise. Returns (server or None, reason, scores, errors), errors keyed by candidate.
+    outcomes = run_parallel(lambda server: candidate_load(aem_client, server, task_name), candidates, parallelism)
+    errors = dict((server, outcome['error']) for server, outcome in outcomes.items() if outcome['error'] is not None)
+    scores = score_candidates([outcome['result'] for outcome in outcomes.values() if outcome['error'] is None], required_version)
+    existing = [score['server'] for score in scores if score['has_task']]
+    if existing:
+        return existing[0], 'task already defined', scores, errors
+    if errors and task_name:
+        # the task may be defined on a candidate that could not be checked, placing it elsewhere could duplicate it
+        return None, 'candidates could not be checked: {0}'.format(', '.join(sorted(errors))), scores, errors
+    eligible = [score['server'] for score in scores if score['eligible']]
+    if eligible:
+        return eligible[0], 'lowest score', scores, errors
+    return None, 'no eligible candidate', scores, errors
@@ -0,0 +1,136 @@
+import time
+from ansible.module_utils.qem_parallel import run_parallel
+from ansible.module_utils.qem_timeseries import DEFAULT_TIERS, SeriesStore
+
+TASK_METRIC_FIELDS = (
+    'cdc_source_latency',
+    'cdc_total_latency',
+    'cdc_applied_insert_count',
+    'cdc_applied_update_count',
+    'cdc_applied_delete_count',
+    'cdc_applied_ddl_count',
+    'cdc_incoming_changes_in_memory_count',
+    'cdc_incoming_changes_on_disk_count',
+    'cdc_source_throughput_records',
+    'cdc_target_throughput_records',
+    'full_load_tables_completed_count',
+    'full_load_tables_loading_count',
+    'full_load_tables_queued_count',
+    'full_load_tables_with_error_count',
+    'full_load_records_completed_count',
+    'full_load_target_throughput_records',
+    'memory_mb',
+    'disk_usage_mb',
+    'cpu_percentage',
+)
+
+DEFAULT_TASK_METRICS_STORE = '~/.qem/task_metrics.json'
+
+
+def latency_seconds(latency):
+    # QEM latencies are "HH:MM:SS" strings (hours may exceed 24), numbers are taken as seconds
+    if latency is None or latency == '':
+        return 0
+    if isinstance(latency, (int, float)):
+        return latency
+    seconds = 0
+    for part in str(latency).split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def task_metrics(details):
+    # The figures of an AemTaskInfoDetailedBase flattened to TASK_METRIC_FIELDS, a missing section counts as 0
+    def figure(section, name):
+        return getattr(section, name, 0) or 0 if section is not None else 0
+
+    transactions = details.cdc_transactions_counters
+    return dict(
+        cdc_source_latency=latency_seconds(getattr(details.cdc_latency, 'source_latency', None)),
+        cdc_total_latency=latency_seconds(getattr(details.cdc_latency, 'total_latency', None)),
+        cdc_applied_insert_count=figure(details.cdc_event_counters, 'applied_insert_count'),
+        cdc_applied_update_count=figure(details.cdc_event_counters, 'applied_update_count'),
+        cdc_applied_delete_count=figure(details.cdc_event_counters, 'applied_delete_count'),
+        cdc_applied_ddl_count=figure(details.cdc_event_counters, 'applied_ddl_count'),
+        cdc_incoming_changes_in_memory_count=figure(transactions, 'incoming_accumulated_changes_in_memory_count')
+        + figure(transactions, 'incoming_applying_changes_in_memory_count'),
+        cdc_incoming_changes_on_disk_count=figure(transactions, 'incoming_accumulated_changes_on_disk_count')
+        + figure(transactions, 'incoming_applying_changes_on_disk_count'),
+        cdc_source_throughput_records=figure(details.cdc_throughput, 'source_throughput_records_count'),
+        cdc_target_throughput_records=figure(details.cdc_throughput, 'target_throughput_records_count'),
+        full_load_tables_completed_count=figure(details.full_load_counters, 'tables_completed_count'),
+        full_load_tables_loading_count=figure(details.full_load_counters, 'tables_loading_count'),
+        full_load_tables_queued_count=figure(details.full_load_counters, 'tables_queued_count'),
+        full_load_tables_with_error_count=figure(details.full_load_counters, 'tables_with_error_count'),
+        full_load_records_completed_count=figure(details.full_load_counters, 'records_completed_count'),
+        full_load_target_throughput_records=figure(details.full_load_throughput, 'target_throughput_records_count'),
+        memory_mb=getattr(details, 'memory_mb', 0) or 0,
+        disk_usage_mb=getattr(details, 'disk_usage_mb', 0) or 0,
+        cpu_percentage=getattr(details, 'cpu_percentage', 0) or 0,
+    )
+
+
+def task_key(server, task):
+    return '{0}/{1}'.format(server, task)
+
+
+def slope(points):
+    # Least squares slope of [(x, y)], 0 with less than 2 distinct x
+    count = len(points)
+    if count < 2:
+        return 0
+    mean_x = sum(x for x, y in points) / float(count)
+    mean_y = sum(y for x, y in points) / float(count)
+    variance = sum((x - mean_x) ** 2 for x, y in points)
+    if not variance:
+        return 0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+class TaskMetricsCollector(object):
+    # Samples get_task_details of many tasks concurrently into a SeriesStore keyed by "server/task"
+
+    def __init__(self, aem_client, tasks, store, parallelism=8):
+        self.aem_client = aem_client
+        self.tasks = list(tasks)
+        self.store = store
+        self.parallelism = parallelism
+        self.errors = dict()
+
+    def sample(self, task):
+        server, name = task
+        details = self.aem_client.get_task_details(server, name)
+        return time.time(), task_metrics(details)
+
+    def collect_once(self):
+        # One round over the tasks, returns the number of tasks sampled
+        outcomes = run_parallel(self.sample, self.tasks, self.parallelism)
+        self.errors = dict((task_key(*task), outcome['error']) for task, outcome in outcomes.items() if outcome['error'] is not None)
+        for task, outcome in outcomes.items():
+            if outcome['error'] is None:
+                timestamp, values = outcome['result']
+                self.store.add(task_key(*task), timestamp, values)
+        self.store.prune()
+        return len(outcomes) - len(self.errors)
+
+
+def latency_trends(store, tier='1m', window=30, min_slope=1.0, min_latency=10):
+    # The tasks whose CDC total latency grows: over the last window points of the tier, the least squares slope
+    # (seconds of latency gained per minute) is at least min_slope and the latest latency at least min_latency seconds.
+    # Returns a list of dict(task, slope, latency, points), the steepest first.
+    trends = []
+    with store.lock:
+        series_items = list(store.series.items())
+    for key, series in series_items:
+        points = [(timestamp / 60.0, means['cdc_total_latency']) for timestamp, means, maxima in series.tier(tier).points()[-window:]]
+        if len(points) < 3:
+            continue
+        trend = slope(points)
+        latency = points[-1][1]
+        if trend >= min_slope and latency >= min_latency:
+            trends.append(dict(task=key, slope=round(trend, 3), latency=latency, points=len(points)))
+    return sorted(trends, key=lambda trend: -trend['slope'])
+
+
+def task_metrics_store(path=DEFAULT_TASK_METRICS_STORE, tiers=DEFAULT_TIERS):
+    return SeriesStore(path, TASK_METRIC_FIELDS, tiers)
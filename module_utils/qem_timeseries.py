@@ -0,0 +1,268 @@
+import base64
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from os.path import expanduser
+
+# name, bucket width in seconds (0 keeps every sample), number of points kept
+DEFAULT_TIERS = (
+    ('raw', 0, 720),
+    ('1m', 60, 1440),
+    ('1h', 3600, 720),
+)
+
+STORE_FORMAT = 1
+
+
+class RingBuffer(object):
+    # Fixed capacity buffer backed by an array (typecode 'd' or 'f'), the oldest values are overwritten once full
+
+    def __init__(self, capacity, typecode='f'):
+        self.capacity = capacity
+        self.values = array(typecode, [0] * capacity)
+        self.start = 0
+        self.size = 0
+
+    def append(self, value):
+        self.values[(self.start + self.size) % self.capacity] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self.values[(self.start + index) % self.capacity]
+
+    def last(self):
+        return self.values[(self.start + self.size - 1) % self.capacity] if self.size else None
+
+    def dump(self):
+        # The values in order, as base64 of the native array bytes
+        ordered = array(self.values.typecode, list(self))
+        return base64.b64encode(ordered.tobytes()).decode('ascii')
+
+    def load(self, encoded, byteorder):
+        ordered = array(self.values.typecode)
+        ordered.frombytes(base64.b64decode(encoded))
+        if byteorder != sys.byteorder:
+            ordered.byteswap()
+        self.start = 0
+        self.size = 0
+        for value in ordered[-self.capacity:]:
+            self.append(value)
+
+
+class Tier(object):
+    # The points of one resolution: a timestamp and, per field, the mean (and the max once downsampled) of the samples of the bucket
+
+    def __init__(self, name, width, capacity, fields):
+        self.name = name
+        self.width = width
+        self.fields = fields
+        self.times = RingBuffer(capacity, 'd')
+        self.means = dict((field, RingBuffer(capacity)) for field in fields)
+        self.maxima = dict((field, RingBuffer(capacity)) for field in fields) if width else None
+        self.bucket = None
+        self.sums = None
+        self.peaks = None
+        self.count = 0
+
+    def add(self, timestamp, values):
+        if not self.width:
+            self.append(timestamp, values, values)
+            return
+        bucket = int(timestamp // self.width) * self.width
+        if self.bucket is not None and bucket != self.bucket:
+            self.flush()
+        if self.bucket is None:
+            self.bucket = bucket
+            self.sums = dict((field, 0.0) for field in self.fields)
+            self.peaks = dict((field, None) for field in self.fields)
+            self.count = 0
+        self.count += 1
+        for field in self.fields:
+            self.sums[field] += values[field]
+            self.peaks[field] = values[field] if self.peaks[field] is None else max(self.peaks[field], values[field])
+
+    def flush(self):
+        # Closes the current bucket, called when a sample falls in the next one
+        if self.bucket is None:
+            return
+        self.append(self.bucket, dict((field, self.sums[field] / self.count) for field in self.fields), self.peaks)
+        self.bucket = None
+
+    def append(self, timestamp, means, maxima):
+        self.times.append(timestamp)
+        for field in self.fields:
+            self.means[field].append(means[field])
+            if self.maxima is not None:
+                self.maxima[field].append(maxima[field])
+
+    def points(self):
+        # [(timestamp, {field: mean}, {field: max} or None)], the bucket in progress excluded
+        times = list(self.times)
+        means = dict((field, list(buffer)) for field, buffer in self.means.items())
+        maxima = dict((field, list(buffer)) for field, buffer in self.maxima.items()) if self.maxima is not None else None
+        return [(timestamp,
+                 dict((field, means[field][index]) for field in self.fields),
+                 dict((field, maxima[field][index]) for field in self.fields) if maxima is not None else None)
+                for index, timestamp in enumerate(times)]
+
+    def dump(self):
+        state = dict(
+            times=self.times.dump(),
+            means=dict((field, buffer.dump()) for field, buffer in self.means.items()),
+        )
+        if self.maxima is not None:
+            state['maxima'] = dict((field, buffer.dump()) for field, buffer in self.maxima.items())
+        if self.bucket is not None:
+            state['bucket'] = dict(start=self.bucket, sums=self.sums, peaks=self.peaks, count=self.count)
+        return state
+
+    def load(self, state, byteorder):
+        self.times.load(state['times'], byteorder)
+        for field in self.fields:
+            self.means[field].load(state['means'][field], byteorder)
+            if self.maxima is not None:
+                self.maxima[field].load(state['maxima'][field], byteorder)
+        bucket = state.get('bucket')
+        if bucket and self.width:
+            self.bucket, self.sums, self.peaks, self.count = bucket['start'], bucket['sums'], bucket['peaks'], bucket['count']
+
+
+class TieredSeries(object):
+    # A series of samples kept at several resolutions, memory is bounded by the tier capacities whatever the number of samples
+
+    def __init__(self, fields, tiers=DEFAULT_TIERS):
+        self.fields = tuple(fields)
+        self.tiers = [Tier(name, width, capacity, self.fields) for name, width, capacity in tiers]
+        self.updated = None
+
+    def add(self, timestamp, values):
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+        self.updated = timestamp
+
+    def tier(self, name):
+        return next(tier for tier in self.tiers if tier.name == name)
+
+    def last(self):
+        raw = self.tiers[0]
+        if not len(raw.times):
+            return None
+        return raw.times.last(), dict((field, raw.means[field].last()) for field in self.fields)
+
+    def retention(self):
+        return max(tier.width * tier.times.capacity for tier in self.tiers)
+
+
+class SeriesStore(object):
+    # TieredSeries keyed by name (eg. a server), persisted to a single JSON file (arrays encoded in base64).
+    # A series not updated for longer than the longest tier retention is dropped, so the store stays bounded
+    # when the keys change over time (servers removed from QEM).
+
+    def __init__(self, path, fields, tiers=DEFAULT_TIERS):
+        self.path = expanduser(path) if path else None
+        self.fields = tuple(fields)
+        self.tiers = tuple(tuple(tier) for tier in tiers)
+        self.series = dict()
+        self.lock = threading.Lock()
+
+    def add(self, key, timestamp, values):
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = TieredSeries(self.fields, self.tiers)
+                self.series[key] = series
+            series.add(timestamp, values)
+
+    def prune(self, now=None):
+        now = now or time.time()
+        with self.lock:
+            for key in [key for key, series in self.series.items() if series.updated is not None and now - series.updated > series.retention()]:
+                del self.series[key]
+
+    def load(self):
+        # Restores the persisted series, a store written with other fields or tiers is ignored
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path) as store_file:
+            state = json.load(store_file)
+        if state.get('format') != STORE_FORMAT or tuple(state['fields']) != self.fields \
+                or tuple(tuple(tier) for tier in state['tiers']) != self.tiers:
+            return False
+        with self.lock:
+            self.series = dict()
+            for key, series_state in state['series'].items():
+                series = TieredSeries(self.fields, self.tiers)
+                for tier in series.tiers:
+                    tier.load(series_state['tiers'][tier.name], state['byteorder'])
+                series.updated = series_state['updated']
+                self.series[key] = series
+        return True
+
+    def save(self):
+        with self.lock:
+            state = dict(
+                format=STORE_FORMAT,
+                byteorder=sys.byteorder,
+                fields=list(self.fields),
+                tiers=[list(tier) for tier in self.tiers],
+                series=dict((key, dict(updated=series.updated, tiers=dict((tier.name, tier.dump()) for tier in series.tiers)))
+                            for key, series in self.series.items())
+            )
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        handle, tmp_path = tempfile.mkstemp(dir=directory or '.')
+        with os.fdopen(handle, 'w') as store_file:
+            json.dump(state, store_file)
+        os.rename(tmp_path, self.path)
+
+    def to_prometheus(self, prefix, label='server'):
+        # The latest raw value of each field, in the Prometheus text exposition format
+        lines = []
+        with self.lock:
+            latest = sorted((key, series.last()) for key, series in self.series.items() if series.last() is not None)
+        for field in self.fields:
+            metric = '{0}_{1}'.format(prefix, field)
+            lines.append('# TYPE {0} gauge'.format(metric))
+            for key, (timestamp, values) in latest:
+                lines.append('{0}{{{1}="{2}"}} {3} {4}'.format(
+                    metric, label, key.replace('\\', '\\\\').replace('"', '\\"'), format_value(values[field]), int(timestamp * 1000)))
+        return '\n'.join(lines) + '\n'
+
+    def to_csv(self, output, tier_name, label='server'):
+        # One row per point of the tier: time, key, then the mean (and max) of each field
+        import csv
+        writer = csv.writer(output)
+        downsampled = dict((name, width) for name, width, capacity in self.tiers)[tier_name] > 0
+        header = ['time', label] + list(self.fields)
+        if downsampled:
+            header += ['{0}_max'.format(field) for field in self.fields]
+        writer.writerow(header)
+        with self.lock:
+            rows = []
+            for key, series in sorted(self.series.items()):
+                for timestamp, means, maxima in series.tier(tier_name).points():
+                    row = [time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp)), key] + [format_value(means[field]) for field in self.fields]
+                    if downsampled:
+                        row += [format_value(maxima[field]) for field in self.fields]
+                    rows.append(row)
+        writer.writerows(rows)
+
+
+def format_value(value):
+    # Integral values are written as integers (1048576, not 1.04858e+06), the others with all their digits
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
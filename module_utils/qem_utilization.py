@@ -0,0 +1,99 @@
+import random
+import time
+from ansible.module_utils.aem_client import AemServerState
+from ansible.module_utils.qem_parallel import run_parallel
+from ansible.module_utils.qem_timeseries import DEFAULT_TIERS, SeriesStore
+
+UTILIZATION_FIELDS = (
+    'attunity_cpu_percentage',
+    'machine_cpu_percentage',
+    'memory_mb',
+    'disk_usage_mb',
+    'tasks_total',
+    'tasks_running',
+    'tasks_stopped',
+    'tasks_recovering',
+    'tasks_error',
+)
+
+DEFAULT_UTILIZATION_STORE = '~/.qem/utilization.json'
+
+
+def utilization_values(server_details):
+    # AemServerUtilization and AemTasksSummary of a get_server_details answer, flattened to UTILIZATION_FIELDS
+    utilization = server_details.resource_utilization
+    summary = server_details.task_summary
+    return dict(
+        attunity_cpu_percentage=utilization.attunity_cpu_percentage,
+        machine_cpu_percentage=utilization.machine_cpu_percentage,
+        memory_mb=utilization.memory_mb,
+        disk_usage_mb=utilization.disk_usage_mb,
+        tasks_total=summary.total,
+        tasks_running=summary.running,
+        tasks_stopped=summary.stopped,
+        tasks_recovering=summary.recovering,
+        tasks_error=summary.error,
+    )
+
+
+class UtilizationSampler(object):
+    # Samples the utilization of every monitored server into a SeriesStore every interval seconds.
+    # Each server call starts at a random offset (up to jitter * interval) in the round so QEM does not get all the calls at once,
+    # the calls are submitted to the workers at their offset and no worker sleeps.
+
+    def __init__(self, aem_client, store, interval=60, jitter=0.2, parallelism=8, servers=None):
+        self.aem_client = aem_client
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.parallelism = parallelism
+        self.servers = servers
+        self.errors = dict()
+
+    def monitored_servers(self):
+        if self.servers:
+            return list(self.servers)
+        return [server_info.name for server_info in self.aem_client.get_server_list().serverList
+                if server_info.state == AemServerState.MONITORED]
+
+    def sample(self, server):
+        details = self.aem_client.get_server_details(server).server_details
+        return time.time(), utilization_values(details)
+
+    def sample_once(self):
+        # One round over the servers, returns the number of servers sampled
+        servers = self.monitored_servers()
+        offsets = dict((server, random.uniform(0, self.jitter * self.interval)) for server in servers)
+        outcomes = run_parallel(self.sample, servers, self.parallelism, offsets=offsets)
+        self.errors = dict((server, outcome['error']) for server, outcome in outcomes.items() if outcome['error'] is not None)
+        for server, outcome in outcomes.items():
+            if outcome['error'] is None:
+                timestamp, values = outcome['result']
+                self.store.add(server, timestamp, values)
+        self.store.prune()
+        return len(outcomes) - len(self.errors)
+
+    def run(self, rounds=None, persist_every=1, log=None):
+        # Samples until rounds are done (forever if None), the store is saved every persist_every rounds and at the end
+        log = log or (lambda msg: None)
+        done = 0
+        try:
+            while rounds is None or done < rounds:
+                start = time.time()
+                try:
+                    sampled = self.sample_once()
+                    log('sampled {0} servers{1}'.format(sampled, ', errors: {0}'.format(self.errors) if self.errors else ''))
+                except Exception as ex:
+                    log('sampling failed: {0}'.format(getattr(ex, 'message', None) or ex))
+                done += 1
+                if self.store.path and done % persist_every == 0:
+                    self.store.save()
+                if rounds is None or done < rounds:
+                    time.sleep(max(0, self.interval - (time.time() - start)))
+        finally:
+            if self.store.path:
+                self.store.save()
+
+
+def utilization_store(path=DEFAULT_UTILIZATION_STORE, tiers=DEFAULT_TIERS):
+    return SeriesStore(path, UTILIZATION_FIELDS, tiers)
@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from ansible.module_utils.aem_client import AemTaskState
+from ansible.module_utils.qem_parallel import run_parallel
+
+# A target is reached when the predicate is true, a task in a terminal state for the target stops being waited for
+TARGET_STATES = dict(
+    running=(lambda state: state == AemTaskState.RUNNING, (AemTaskState.ERROR,)),
+    stopped=(lambda state: state == AemTaskState.STOPPED, (AemTaskState.ERROR,)),
+    not_recovering=(lambda state: state != AemTaskState.RECOVERY, ()),
+)
+
+
+class TaskStateWaiter(object):
+    # Waits for many tasks to reach their target state with one get_task_list call per server and per round,
+    # whatever the number of tasks. The interval grows while nothing changes and goes back to initial_interval
+    # as soon as a task state changes, the whole wait never exceeds timeout.
+
+    def __init__(self, aem_client, timeout=60, initial_interval=0.5, max_interval=10, backoff=1.5, parallelism=8):
+        self.aem_client = aem_client
+        self.timeout = timeout
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.parallelism = parallelism
+
+    def wait(self, targets, initial_states=None):
+        # targets: {(server, task): target name}, initial_states: {(server, task): AemTaskState name before the start/stop}
+        # A task still in its initial state is not considered in a terminal state (eg. ERROR just after a start request).
+        # Returns {(server, task): dict(state, reached, elapsed, error)}, state being the last observed AemTaskState name
+        start = time.time()
+        deadline = start + self.timeout
+        initial_states = initial_states or dict()
+        results = OrderedDict((key, dict(state=None, reached=False, elapsed=None, error=None)) for key in targets)
+        moved = set()
+        pending = set(targets)
+        interval = self.initial_interval
+        server_errors = dict()
+        polls = 0
+        while pending:
+            servers = sorted(set(server for server, task in pending))
+            listings = run_parallel(lambda server: self.aem_client.get_task_list(server).taskList, servers, self.parallelism)
+            polls += 1
+            now = time.time()
+            progress = False
+            for server, outcome in listings.items():
+                if outcome['error'] is not None:
+                    # transient failures are retried on the next round, the last one is reported if the deadline expires
+                    server_errors[server] = outcome['error']
+                    continue
+                server_errors.pop(server, None)
+                states = dict((task.name, task.state) for task in outcome['result'])
+                for key in [key for key in pending if key[0] == server]:
+                    result = results[key]
+                    state = states.get(key[1])
+                    if state is None:
+                        result.update(error='Task "{0}" not found on server "{1}"'.format(key[1], server), elapsed=now - start)
+                        pending.discard(key)
+                        continue
+                    if result['state'] != state.name:
+                        progress = True
+                    if state.name != initial_states.get(key):
+                        moved.add(key)
+                    result['state'] = state.name
+                    reached, terminal_states = TARGET_STATES[targets[key]]
+                    if reached(state) or (state in terminal_states and key in moved):
+                        result.update(reached=reached(state), elapsed=now - start)
+                        pending.discard(key)
+            if not pending or now >= deadline:
+                break
+            interval = self.initial_interval if progress else min(interval * self.backoff, self.max_interval)
+            time.sleep(min(interval, deadline - now))
+        for key in pending:
+            results[key].update(elapsed=time.time() - start, error=server_errors.get(key[0]))
+        self.polls = polls
+        return results
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import time
+from os.path import expanduser
+from ansible.module_utils.qem_parallel import run_parallel
+
+DEFAULT_WATCH_SNAPSHOT = '~/.qem/task_states.json'
+
+# The AemTaskInfo attributes whose changes are reported
+WATCHED_FIELDS = ('state', 'stop_reason', 'message')
+
+
+def task_snapshot(task_info):
+    return dict(state=task_info.state.name, stop_reason=task_info.stop_reason.name, message=task_info.message or '')
+
+
+def diff_tasks(server, previous, current, now):
+    # The transitions between two snapshots of a server ({task: task_snapshot}), as event dicts
+    events = []
+    for name in sorted(set(previous) | set(current)):
+        before, after = previous.get(name), current.get(name)
+        if before == after:
+            continue
+        if before is None:
+            event = dict(event='added', changes=dict((field, [None, after[field]]) for field in WATCHED_FIELDS))
+        elif after is None:
+            event = dict(event='removed', changes=dict((field, [before[field], None]) for field in WATCHED_FIELDS))
+        else:
+            event = dict(event='changed', changes=dict((field, [before[field], after[field]]) for field in WATCHED_FIELDS
+                                                       if before[field] != after[field]))
+        event.update(time=now, server=server, task=name, state=(after or before)['state'])
+        events.append(event)
+    return events
+
+
+class TaskWatcher(object):
+    # Keeps the last task snapshot of each server and reports only the transitions (state, stop reason, message).
+    # Each server is polled at its own interval: halved (down to min_interval) when its tasks changed,
+    # grown by backoff (up to max_interval) when they did not, so busy servers are followed closely and quiet ones cost little.
+    # With snapshot_path, the snapshots are persisted: after a restart the changes that happened meanwhile are reported,
+    # a server seen for the first time only records its baseline.
+
+    def __init__(self, aem_client, servers, snapshot_path=None, min_interval=5, max_interval=120, backoff=1.5, parallelism=8):
+        self.aem_client = aem_client
+        self.servers = list(servers)
+        self.snapshot_path = expanduser(snapshot_path) if snapshot_path else None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.parallelism = parallelism
+        self.snapshots = dict()
+        self.errors = dict()
+        self.intervals = dict((server, min_interval) for server in self.servers)
+        self.next_polls = dict((server, 0) for server in self.servers)
+        self.polls = 0
+        self.load()
+
+    def load(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path) as snapshot_file:
+            self.snapshots = json.load(snapshot_file).get('servers', dict())
+
+    def save(self):
+        if not self.snapshot_path:
+            return
+        directory = os.path.dirname(self.snapshot_path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        handle, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'w') as snapshot_file:
+            json.dump(dict(saved=time.time(), servers=self.snapshots), snapshot_file)
+        os.rename(tmp_path, self.snapshot_path)
+
+    def poll(self, servers=None):
+        # Polls servers (the due ones by default) concurrently, returns the events in server order
+        now = time.time()
+        servers = servers if servers is not None else [server for server in self.servers if self.next_polls[server] <= now]
+        if not servers:
+            return []
+        outcomes = run_parallel(lambda server: self.aem_client.get_task_list(server).taskList, servers, self.parallelism)
+        self.polls += 1
+        now = time.time()
+        events = []
+        for server, outcome in outcomes.items():
+            if outcome['error'] is not None:
+                if self.errors.get(server) != outcome['error']:
+                    events.append(dict(event='server_error', time=now, server=server, message=outcome['error']))
+                self.errors[server] = outcome['error']
+                self.schedule(server, now, changed=False)
+                continue
+            if server in self.errors:
+                del self.errors[server]
+                events.append(dict(event='server_recovered', time=now, server=server))
+            current = dict((task.name, task_snapshot(task)) for task in outcome['result'])
+            previous = self.snapshots.get(server)
+            server_events = diff_tasks(server, previous, current, now) if previous is not None else []
+            self.snapshots[server] = current
+            events.extend(server_events)
+            self.schedule(server, now, changed=bool(server_events))
+        return events
+
+    def schedule(self, server, now, changed):
+        interval = self.intervals[server]
+        interval = max(self.min_interval, interval / 2.0) if changed else min(self.max_interval, interval * self.backoff)
+        self.intervals[server] = interval
+        self.next_polls[server] = now + interval
+
+    def watch(self, emit, duration=None):
+        # Calls emit(event) for every transition until duration seconds elapsed (forever if None), the snapshot
+        # is saved after every poll reporting events and at the end
+        deadline = time.time() + duration if duration is not None else None
+        try:
+            while True:
+                events = self.poll()
+                for event in events:
+                    emit(event)
+                if events:
+                    self.save()
+                now = time.time()
+                if deadline is not None and now >= deadline:
+                    return
+                wake = min(self.next_polls.values())
+                if deadline is not None:
+                    wake = min(wake, deadline)
+                time.sleep(max(0, wake - now))
+        finally:
+            self.save()
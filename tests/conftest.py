@@ -0,0 +1,37 @@
+# Behaviour tests of the role code against the local QEM stand-in (tools/qem_standin.py), ansible and pytest are required:
+#
+#   python -m pytest tests
+#
+# The role module_utils are registered as ansible.module_utils.* as for the controller side plugins, the stand-in fixtures
+# (qem_standin, qem_standin_options, qem_client) come from the qem_standin pytest plugin.
+
+import os
+import runpy
+import sys
+
+import pytest
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROLE_DIR, 'tools'))
+runpy.run_path(os.path.join(ROLE_DIR, 'module_utils', 'qem_paths.py'))
+
+pytest_plugins = ['qem_standin']
+
+
+@pytest.fixture(autouse=True)
+def qem_home(tmp_path, monkeypatch):
+    # The modules keep their caches and stores under ~/.qem, each test gets its own home
+    monkeypatch.setenv('HOME', str(tmp_path))
+    for name in ('QEM_BROKER', 'QEM_CIRCUIT_FAILURES', 'QEM_HEDGED_READS', 'QEM_PROFILE'):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def run_qem_module(qem_standin):
+    # Runs a library module in the test process, as the action plugins do, with the credentials of the stand-in
+    from ansible.module_utils.qem_action import load_module_class, run_module
+
+    def run(module_name, **params):
+        return run_module(load_module_class(module_name), params)
+    return run
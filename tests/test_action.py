@@ -0,0 +1,73 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from ansible.module_utils.qem_action import no_log_values
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = 'server-000'
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=2, tasks=4)
+
+
+@pytest.fixture
+def broker_socket(monkeypatch):
+    # The broker started by the playbook exits 2s after its last request
+    directory = tempfile.mkdtemp(prefix='qem-broker-')
+    monkeypatch.setenv('QEM_BROKER_SOCKET', os.path.join(directory, 'broker.sock'))
+    monkeypatch.setenv('QEM_BROKER_IDLE_TIMEOUT', '2')
+    yield os.path.join(directory, 'broker.sock')
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_playbook(tmp_path, tasks, **environment):
+    path = tmp_path / 'playbook.yml'
+    path.write_text(u'- hosts: localhost\n  connection: local\n  gather_facts: false\n  tasks:\n' + u''.join(
+        u'  - qem_task_status: {{name: task-0000{0}, server: {1}, state: started}}\n'.format(index % 4, SERVER) for index in range(tasks)))
+    env = dict(os.environ, ANSIBLE_ACTION_PLUGINS=os.path.join(ROLE_DIR, 'action_plugins'), ANSIBLE_LIBRARY=os.path.join(ROLE_DIR, 'library'),
+               ANSIBLE_MODULE_UTILS=os.path.join(ROLE_DIR, 'module_utils'), **environment)
+    process = subprocess.Popen([sys.executable, '-m', 'ansible.cli.playbook', '-i', 'localhost,', str(path)], env=env,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0].decode('utf-8')
+    assert process.returncode == 0, output
+    return output
+
+
+def test_tasks_of_a_play_share_one_session(qem_standin, broker_socket, tmp_path):
+    sessions = len(qem_standin.sessions)
+
+    run_playbook(tmp_path, 6)
+
+    assert len(qem_standin.sessions) == sessions + 1
+    assert qem_standin.fleet.requests['get_task_list'] == 6
+
+
+def test_tasks_log_in_once_each_without_the_broker(qem_standin, broker_socket, tmp_path):
+    sessions = len(qem_standin.sessions)
+
+    run_playbook(tmp_path, 3, QEM_BROKER='no')
+
+    assert len(qem_standin.sessions) == sessions + 3
+    assert not os.path.exists(broker_socket)
+
+
+def test_no_log_parameters_are_masked(qem_standin, run_qem_module):
+    result = run_qem_module('qem_task_info', server=SERVER, name='task-00001', qem_password='standin')
+
+    assert result['invocation']['module_args']['qem_password'] == 'VALUE_SPECIFIED_IN_NO_LOG_PARAMETER'
+
+
+def test_no_log_values_without_the_validation_attribute():
+    argument_spec = dict(password=dict(no_log=True), user=dict())
+
+    class ValidationResult(object):
+        validated_parameters = dict(password='secret', user='admin')
+
+    assert no_log_values(argument_spec, ValidationResult()) == set(['secret'])
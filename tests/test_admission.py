@@ -0,0 +1,89 @@
+import pytest
+
+from ansible.module_utils.aem_client import AemRunTaskReq
+from ansible.module_utils.qem_admission import AdmissionController, AdmissionTimeout
+
+SERVER = 'server-000'
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=2, tasks=8)
+
+
+def stop_tasks(qem_standin, running=2):
+    # The first running tasks of SERVER run, the others are stopped; returns the names of the stopped ones
+    with qem_standin.fleet.lock:
+        tasks = list(qem_standin.fleet.servers[SERVER]['tasks'].values())
+        for index, task in enumerate(tasks):
+            task.update(state='RUNNING' if index < running else 'STOPPED', stop_reason='NONE' if index < running else 'NORMAL',
+                        message='', pending=None)
+        return [task['name'] for task in tasks[running:]]
+
+
+def test_starts_are_admitted_below_the_running_threshold(qem_standin, qem_client):
+    stopped = stop_tasks(qem_standin, running=2)
+    admission = AdmissionController(qem_client, [SERVER], max_running=4, interval=0.1, burst=4, timeout=0.5)
+
+    with admission:
+        for name in stopped[:2]:
+            assert admission.admit(SERVER) < 0.5
+            qem_client.run_task(AemRunTaskReq(), SERVER, name)
+        with pytest.raises(AdmissionTimeout) as error:
+            admission.admit(SERVER)
+
+    assert 'running 4 >= 4' in str(error.value)
+    assert admission.report()['servers'][SERVER]['load']['running'] == 4
+
+
+def test_burst_bounds_the_starts_between_two_samples(qem_standin, qem_client):
+    stop_tasks(qem_standin)
+    # no new sample during the test: only the burst is admitted, whatever the thresholds
+    admission = AdmissionController(qem_client, [SERVER], max_running=100, interval=60, burst=2, timeout=0.2)
+
+    with admission:
+        admission.admit(SERVER)
+        admission.admit(SERVER)
+        with pytest.raises(AdmissionTimeout) as error:
+            admission.admit(SERVER)
+
+    assert '(burst)' in str(error.value)
+    assert admission.report()['samples'] == 1
+
+
+def test_starts_wait_for_the_next_sample(qem_standin, qem_client):
+    stop_tasks(qem_standin)
+    admission = AdmissionController(qem_client, [SERVER], max_running=100, interval=0.2, burst=1, timeout=2)
+
+    with admission:
+        assert admission.admit(SERVER) < 0.1
+        # the budget is given back by the next sample
+        assert admission.admit(SERVER) >= 0.1
+
+    assert admission.report()['samples'] >= 2
+
+
+def test_server_failing_the_sampling_admits_nothing(qem_standin, qem_client):
+    # QEM answers the details of a disconnected server, a server it does not know fails the sampling
+    admission = AdmissionController(qem_client, ['no-such-server', 'server-001'], max_running=100, interval=0.1, timeout=0.3)
+
+    with admission:
+        admission.admit('server-001')
+        with pytest.raises(AdmissionTimeout) as error:
+            admission.admit('no-such-server')
+
+    assert 'sampling failed' in str(error.value)
+    assert admission.report()['servers']['no-such-server']['error']
+
+
+def test_bulk_start_is_throttled_by_the_admission(qem_standin, run_qem_module):
+    stopped = stop_tasks(qem_standin, running=2)
+
+    result = run_qem_module('qem_task_status', server=SERVER, names=stopped[:3], state='started',
+                            max_running_tasks=4, sample_interval=1, admission_timeout=2, timeout=5)
+
+    assert result['failed']
+    assert result['summary']['changed'] == 2
+    assert result['summary']['failed'] == 1
+    assert result['admission']['servers'][SERVER]['load']['running'] == 4
+    assert sum(1 for task in qem_standin.fleet.servers[SERVER]['tasks'].values() if task['state'] == 'RUNNING') == 4
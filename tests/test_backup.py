@@ -0,0 +1,113 @@
+import copy
+import json
+import os
+
+import pytest
+
+SERVERS = ['server-000', 'server-001']
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=2, tasks=5)
+
+
+@pytest.fixture
+def backup(run_qem_module, tmp_path):
+    dest = str(tmp_path / 'backups')
+
+    def run(**params):
+        return run_qem_module('qem_backup', dest=dest, **params)
+    run.dest = dest
+    return run
+
+
+def manifest(dest, snapshot):
+    with open(os.path.join(dest, 'manifests', '{0}.json'.format(snapshot))) as manifest_file:
+        return json.load(manifest_file)
+
+
+def objects(dest):
+    return sum(len(files) for directory, directories, files in os.walk(os.path.join(dest, 'objects')))
+
+
+def test_unchanged_fleet_writes_no_snapshot(qem_standin, backup):
+    result = backup(server='all')
+    assert result['changed']
+    assert sorted(result['servers']) == SERVERS
+    stored = objects(backup.dest)
+
+    result = backup(server='all')
+    assert not result['changed']
+    assert objects(backup.dest) == stored
+    assert len(os.listdir(os.path.join(backup.dest, 'manifests'))) == 1
+
+
+def test_changed_task_is_the_only_object_written(qem_standin, backup):
+    first = backup(server='all')['snapshot']
+    stored = objects(backup.dest)
+    with qem_standin.fleet.lock:
+        task = qem_standin.fleet.servers['server-000']['tasks']['task-00002']
+        definition = copy.deepcopy(qem_standin.fleet.task_definition(task))
+        definition['task_settings']['target_settings']['max_transaction_size'] = 4096
+        task['definition'] = definition
+
+    result = backup(server='all')
+
+    assert result['changed']
+    assert result['servers']['server-000']['written'] == 1
+    assert result['servers']['server-001']['written'] == 0
+    assert objects(backup.dest) == stored + 1
+    previous, latest = manifest(backup.dest, first), manifest(backup.dest, result['snapshot'])
+    changed = [name for name, digest in latest['servers']['server-000']['tasks'].items()
+               if previous['servers']['server-000']['tasks'][name] != digest]
+    assert changed == ['task-00002']
+
+
+def test_servers_not_backed_up_stay_in_the_latest_snapshot(qem_standin, backup):
+    backup(server='all')
+    with qem_standin.fleet.lock:
+        del qem_standin.fleet.servers['server-001']['tasks']['task-00000']
+    qem_standin.fleet.down.add('server-000')
+
+    result = backup(server='all')
+
+    # server-000 failed, its entry of the previous snapshot is kept
+    assert result['failed']
+    assert list(result['errors']) == ['server-000']
+    latest = manifest(backup.dest, result['snapshot'])
+    assert sorted(latest['servers']) == SERVERS
+    assert len(latest['servers']['server-000']['tasks']) == 5
+    assert len(latest['servers']['server-001']['tasks']) == 4
+
+
+def test_restore_imports_the_tasks_of_a_snapshot(qem_standin, backup):
+    snapshot = backup(server='all')['snapshot']
+    with qem_standin.fleet.lock:
+        saved = copy.deepcopy(qem_standin.fleet.task_definition(qem_standin.fleet.servers['server-000']['tasks']['task-00003']))
+        del qem_standin.fleet.servers['server-000']['tasks']['task-00003']
+
+    result = backup(state='restore', server='server-000', tasks=['task-00003'], snapshot=snapshot)
+
+    assert result['changed']
+    assert result['restored'] == [dict(server='server-000', task='task-00003', target_server='server-000')]
+    assert qem_standin.fleet.task_definition(qem_standin.fleet.servers['server-000']['tasks']['task-00003']) == saved
+
+
+def test_restore_to_another_server(qem_standin, backup):
+    backup(server='server-000')
+
+    result = backup(state='restore', server='server-000', target_server='server-001')
+
+    assert result['changed']
+    assert len(result['restored']) == 5
+    assert result['errors'] == dict()
+    assert qem_standin.fleet.requests['import_task'] == 5
+
+
+def test_restore_rejects_unknown_names(qem_standin, backup):
+    backup(server='server-000')
+
+    assert 'Servers not in snapshot' in backup(state='restore', server='server-001')['msg']
+    assert 'Tasks not in snapshot' in backup(state='restore', server='server-000', tasks=['no-such-task'])['msg']
+    assert 'not found' in backup(state='restore', snapshot='19700101T000000Z')['msg']
@@ -0,0 +1,105 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+from ansible.module_utils.aem_client import AemClientException
+from ansible.module_utils.qem_broker import QemBroker, create_broker_client, is_broker_alive
+from ansible.module_utils.qem_parallel import run_parallel
+
+SERVER = 'server-000'
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=4, tasks=5, latency=0.1)
+
+
+@pytest.fixture
+def broker_socket():
+    # A broker served by a thread of the test process, it exits after 1s without connection.
+    # The socket lives in a short directory: the length of a Unix socket path is limited.
+    directory = tempfile.mkdtemp(prefix='qem-broker-')
+    socket_path = os.path.join(directory, 'broker.sock')
+    thread = threading.Thread(target=QemBroker(socket_path, idle_timeout=1, pool_size=4).serve)
+    thread.daemon = True
+    thread.start()
+    deadline = time.time() + 5
+    while not is_broker_alive(socket_path) and time.time() < deadline:
+        time.sleep(0.01)
+    yield socket_path
+    thread.join(10)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def credentials(qem_standin):
+    environment = qem_standin.environment()
+    return dict(qem_hostname=environment['QEM_HOSTNAME'], qem_domain=environment['QEM_DOMAIN'],
+                qem_username=environment['QEM_USERNAME'], qem_password=environment['QEM_PASSWORD'], qem_verify_certificate=False)
+
+
+def test_socket_is_private(broker_socket):
+    assert stat.S_IMODE(os.stat(broker_socket).st_mode) == 0o600
+
+
+def test_module_runs_share_the_logged_in_clients(qem_standin, broker_socket, credentials):
+    sessions = len(qem_standin.sessions)
+
+    for run in range(3):
+        aem_client = create_broker_client(credentials, broker_socket)
+        assert len(aem_client.get_task_list(SERVER).taskList) == 5
+        aem_client.attclient.close()
+
+    assert len(qem_standin.sessions) == sessions + 1
+
+
+def test_concurrent_requests_are_served_by_the_pool(qem_standin, broker_socket, credentials):
+    aem_client = create_broker_client(credentials, broker_socket)
+    servers = list(qem_standin.fleet.servers)
+    start = time.time()
+
+    outcomes = run_parallel(lambda server: aem_client.get_task_list(server), servers, len(servers))
+
+    # 4 requests of 100ms served by 4 pooled clients, plus their logins
+    assert all(outcome['error'] is None for outcome in outcomes.values())
+    assert time.time() - start < 2 * 0.1 + 0.15
+    aem_client.attclient.close()
+
+
+def test_expired_sessions_are_renewed(qem_standin, broker_socket, credentials):
+    aem_client = create_broker_client(credentials, broker_socket)
+    aem_client.get_task_list(SERVER)
+    qem_standin.expire_sessions()
+
+    assert len(aem_client.get_task_list(SERVER).taskList) == 5
+    assert len(qem_standin.sessions) == 1
+    aem_client.attclient.close()
+
+
+def test_qem_errors_are_forwarded(qem_standin, broker_socket, credentials):
+    aem_client = create_broker_client(credentials, broker_socket)
+
+    with pytest.raises(AemClientException) as error:
+        aem_client.get_task_list('no-such-server')
+
+    assert error.value.error_code == 'AEM_SERVER_NOT_FOUND'
+    # the connection is still usable
+    assert len(aem_client.get_task_list(SERVER).taskList) == 5
+    aem_client.attclient.close()
+
+
+def test_modules_use_the_broker_when_enabled(qem_standin, broker_socket, run_qem_module, monkeypatch):
+    monkeypatch.setenv('QEM_BROKER', 'true')
+    monkeypatch.setenv('QEM_BROKER_SOCKET', broker_socket)
+    sessions = len(qem_standin.sessions)
+
+    for run in range(3):
+        result = run_qem_module('qem_task_info', server=SERVER, name='task-00001')
+        assert [task['name'] for task in result['qem_tasks']] == ['task-00001']
+
+    assert len(qem_standin.sessions) == sessions + 1
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from ansible.module_utils.aem_client import AemClientException
+from ansible.module_utils.qem_circuit import CircuitBreakerClient, CircuitOpenError, is_server_failure
+
+DOWN = 'server-001'
+
+
+def test_consecutive_failures_open_the_circuit(qem_standin, qem_client):
+    qem_standin.fleet.down.add(DOWN)
+    client = CircuitBreakerClient(qem_client, failure_threshold=2, reset_timeout=60)
+
+    for attempt in range(2):
+        with pytest.raises(AemClientException) as error:
+            client.get_task_list(DOWN)
+        assert error.value.error_code == 'AEM_SERVER_NOT_CONNECTED'
+    sent = qem_standin.fleet.requests['get_task_list']
+
+    # the calls now fail without reaching QEM, the other servers are not affected
+    with pytest.raises(CircuitOpenError):
+        client.get_task_list(DOWN)
+    assert qem_standin.fleet.requests['get_task_list'] == sent
+    assert client.get_task_list('server-000').taskList
+    report = client.report()
+    assert list(report) == [DOWN]
+    assert report[DOWN]['state'] == 'open'
+    assert report[DOWN]['rejected'] == 1
+
+
+def test_server_list_in_error_trips_the_circuit(qem_standin, qem_client):
+    qem_standin.fleet.down.add(DOWN)
+    client = CircuitBreakerClient(qem_client, failure_threshold=5, reset_timeout=60)
+
+    client.get_server_list()
+
+    with pytest.raises(CircuitOpenError) as error:
+        client.get_task_list(DOWN)
+    assert 'server state is ERROR' in error.value.message
+    assert qem_standin.fleet.requests['get_task_list'] == 0
+    # the server details are answered by QEM itself and never blocked
+    assert client.get_server_details(DOWN).server_details.state.name == 'ERROR'
+
+
+def test_probe_closes_the_circuit_once_the_server_is_back(qem_standin, qem_client):
+    qem_standin.fleet.down.add(DOWN)
+    client = CircuitBreakerClient(qem_client, failure_threshold=1, reset_timeout=0.2)
+    with pytest.raises(AemClientException):
+        client.get_task_list(DOWN)
+
+    # still down when probed: the circuit opens again
+    time.sleep(0.3)
+    with pytest.raises(CircuitOpenError):
+        client.get_task_list(DOWN)
+
+    qem_standin.fleet.down.discard(DOWN)
+    time.sleep(0.3)
+    assert client.get_task_list(DOWN).taskList
+    assert client.breaker(DOWN).state == 'closed'
+    assert client.breaker(DOWN).metrics['probes'] == 2
+
+
+def test_answers_of_a_live_server_do_not_count(qem_standin, qem_client):
+    client = CircuitBreakerClient(qem_client, failure_threshold=1, reset_timeout=60)
+
+    for attempt in range(3):
+        with pytest.raises(AemClientException) as error:
+            client.get_task_details('server-000', 'no-such-task')
+        assert error.value.error_code == 'AEM_TASK_NOT_FOUND'
+    assert client.breaker('server-000').state == 'closed'
+    assert not is_server_failure(KeyError('bug'))
+    assert is_server_failure(Exception('Http Error: Bad Gateway'))
+
+
+def test_modules_report_the_circuits(qem_standin, run_qem_module, monkeypatch):
+    monkeypatch.setenv('QEM_CIRCUIT_FAILURES', '1')
+    qem_standin.fleet.down.add(DOWN)
+
+    result = run_qem_module('qem_task_status', server=DOWN, names=['task-00000'], state='started')
+
+    assert result['failed']
+    assert 'AEM_SERVER_NOT_CONNECTED' in result['msg']
+    assert result['circuit_breakers'][DOWN]['state'] == 'open'
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+SERVER = 'server-000'
+
+
+def endpoint_definition(name, role):
+    return dict(name=name, role=role, is_licensed=True,
+                type_id='ORACLE_COMPONENT_TYPE' if role == 'SOURCE' else 'KAFKA_COMPONENT_TYPE',
+                db_settings={'$type': 'OracleSettings' if role == 'SOURCE' else 'KafkaSettings'},
+                override_properties=dict())
+
+
+def server_content(qem_standin):
+    with qem_standin.fleet.lock:
+        server = qem_standin.fleet.servers[SERVER]
+        return set(server['tasks']), set(server['endpoints'])
+
+
+@pytest.mark.parametrize('sources, targets, max_targets, carriers', [
+    (2, 3, 2, 2),  # one source per carrier, the targets by pairs
+    (0, 3, 1, 3),  # a dummy source shared by the carriers
+    (3, 0, 1, 3),  # a dummy target shared by the carriers
+    (1, 4, 4, 1),  # everything in a single carrier
+])
+def test_bulk_import_packs_the_endpoints_into_carriers(qem_standin, run_qem_module, sources, targets, max_targets, carriers):
+    tasks_before, endpoints_before = server_content(qem_standin)
+    definitions = [endpoint_definition('new-src-{0}'.format(index), 'SOURCE') for index in range(sources)] + \
+                  [endpoint_definition('new-tgt-{0}'.format(index), 'TARGET') for index in range(targets)]
+
+    result = run_qem_module('qem_endpoint', server=SERVER, definitions=definitions, carrier_max_targets=max_targets, import_timeout=10)
+
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed']
+    assert result['carriers'] == carriers
+    assert qem_standin.fleet.requests['import_task'] == carriers
+    # the carrier tasks and the dummy endpoints are removed, only the imported endpoints are left
+    tasks_after, endpoints_after = server_content(qem_standin)
+    assert tasks_after == tasks_before
+    assert endpoints_after == endpoints_before | set(definition['name'] for definition in definitions)
+
+
+def test_single_import_uses_one_carrier(qem_standin, run_qem_module):
+    tasks_before, endpoints_before = server_content(qem_standin)
+
+    result = run_qem_module('qem_endpoint', server=SERVER, definition=json.dumps(endpoint_definition('new-src', 'SOURCE')))
+
+    assert not result.get('failed'), result.get('msg')
+    assert result['msg'] == 'endpoint imported'
+    assert qem_standin.fleet.requests['import_task'] == 1
+    assert server_content(qem_standin) == (tasks_before, endpoints_before | {'new-src'})
+
+
+def test_failed_import_cleans_up_the_carriers(qem_standin, run_qem_module):
+    tasks_before, endpoints_before = server_content(qem_standin)
+    definitions = [endpoint_definition('new-tgt-{0}'.format(index), 'TARGET') for index in range(2)]
+    # the endpoints never show up in the endpoint list: the wait expires
+    qem_standin.fleet.servers[SERVER]['endpoints'] = RefusingEndpoints(qem_standin.fleet.servers[SERVER]['endpoints'])
+
+    result = run_qem_module('qem_endpoint', server=SERVER, definitions=definitions, import_timeout=1)
+
+    assert result['failed']
+    assert 'not ready' in result['msg']
+    assert server_content(qem_standin) == (tasks_before, endpoints_before)
+
+
+class RefusingEndpoints(dict):
+    # An endpoint dictionary of the fleet ignoring the endpoints added by an import
+
+    def __setitem__(self, key, value):
+        pass
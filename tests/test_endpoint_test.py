@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from ansible.module_utils.qem_action import load_module_class
+
+SERVERS = ['server-000', 'server-001']
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=2, tasks=2, endpoints=3)
+
+
+def test_every_endpoint_of_the_servers_is_tested(qem_standin, run_qem_module):
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers['server-001']['endpoints']['src-000']['test_error'] = 'ORA-12541: TNS:no listener'
+
+    result = run_qem_module('qem_endpoint_test', server=SERVERS)
+
+    assert not result.get('failed')
+    assert len(result['endpoints']) == 6
+    failed = [endpoint for endpoint in result['endpoints'] if not endpoint['connected']]
+    assert [(endpoint['server'], endpoint['name'], endpoint['status']) for endpoint in failed] == [('server-001', 'src-000', 'ERROR')]
+    assert failed[0]['message'] == 'ORA-12541: TNS:no listener'
+    assert result['summary'] == dict(total=6, connected=5, failed=1, failures=['server-001/src-000'])
+
+    result = run_qem_module('qem_endpoint_test', server=SERVERS, fail_on_error=True)
+    assert result['failed']
+    assert result['msg'] == '1 of 6 endpoints failed the connection test'
+
+
+def test_unreachable_server_is_reported(qem_standin, run_qem_module):
+    qem_standin.fleet.down.add('server-001')
+
+    result = run_qem_module('qem_endpoint_test', server=SERVERS)
+
+    assert list(result['server_errors']) == ['server-001']
+    assert result['summary']['total'] == 3
+
+
+def test_each_test_request_has_its_own_deadline(qem_standin, run_qem_module, monkeypatch):
+    # without grace, the requests wait for the test timeout only
+    monkeypatch.setitem(load_module_class('qem_endpoint_test').test_endpoint.__globals__, 'CONNECTION_GRACE', 0)
+    qem_standin.latency = 1.5
+    start = time.time()
+
+    result = run_qem_module('qem_endpoint_test', server='server-000', endpoints=['src-000', 'tgt-000', 'tgt-001'], timeout=1, parallelism=3)
+
+    # the three tests time out concurrently after 1s, instead of waiting for the 1.5s answers
+    assert time.time() - start < 1.5
+    assert [endpoint['status'] for endpoint in result['endpoints']] == ['ERROR'] * 3
+    assert all('timed out' in endpoint['message'] for endpoint in result['endpoints'])
+
+    # the deadline is not left on the client the following module runs share
+    result = run_qem_module('qem_task_info', server='server-000')
+    assert len(result['qem_tasks']) == 2
@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+
+from ansible.module_utils.qem_definitions import task_endpoint_names
+from ansible.module_utils.qem_export import safe_file_name, split_export
+
+SERVERS = ['server-000', 'server-001']
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=2, tasks=3, endpoints=2)
+
+
+def files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory) for root, directories, names in os.walk(directory) for name in names)
+
+
+def test_servers_are_exported_once_and_only_rewritten_when_changed(qem_standin, run_qem_module, tmp_path):
+    dest = str(tmp_path / 'exports')
+
+    result = run_qem_module('qem_export', server='all', dest=dest)
+    assert result['changed']
+    assert files(dest) == ['server-000.json', 'server-001.json']
+    with open(os.path.join(dest, 'server-000.json')) as export:
+        assert len(json.load(export)['cmd.replication_definition']['tasks']) == 3
+
+    result = run_qem_module('qem_export', server='all', dest=dest)
+    assert not result['changed']
+    # the temporary files of the unchanged exports are removed
+    assert files(dest) == ['server-000.json', 'server-001.json']
+
+
+def test_task_exports_of_each_server_and_their_errors(qem_standin, run_qem_module, tmp_path):
+    dest = str(tmp_path / 'exports')
+
+    result = run_qem_module('qem_export', server=SERVERS, tasks=['task-00001', 'no-such-task'], dest=dest, with_endpoints=False)
+
+    assert result['failed']
+    assert result['msg'] == '2 of 4 exports failed'
+    assert sorted(result['errors']) == ['server-000/no-such-task', 'server-001/no-such-task']
+    assert files(dest) == ['server-000/task-00001.json', 'server-001/task-00001.json']
+    with open(os.path.join(dest, 'server-000', 'task-00001.json')) as export:
+        assert json.load(export)['cmd.replication_definition']['databases'] == []
+
+
+def test_split_files_are_the_task_and_endpoint_definitions(qem_standin, qem_client, run_qem_module, tmp_path):
+    dest = str(tmp_path / 'exports')
+
+    result = run_qem_module('qem_export', server='server-000', tasks=['task-00001'], dest=dest, split=True)
+
+    split_files = [(split_file['kind'], split_file['name']) for split_file in result['exports'][0]['files']]
+    endpoint_names = task_endpoint_names(qem_standin.fleet.task_definition(qem_standin.fleet.servers['server-000']['tasks']['task-00001']))
+    assert split_files == [('task', 'task-00001')] + [('endpoint', name) for name in endpoint_names]
+    task_path = os.path.join(dest, 'server-000', 'tasks', 'task-00001.json')
+    with open(task_path) as task_file:
+        assert json.load(task_file)['cmd.replication_definition']['databases'] == []
+    assert files(os.path.join(dest, 'server-000', 'endpoints')) == sorted('{0}.json'.format(name) for name in endpoint_names)
+
+    # the split task file is a qem_task definition
+    exported = qem_client.export_task('server-000', 'task-00001')
+    with qem_standin.fleet.lock:
+        del qem_standin.fleet.servers['server-000']['tasks']['task-00001']
+    with open(task_path) as task_file:
+        result = run_qem_module('qem_task', name='task-00001', server='server-000', definition=task_file.read())
+    assert result['changed']
+    assert json.loads(qem_client.export_task('server-000', 'task-00001'))['cmd.replication_definition']['tasks'] == \
+        json.loads(exported)['cmd.replication_definition']['tasks']
+
+
+def test_split_of_a_server_export_uses_safe_file_names(tmp_path):
+    export_path = str(tmp_path / 'server.json')
+    with open(export_path, 'w') as export:
+        json.dump({'name': 'server', 'cmd.replication_definition': {
+            'tasks': [{'task': {'name': 'billing/eu:daily'}}, {'task': {'name': 'crm'}}],
+            'databases': [{'name': 'crm db'}]}}, export)
+
+    split = split_export(export_path, str(tmp_path / 'tasks'), str(tmp_path / 'endpoints'))
+
+    assert safe_file_name('billing/eu:daily') == 'billing_eu_daily'
+    assert [(kind, name, os.path.relpath(path, str(tmp_path)), changed) for kind, name, path, changed in split] == [
+        ('task', 'billing/eu:daily', 'tasks/billing_eu_daily.json', True),
+        ('task', 'crm', 'tasks/crm.json', True),
+        ('endpoint', 'crm db', 'endpoints/crm db.json', True)]
+    assert all(not changed for kind, name, path, changed in split_export(export_path, str(tmp_path / 'tasks'), str(tmp_path / 'endpoints')))
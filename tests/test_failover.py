@@ -0,0 +1,127 @@
+import socket
+import time
+
+import pytest
+
+from ansible.module_utils import qem_failover
+from ansible.module_utils.qem_common import create_qem_client
+from qem_standin import DEFAULT_STANDIN_CREDENTIALS, QemStandIn
+
+
+@pytest.fixture
+def standby(qem_standin, qem_standin_certificate):
+    # A second stand-in serving the same fleet, as the standby instance of the QEM host
+    cert, key = qem_standin_certificate
+    with QemStandIn(qem_standin.fleet, cert=cert, key=key) as standin:
+        yield standin
+
+
+@pytest.fixture
+def listening_socket():
+    # A host which accepts the connections and never answers
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(8)
+    yield listener
+    listener.close()
+
+
+def closed_port():
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def multi_host_client(*hostnames, **kwargs):
+    return create_qem_client(qem_hostname=','.join(hostnames), qem_verify_certificate=False, **dict(DEFAULT_STANDIN_CREDENTIALS, **kwargs))
+
+
+def test_reads_fail_over_to_the_next_host(qem_standin):
+    client = multi_host_client('127.0.0.1:{0}'.format(closed_port()), qem_standin.hostname)
+
+    assert len(client.get_server_list().serverList) == 3
+    first, second = client.attclient.report()
+    assert not first['available'] and first['failures'] == 1 and first['last_error']
+    assert second['available'] and second['requests'] == 2
+
+
+def test_the_login_to_a_silent_host_is_bounded(qem_standin, listening_socket, monkeypatch):
+    monkeypatch.setattr(qem_failover, 'LOGIN_TIMEOUT', 0.5)
+    start = time.time()
+
+    client = multi_host_client('127.0.0.1:{0}'.format(listening_socket.getsockname()[1]), qem_standin.hostname)
+
+    assert time.time() - start < 5
+    assert client.get_server_list().serverList
+    assert not client.attclient.report()[0]['available']
+
+
+def test_a_host_back_is_health_checked_before_being_used_again(qem_standin, standby, monkeypatch):
+    monkeypatch.setattr(qem_failover, 'HOST_RETRY_INTERVAL', 0.2)
+    client = multi_host_client(qem_standin.hostname, standby.hostname)
+    preferred = client.attclient.sessions[0]
+    preferred.mark_down('Cannot connect')
+    client.get_server_list()
+    assert client.attclient.report()[1]['requests'] == 1
+
+    time.sleep(0.3)
+    sessions = len(qem_standin.sessions)
+    # the check runs in the background, the request in the meantime still goes to the standby
+    client.get_server_list()
+    deadline = time.time() + 5
+    while not preferred.available(time.time()) and time.time() < deadline:
+        time.sleep(0.05)
+
+    assert preferred.metrics['health_checks'] == 1
+    assert len(qem_standin.sessions) == sessions + 1
+    client.get_server_list()
+    assert [host['requests'] for host in client.attclient.report()] == [2, 2]
+
+
+def test_a_failed_health_check_keeps_the_host_skipped(qem_standin, monkeypatch):
+    monkeypatch.setattr(qem_failover, 'HOST_RETRY_INTERVAL', 0.2)
+    client = multi_host_client('127.0.0.1:{0}'.format(closed_port()), qem_standin.hostname)
+    unreachable = client.attclient.sessions[0]
+
+    time.sleep(0.3)
+    client.get_server_list()
+    deadline = time.time() + 5
+    while unreachable.metrics['health_checks'] == 0 or unreachable.down_until - time.time() < 0.15:
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+    assert not unreachable.available(time.time())
+    assert unreachable.metrics['requests'] == 1
+
+
+def test_slow_reads_are_hedged_to_the_next_host(qem_standin, standby):
+    client = multi_host_client(qem_standin.hostname, standby.hostname, qem_hedged_reads=True)
+    for attempt in range(qem_failover.HEDGE_MIN_SAMPLES):
+        client.get_server_list()
+    assert client.attclient.report()[0]['hedges'] == 0
+
+    qem_standin.latency = 2
+    start = time.time()
+    assert len(client.get_server_list().serverList) == 3
+
+    assert time.time() - start < 1.5
+    preferred, second = client.attclient.report()
+    assert second['hedges'] == 1 and second['hedge_wins'] == 1
+    # a slow host is not marked down, it stays preferred
+    assert preferred['available']
+
+
+def test_clients_of_the_same_hosts_share_their_latencies(qem_standin, standby):
+    client = multi_host_client(qem_standin.hostname, standby.hostname, qem_hedged_reads=True)
+    for attempt in range(qem_failover.HEDGE_MIN_SAMPLES):
+        client.get_server_list()
+
+    other = multi_host_client(qem_standin.hostname, standby.hostname, qem_hedged_reads=True)
+    qem_standin.latency = 2
+    start = time.time()
+    other.get_server_list()
+
+    assert time.time() - start < 1.5
+    assert other.attclient.report()[1]['hedge_wins'] == 1
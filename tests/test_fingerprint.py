@@ -0,0 +1,58 @@
+import json
+from collections import OrderedDict
+
+from ansible.module_utils.qem_fingerprint import canonicalize, diff_section, fingerprint
+
+SERVER = 'server-000'
+TASK = 'task-00001'
+
+
+def test_fingerprint_ignores_the_volatile_keys_and_the_key_order():
+    document = OrderedDict([('b', 1), ('a', dict(_version=dict(version='6.6'), task_uuid='x', c=[1, 2]))])
+    reordered = json.dumps(dict(a=dict(c=[1, 2], task_uuid='y'), b=1)).encode('utf-8')
+
+    assert canonicalize(document) == dict(a=dict(c=[1, 2]), b=1)
+    assert fingerprint(document) == fingerprint(reordered)
+    assert fingerprint(document) != fingerprint(dict(a=dict(c=[2, 1]), b=1))
+    assert fingerprint(dict(a=1, extra=2), ignored_keys=('extra',)) == fingerprint(dict(a=1))
+
+
+def test_diff_section_reports_the_named_items():
+    current = [dict(name='kept', value=1), dict(name='changed', value=1), dict(name='removed', value=1)]
+    desired = [dict(name='kept', value=1), dict(name='changed', value=2), dict(name='added', value=1)]
+
+    assert diff_section(current, desired) == dict(added=['added'], changed=['changed'], removed=['removed'])
+    # items only removed from the desired list do not make a difference to apply
+    assert diff_section(current, current[:1]) is None
+    assert diff_section(dict(a=1), dict(a=1, task_uuid='x')) is None
+    assert diff_section(dict(a=1), dict(a=2)) == 'changed'
+    assert diff_section(None, dict(a=1)) == 'changed'
+
+
+def exported_task(qem_client):
+    return json.loads(qem_client.export_task(SERVER, TASK), object_pairs_hook=OrderedDict)
+
+
+def test_task_update_uses_the_cached_fingerprint(qem_standin, qem_client, run_qem_module, tmp_path):
+    definition = exported_task(qem_client)
+    params = dict(name=TASK, server=SERVER, update=True, fingerprint_cache=str(tmp_path / 'fingerprints.json'))
+
+    result = run_qem_module('qem_task', definition=json.dumps(definition), **params)
+    assert not result['changed']
+    assert result['msg'] == 'task up to date'
+    exports = qem_standin.fleet.requests['export_task']
+
+    # a fresh cache entry spares the export
+    result = run_qem_module('qem_task', definition=json.dumps(definition), **params)
+    assert not result['changed']
+    assert result['msg'] == 'task up to date (cached fingerprint)'
+    assert qem_standin.fleet.requests['export_task'] == exports
+
+    definition['cmd.replication_definition']['tasks'][0]['task_settings']['target_settings']['max_transaction_size'] = 2048
+    result = run_qem_module('qem_task', definition=json.dumps(definition), **params)
+    assert result['changed']
+    assert result['msg'] == 'task updated'
+    assert qem_standin.fleet.requests['import_task'] == 1
+    assert exported_task(qem_client)['cmd.replication_definition']['tasks'][0]['task_settings']['target_settings'] == \
+        dict(max_transaction_size=2048)
+
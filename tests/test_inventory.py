@@ -0,0 +1,60 @@
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=3, tasks=5, endpoints=2)
+
+
+def test_snapshot_gathers_every_section_of_the_monitored_servers(qem_standin, run_qem_module):
+    qem_standin.fleet.down.add('server-002')
+
+    result = run_qem_module('qem_inventory_info')
+
+    inventory = result['qem_inventory']
+    assert list(inventory) == ['server-000', 'server-001', 'server-002']
+    entry = inventory['server-000']
+    assert (entry['state'], entry['skipped'], entry['errors']) == ('MONITORED', False, dict())
+    assert entry['task_summary']['total'] == 5
+    assert [task['name'] for task in entry['tasks']] == ['task-0000{0}'.format(index) for index in range(5)]
+    assert len(entry['endpoints']) == 2
+    assert entry['acl'] == dict(disable_inheritance=False, acl=[])
+    # the server in ERROR is skipped without being called
+    assert (inventory['server-002']['state'], inventory['server-002']['skipped']) == ('ERROR', True)
+    assert 'tasks' not in inventory['server-002']
+    assert qem_standin.fleet.requests['get_task_list'] == 2
+    assert result['summary'] == dict(servers=3, skipped=1, with_errors=0, tasks=10, endpoints=4)
+
+
+def test_unskipped_unreachable_server_reports_its_errors(qem_standin, run_qem_module):
+    qem_standin.fleet.down.add('server-002')
+
+    result = run_qem_module('qem_inventory_info', server=['server-001', 'server-002'], sections=['tasks'], skip_unmonitored=False)
+
+    inventory = result['qem_inventory']
+    assert list(inventory) == ['server-001', 'server-002']
+    assert 'Cannot connect to server' in inventory['server-002']['errors']['tasks']
+    assert 'details' not in inventory['server-001'] and 'endpoints' not in inventory['server-001']
+    assert result['summary']['with_errors'] == 1
+
+
+def test_snapshot_written_to_dest_only_when_it_changes(qem_standin, run_qem_module, tmp_path):
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    dest = str(directory / 'inventory.json')
+
+    result = run_qem_module('qem_inventory_info', sections=['tasks'], dest=dest)
+    assert result['changed']
+    assert 'qem_inventory' not in result
+    with open(dest) as snapshot:
+        assert sorted(json.load(snapshot)) == ['server-000', 'server-001', 'server-002']
+
+    assert not run_qem_module('qem_inventory_info', sections=['tasks'], dest=dest)['changed']
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers['server-001']['tasks']['task-00000']['state'] = 'ERROR'
+    assert run_qem_module('qem_inventory_info', sections=['tasks'], dest=dest)['changed']
+    # no temporary file is left behind
+    assert os.listdir(str(directory)) == ['inventory.json']
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=4, tasks=5, compose=1)
+
+
+@pytest.fixture
+def inventory_config(tmp_path):
+    path = tmp_path / 'qem.yml'
+    path.write_text(u'\n'.join([
+        'plugin: qem',
+        'cache: yes',
+        'cache_plugin: jsonfile',
+        'cache_connection: {0}'.format(tmp_path / 'cache'),
+        'cache_timeout: 600',
+        'keyed_groups:',
+        '    - key: qem_license.state',
+        '      prefix: qem_license',
+        '']))
+    return str(path)
+
+
+def ansible_inventory(path, *args):
+    # ansible-inventory --list in a child process, the QEM_* variables of the stand-in are inherited
+    env = dict(os.environ, ANSIBLE_INVENTORY_PLUGINS=os.path.join(ROLE_DIR, 'inventory_plugins'), ANSIBLE_INVENTORY_ENABLED='qem')
+    process = subprocess.Popen([sys.executable, '-m', 'ansible.cli.inventory', '-i', path, '--list'] + list(args), env=env,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, errors = process.communicate()
+    assert process.returncode == 0, errors.decode('utf-8')
+    return json.loads(output.decode('utf-8'))
+
+
+def test_hosts_are_grouped_by_type_state_version_and_task_states(qem_standin, inventory_config):
+    qem_standin.fleet.down.add('server-001')
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers['server-002']['version'] = '6.6.0.1'
+
+    inventory = ansible_inventory(inventory_config)
+
+    hostvars = inventory['_meta']['hostvars']
+    assert sorted(hostvars) == ['server-000', 'server-001', 'server-002', 'server-003']
+    assert hostvars['server-000']['qem_server'] == 'server-000'
+    assert hostvars['server-000']['qem_task_summary']['total'] == 5
+    # the details of the server in ERROR are not fetched
+    assert 'qem_task_summary' not in hostvars['server-001']
+    assert sorted(inventory['qem_state_error']['hosts']) == ['server-001']
+    assert sorted(inventory['qem_state_monitored']['hosts']) == ['server-000', 'server-002', 'server-003']
+    assert sorted(inventory['qem_replicate']['hosts'] + inventory['qem_compose']['hosts']) == sorted(hostvars)
+    assert inventory['qem_version_6_6']['hosts'] == ['server-002']
+    assert 'server-000' in inventory['qem_tasks_running']['hosts']
+    assert sorted(inventory['qem_license_VALID_LICENSE']['hosts']) == ['server-000', 'server-002', 'server-003']
+
+
+def test_warm_runs_are_served_from_the_inventory_cache(qem_standin, inventory_config, tmp_path):
+    cold = ansible_inventory(inventory_config)
+    requests = sum(qem_standin.fleet.requests.values())
+
+    assert ansible_inventory(inventory_config) == cold
+    assert sum(qem_standin.fleet.requests.values()) == requests
+
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers['server-000']['version'] = '6.6.0.1'
+    shutil.rmtree(str(tmp_path / 'cache'))
+    assert ansible_inventory(inventory_config)['qem_version_6_6']['hosts'] == ['server-000']
+    assert qem_standin.fleet.requests['get_server_list'] == 2
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from ansible.module_utils import qem_client_cache
+from ansible.plugins.loader import lookup_loader
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = 'server-000'
+
+
+@pytest.fixture
+def qem_state(qem_standin):
+    # lookup('qem_state', *terms, **options) as run by a template of the controller process
+    lookup_loader.add_directory(os.path.join(ROLE_DIR, 'lookup_plugins'))
+    lookup = lookup_loader.get('qem_state')
+
+    def run(*terms, **options):
+        return lookup.run(list(terms), variables=dict(), **options)
+    yield run
+    with qem_client_cache._lock:
+        qem_client_cache._clients.clear()
+        qem_client_cache._results.clear()
+
+
+def test_lookups_share_one_login_and_one_list_call(qem_standin, qem_state):
+    sessions = len(qem_standin.sessions)
+
+    assert qem_state('task-00001', server=SERVER, field='state') == ['RUNNING']
+    tasks = qem_state('task-00001', 'task-00002', 'no-such-task', server=SERVER)
+    assert [task['name'] for task in tasks[:2]] == ['task-00001', 'task-00002']
+    assert tasks[2] is None
+    assert qem_state('src-000', server=SERVER, kind='endpoint', field='role') == ['SOURCE']
+
+    assert len(qem_standin.sessions) == sessions + 1
+    assert qem_standin.fleet.requests['get_task_list'] == 1
+    assert qem_standin.fleet.requests['get_endpoint_list'] == 1
+
+
+def test_results_expire_after_the_ttl(qem_standin, qem_state):
+    assert qem_state('task-00001', server=SERVER, field='state', ttl=60) == ['RUNNING']
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers[SERVER]['tasks']['task-00001']['state'] = 'ERROR'
+
+    assert qem_state('task-00001', server=SERVER, field='state', ttl=60) == ['RUNNING']
+    assert qem_state('task-00001', server=SERVER, field='state', ttl=0) == ['ERROR']
+    assert qem_standin.fleet.requests['get_task_list'] == 2
+
+
+def test_other_forks_read_the_results_from_the_cache_dir(qem_standin, qem_state, tmp_path):
+    cache_dir = str(tmp_path / 'results')
+    assert qem_state('task-00001', server=SERVER, field='state', cache_dir=cache_dir) == ['RUNNING']
+    # a fork starts without the in-memory results of its parent
+    with qem_client_cache._lock:
+        qem_client_cache._results.clear()
+
+    assert qem_state('task-00001', server=SERVER, field='state', cache_dir=cache_dir) == ['RUNNING']
+    assert qem_standin.fleet.requests['get_task_list'] == 1
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_results_are_not_shared_across_credentials(qem_standin, qem_state, monkeypatch):
+    qem_state('task-00001', server=SERVER)
+    monkeypatch.setenv('QEM_PASSWORD', 'changed')
+
+    qem_state('task-00001', server=SERVER)
+
+    assert qem_standin.fleet.requests['get_task_list'] == 2
+    assert len(qem_client_cache._clients) == 2
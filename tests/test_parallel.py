@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from ansible.module_utils.qem_parallel import RateLimiter, run_parallel
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=6, tasks=4, latency=0.05)
+
+
+def recorded(func):
+    # func(item), recording the start time of each call
+    starts = dict()
+    lock = threading.Lock()
+
+    def call(item):
+        with lock:
+            starts[item] = time.time()
+        return func(item)
+    return call, starts
+
+
+def test_rate_limiter_spaces_the_calls_of_all_threads():
+    limiter = RateLimiter(20)
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(limiter.acquire())) for index in range(8)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # the first call starts at once, the 8th one 7 intervals later
+    assert time.time() - start >= 7 * 0.05 - 0.01
+    assert sorted(waits)[0] < 0.01
+    assert sorted(waits)[-1] >= 7 * 0.05 - 0.01
+
+
+def test_run_parallel_limits_the_rate_of_the_qem_calls(qem_standin, qem_client):
+    servers = list(qem_standin.fleet.servers)
+    call, starts = recorded(lambda server: len(qem_client.get_task_list(server).taskList))
+
+    outcomes = run_parallel(call, servers, max_workers=6, rate_limit=10)
+
+    assert [outcome['result'] for outcome in outcomes.values()] == [4] * len(servers)
+    ordered = sorted(starts.values())
+    gaps = [later - earlier for earlier, later in zip(ordered, ordered[1:])]
+    assert min(gaps) >= 0.1 - 0.01
+    assert max(outcome['wait'] for outcome in outcomes.values()) >= 0.5 - 0.01
+
+
+def test_run_parallel_without_limit_runs_the_calls_concurrently(qem_standin, qem_client):
+    servers = list(qem_standin.fleet.servers)
+    start = time.time()
+
+    outcomes = run_parallel(lambda server: qem_client.get_task_list(server), servers, max_workers=6)
+
+    # 6 calls of 50ms each
+    assert time.time() - start < 6 * 0.05
+    assert all(outcome['wait'] == 0 for outcome in outcomes.values())
+
+
+def test_run_parallel_submits_the_calls_at_their_offset(qem_standin, qem_client):
+    servers = list(qem_standin.fleet.servers)
+    offsets = dict((server, 0.05 * index) for index, server in enumerate(reversed(servers)))
+    call, starts = recorded(lambda server: qem_client.get_server_details(server))
+    start = time.time()
+
+    outcomes = run_parallel(call, servers, max_workers=2, offsets=offsets)
+
+    assert list(outcomes) == servers
+    assert all(outcome['error'] is None for outcome in outcomes.values())
+    for server in servers:
+        assert starts[server] - start >= offsets[server] - 0.01
+    # the offsets are waited for by the caller: the two workers are only busy with the 50ms calls
+    assert time.time() - start < max(offsets.values()) + 4 * 0.05
+
+
+def test_run_parallel_reports_each_error(qem_standin, qem_client):
+    outcomes = run_parallel(lambda server: qem_client.get_task_list(server), ['server-000', 'no-such-server'])
+
+    assert outcomes['server-000']['error'] is None
+    assert outcomes['no-such-server']['result'] is None
+    assert 'not found' in outcomes['no-such-server']['error']
+
+
+def test_info_modules_fan_out_over_the_fleet(qem_standin, run_qem_module):
+    qem_standin.fleet.down.add('server-003')
+    start = time.time()
+
+    result = run_qem_module('qem_task_info', server='all', parallelism=6)
+
+    # one 50ms round of get_task_list calls after the server list
+    assert time.time() - start < 5 * 0.05
+    assert sorted(result['qem_tasks']) == sorted(set(qem_standin.fleet.servers) - set(['server-003']))
+    assert all(len(tasks) == 4 for tasks in result['qem_tasks'].values())
+    assert list(result['server_errors']) == ['server-003']
+    assert sorted(result['server_timings']) == sorted(qem_standin.fleet.servers)
+
+    result = run_qem_module('qem_task_info', server='server-000', name='task-00001')
+    assert [task['name'] for task in result['qem_tasks']] == ['task-00001']
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from ansible.module_utils.qem_placement import place_task, score_candidates
+
+CANDIDATES = ['server-000', 'server-001', 'server-002']
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=3, tasks=6)
+
+
+def set_running(qem_standin, server, running):
+    with qem_standin.fleet.lock:
+        for index, task in enumerate(qem_standin.fleet.servers[server]['tasks'].values()):
+            task.update(state='RUNNING' if index < running else 'STOPPED', pending=None)
+
+
+@pytest.fixture
+def loaded_fleet(qem_standin):
+    # server-001 is the least loaded, then server-002
+    for server, running in zip(CANDIDATES, (5, 1, 3)):
+        set_running(qem_standin, server, running)
+    return qem_standin
+
+
+def test_least_loaded_server_is_chosen(loaded_fleet, qem_client):
+    server, reason, scores, errors = place_task(qem_client, CANDIDATES, 'new-task')
+
+    assert (server, reason, errors) == ('server-001', 'lowest score', dict())
+    assert [score['server'] for score in scores] == ['server-001', 'server-002', 'server-000']
+    assert scores[-1]['score'] > scores[0]['score']
+
+
+def test_server_defining_the_task_is_kept(loaded_fleet, qem_client):
+    server, reason, scores, errors = place_task(qem_client, CANDIDATES, 'task-00001')
+
+    # every server defines task-00001, the best scored one is returned
+    assert (server, reason) == ('server-001', 'task already defined')
+
+    with loaded_fleet.fleet.lock:
+        del loaded_fleet.fleet.servers['server-001']['tasks']['task-00001']
+        del loaded_fleet.fleet.servers['server-002']['tasks']['task-00001']
+    server, reason, scores, errors = place_task(qem_client, CANDIDATES, 'task-00001')
+    assert (server, reason) == ('server-000', 'task already defined')
+
+
+def test_ineligible_candidates_are_skipped(loaded_fleet, qem_client):
+    with loaded_fleet.fleet.lock:
+        loaded_fleet.fleet.servers['server-001']['license']['state'] = 'EXPIRED_LICENSE'
+        loaded_fleet.fleet.servers['server-002']['version'] = '6.6.0.1'
+
+    server, reason, scores, errors = place_task(qem_client, CANDIDATES, 'new-task', required_version='2021.11.0.1')
+
+    assert (server, reason) == ('server-000', 'lowest score')
+    reasons = dict((score['server'], score['reasons']) for score in scores)
+    assert reasons['server-001'] == ['license state is EXPIRED_LICENSE']
+    assert reasons['server-002'] == ['version 6.6.0.1 is older than the definition version 2021.11.0.1']
+
+    with loaded_fleet.fleet.lock:
+        loaded_fleet.fleet.servers['server-000']['definition']['monitored'] = False
+    assert place_task(qem_client, CANDIDATES, 'new-task', required_version='2021.11.0.1')[:2] == (None, 'no eligible candidate')
+
+
+def test_unchecked_candidate_prevents_the_placement_of_a_named_task(loaded_fleet, qem_client):
+    loaded_fleet.fleet.down.add('server-002')
+
+    server, reason, scores, errors = place_task(qem_client, CANDIDATES, 'new-task')
+
+    # server-002 may define the task, placing it elsewhere could duplicate it
+    assert server is None
+    assert reason == 'candidates could not be checked: server-002'
+    assert list(errors) == ['server-002']
+    assert place_task(qem_client, CANDIDATES)[:2] == ('server-001', 'lowest score')
+
+
+def test_scores_are_relative_to_the_most_loaded_candidate():
+    loads = [dict(server=name, state='MONITORED', version='2022.5.0.1', license='VALID_LICENSE', has_task=False,
+                  cpu_percentage=cpu, memory_mb=memory, running=running, total=10)
+             for name, cpu, memory, running in (('a', 50, 1000, 5), ('b', 0, 0, 0), ('c', 25, 500, 5))]
+
+    scores = dict((score['server'], score['score']) for score in score_candidates(loads))
+
+    assert scores == dict(a=100.0, b=10.0, c=70.0)
+
+
+def test_task_module_places_the_task(loaded_fleet, qem_client, run_qem_module):
+    definition = json.loads(qem_client.export_task('server-000', 'task-00001'))
+
+    result = run_qem_module('qem_task', name='placed-task', server='auto', candidates=CANDIDATES, definition=json.dumps(definition))
+
+    assert result['changed']
+    assert result['task']['server'] == 'server-001'
+    assert result['placement']['reason'] == 'lowest score'
+    assert 'placed-task' in loaded_fleet.fleet.servers['server-001']['tasks']
+
+    result = run_qem_module('qem_task', name='placed-task', server='auto', candidates=CANDIDATES, definition=json.dumps(definition))
+    assert not result['changed']
+    assert result['placement']['reason'] == 'task already defined'
+
+
+def test_absent_task_defined_on_no_candidate_is_left_alone(loaded_fleet, qem_client, run_qem_module):
+    definition = json.loads(qem_client.export_task('server-000', 'task-00001'))
+    # a definition without _version needs the version of the chosen server
+    del definition['_version']
+    definition['cmd.replication_definition']['tasks'][0]['task']['name'] = 'unknown-task'
+
+    result = run_qem_module('qem_task', name='unknown-task', server='auto', candidates=CANDIDATES, state='absent',
+                            definition=json.dumps(definition))
+
+    assert not result.get('failed')
+    assert not result['changed']
+    assert result['task']['server'] is None
+    assert result['placement']['reason'] == 'task not defined'
+
+    result = run_qem_module('qem_task', name='task-00002', server='auto', candidates=CANDIDATES, state='absent',
+                            definition=json.dumps(definition))
+    assert result['changed']
+    assert 'task-00002' not in loaded_fleet.fleet.servers[result['task']['server']]['tasks']
@@ -0,0 +1,49 @@
+import json
+from collections import OrderedDict
+
+from ansible.module_utils.aem_client import AemClient
+from ansible.module_utils.qem_definitions import task_endpoint_names
+
+SERVER = 'server-000'
+
+
+def test_settings_import_only_the_changed_sections(qem_standin, qem_client, run_qem_module):
+    settings = json.loads(qem_client.export_all(SERVER), object_pairs_hook=OrderedDict)
+
+    result = run_qem_module('qem_settings', name=SERVER, settings=json.dumps(settings), import_mode='sections')
+    assert not result['changed']
+    assert result['diff'] == dict()
+
+    databases = settings['cmd.replication_definition']['databases']
+    databases.append(OrderedDict([('name', 'new-src'), ('role', 'SOURCE'), ('db_settings', {'$type': 'OracleSettings'})]))
+    result = run_qem_module('qem_settings', name=SERVER, settings=json.dumps(settings), import_mode='sections')
+    assert result['changed']
+    assert result['diff'] == {'cmd.replication_definition.databases': dict(added=['new-src'], changed=[], removed=[])}
+    assert 'new-src' in qem_standin.fleet.servers[SERVER]['endpoints']
+    assert qem_standin.fleet.requests['import_all'] == 1
+
+
+def test_partial_import_keeps_the_endpoints_of_the_changed_tasks(qem_standin, qem_client, run_qem_module, monkeypatch):
+    payloads = []
+    import_all = AemClient.import_all
+
+    def recording_import_all(self, payload, server):
+        payloads.append(json.loads(payload))
+        return import_all(self, payload, server)
+    monkeypatch.setattr(AemClient, 'import_all', recording_import_all)
+    settings = json.loads(qem_client.export_all(SERVER), object_pairs_hook=OrderedDict)
+    task = settings['cmd.replication_definition']['tasks'][2]
+    task['task_settings']['target_settings']['max_transaction_size'] = 4096
+
+    result = run_qem_module('qem_settings', name=SERVER, settings=json.dumps(settings), import_mode='sections')
+
+    assert result['diff'] == {'cmd.replication_definition.tasks': dict(added=[], changed=[task['task']['name']], removed=[])}
+    replication_definition = payloads[0]['cmd.replication_definition']
+    assert [imported['task']['name'] for imported in replication_definition['tasks']] == [task['task']['name']]
+    # the unchanged endpoints of the task come with it
+    assert sorted(database['name'] for database in replication_definition['databases']) == sorted(task_endpoint_names(task))
+
+    # the whole document is imported by default
+    task['task_settings']['target_settings']['max_transaction_size'] = 8192
+    run_qem_module('qem_settings', name=SERVER, settings=json.dumps(settings))
+    assert payloads[1] == json.loads(json.dumps(settings))
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+SERVER = 'server-000'
+TASK = 'task-00001'
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=1, tasks=2, table_count=12, latency=0.02)
+
+
+def test_patterns_are_matched_against_the_task_tables(qem_standin, run_qem_module):
+    result = run_qem_module('qem_table_reload', name=TASK, server=SERVER, tables=['HR.TABLE_1?', dict(schema='HR', table='TABLE_2'), 'HR.TABLE_2'])
+
+    assert result['changed']
+    assert [(table['schema'], table['table']) for table in result['tables']] == \
+        [('HR', 'TABLE_10'), ('HR', 'TABLE_11'), ('HR', 'TABLE_2')]
+    assert result['summary'] == dict(total=3, reloaded=3, failed=0, failures=[])
+    assert qem_standin.fleet.requests['reload_table'] == 3
+    assert qem_standin.fleet.requests['export_task'] == 1
+
+
+def test_reloads_are_rate_limited(qem_standin, run_qem_module):
+    start = time.time()
+
+    result = run_qem_module('qem_table_reload', name=TASK, server=SERVER, tables=['HR.*'], parallelism=4, rate_limit=20)
+
+    # 12 reloads at most 20 per second: the last one starts 11 intervals after the first
+    assert time.time() - start >= 11 * 0.05 - 0.01
+    assert result['summary']['reloaded'] == 12
+    # the 4 workers queue for their turn
+    assert max(table['wait'] for table in result['tables']) >= 2 * 0.05
+
+
+def test_failed_reloads_are_reported(qem_standin, run_qem_module):
+    result = run_qem_module('qem_table_reload', name=TASK, server=SERVER, tables=['HR.TABLE_0', 'HR.MISSING'])
+
+    assert result['failed']
+    assert result['changed']
+    assert result['msg'] == '1 of 2 table reloads failed'
+    assert result['summary']['failures'] == ['HR.MISSING']
+
+    result = run_qem_module('qem_table_reload', name=TASK, server=SERVER, tables=['HR.NO_MATCH_*'])
+    assert result['failed']
+    assert result['msg'] == 'No table of task {0} matches HR.NO_MATCH_*'.format(TASK)
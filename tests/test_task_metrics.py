@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ansible.module_utils.qem_task_metrics import (TaskMetricsCollector, latency_seconds, latency_trends, slope, task_key,
+                                                   task_metrics_store)
+from ansible.module_utils.qem_timeseries import DEFAULT_TIERS
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIERS = (('raw', 0, 100), ('1m', 60, 100))
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=3, tasks=4, compose=1)
+
+
+def test_latencies_are_read_as_seconds():
+    assert latency_seconds('00:00:02') == 2
+    assert latency_seconds('26:01:30') == 26 * 3600 + 90
+    assert latency_seconds(4.5) == 4.5
+    assert latency_seconds(None) == latency_seconds('') == 0
+
+
+def test_slope_is_the_least_squares_one():
+    assert slope([(0, 1), (1, 3), (2, 5), (3, 7)]) == 2
+    assert slope([(0, 10), (1, 9), (2, 11), (3, 10)]) == 0.2
+    assert slope([(0, 5)]) == 0
+    assert slope([(1, 5), (1, 7)]) == 0
+
+
+def test_collector_samples_the_figures_of_every_task(qem_standin, qem_client, tmp_path):
+    qem_standin.fleet.down.add('server-001')
+    tasks = [(server, name) for server in qem_standin.fleet.servers for name in qem_standin.fleet.servers[server]['tasks']]
+    store = task_metrics_store(str(tmp_path / 'task_metrics.json'), TIERS)
+    collector = TaskMetricsCollector(qem_client, tasks, store, parallelism=4)
+
+    assert collector.collect_once() == 8
+    assert sorted(collector.errors) == sorted(task_key(*task) for task in tasks if task[0] == 'server-001')
+
+    running = [name for name, task in qem_standin.fleet.servers['server-000']['tasks'].items() if task['state'] == 'RUNNING']
+    timestamp, values = store.series[task_key('server-000', running[0])].last()
+    assert values['cdc_source_latency'] == 1 and values['cdc_total_latency'] == 2
+    assert values['cdc_incoming_changes_in_memory_count'] == 7
+    assert values['full_load_tables_completed_count'] == 4
+    assert values['memory_mb'] == 300
+    # the Compose tasks have no full load or CDC figures
+    compose_task = list(qem_standin.fleet.servers['server-002']['tasks'])[0]
+    timestamp, values = store.series[task_key('server-002', compose_task)].last()
+    assert set(values.values()) == set([0])
+
+
+def growing_store(path, tiers=TIERS):
+    # 10 minutes of one sample per minute: server-000/grows gains 5s of latency per minute, server-000/flat stays at
+    # 100s and server-000/low grows below the minimal latency
+    store = task_metrics_store(path, tiers)
+    for minute in range(10):
+        for name, latency in (('grows', 10 + 5 * minute), ('flat', 100), ('low', 0.5 * minute)):
+            values = dict((field, 0) for field in store.fields)
+            values['cdc_total_latency'] = latency
+            store.add(task_key('server-000', name), minute * 60, values)
+    return store
+
+
+def test_latency_trends_report_the_growing_latencies(tmp_path):
+    store = growing_store(str(tmp_path / 'task_metrics.json'))
+
+    trends = latency_trends(store, min_slope=1.0, min_latency=10)
+
+    # the bucket of the last minute is still in progress
+    assert trends == [dict(task='server-000/grows', slope=5, latency=50, points=9)]
+    assert latency_trends(store, window=2) == []
+    assert [trend['task'] for trend in latency_trends(store, min_slope=0.1, min_latency=0)] == ['server-000/grows', 'server-000/low']
+
+
+def test_trends_command_exits_with_2_when_a_latency_grows(tmp_path):
+    path = str(tmp_path / 'task_metrics.json')
+    # the command reads a store of the default tiers
+    growing_store(path, DEFAULT_TIERS).save()
+
+    def trends(*args):
+        process = subprocess.Popen([sys.executable, os.path.join(ROLE_DIR, 'tools', 'qem_task_metrics.py'), '--store', path, 'trends']
+                                   + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, errors = process.communicate()
+        return process.returncode, json.loads(output.decode('utf-8'))
+
+    assert trends('--tier', '1m') == (2, [dict(task='server-000/grows', slope=5, latency=50, points=9)])
+    assert trends('--min-slope', '10') == (0, [])
@@ -0,0 +1,120 @@
+import pytest
+
+from ansible.module_utils.aem_client import AemRunTaskReq
+from ansible.module_utils.qem_wait import TaskStateWaiter
+
+SERVER = 'server-000'
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=1, tasks=8, transition_delay=0.2)
+
+
+def set_tasks(qem_standin, state='STOPPED', tags=None):
+    # Every task of SERVER in state, tags maps task names to their assigned tags
+    with qem_standin.fleet.lock:
+        for task in qem_standin.fleet.servers[SERVER]['tasks'].values():
+            task.update(state=state, stop_reason='NORMAL' if state == 'STOPPED' else 'NONE', message='', pending=None,
+                        assigned_tags=(tags or dict()).get(task['name'], []))
+
+
+def fleet_task(qem_standin, name):
+    with qem_standin.fleet.lock:
+        return qem_standin.fleet.settle(qem_standin.fleet.servers[SERVER]['tasks'][name])
+
+
+def test_tasks_are_selected_by_names_pattern_or_tags(qem_standin, run_qem_module):
+    set_tasks(qem_standin, tags={'task-00005': ['nightly'], 'task-00006': ['nightly', 'eu']})
+
+    result = run_qem_module('qem_task_status', server=SERVER, names=['task-00000'], pattern='-0000[12]$', tags=['eu', 'nightly'],
+                            state='started', timeout=5)
+
+    started = sorted(task['name'] for task in result['tasks'])
+    assert started == ['task-00000', 'task-00001', 'task-00002', 'task-00005', 'task-00006']
+    assert all(task['final_state'] == 'RUNNING' and task['changed'] for task in result['tasks'])
+    assert result['summary'] == dict(total=5, changed=5, failed=0, failures=[])
+    assert fleet_task(qem_standin, 'task-00003')['state'] == 'STOPPED'
+
+    # the tasks already in the desired state are left alone
+    result = run_qem_module('qem_task_status', server=SERVER, tags=['nightly'], state='started')
+    assert not result['changed']
+    assert qem_standin.fleet.requests['run_task'] == 5
+
+
+def test_unknown_names_fail_before_any_change(qem_standin, run_qem_module):
+    set_tasks(qem_standin)
+
+    result = run_qem_module('qem_task_status', server=SERVER, names=['task-00000', 'no-such-task'], state='started')
+
+    assert result['failed']
+    assert result['msg'] == 'Tasks not found on server "{0}": no-such-task'.format(SERVER)
+    assert qem_standin.fleet.requests['run_task'] == 0
+
+
+def test_a_wave_starts_once_the_previous_one_is_done(qem_standin, run_qem_module):
+    set_tasks(qem_standin, state='RUNNING')
+
+    result = run_qem_module('qem_task_status', server=SERVER, pattern='.', waves=['-0000[0-2]$', '-0000[3-5]$'], state='stopped', timeout=5)
+
+    waves = dict((task['name'], task['wave']) for task in result['tasks'])
+    assert [name for name, wave in sorted(waves.items()) if wave == 0] == ['task-00000', 'task-00001', 'task-00002']
+    assert [name for name, wave in sorted(waves.items()) if wave == 2] == ['task-00006', 'task-00007']
+    # each wave waits for the 0.2s transitions of the previous one
+    elapsed = dict((task['wave'], task['elapsed']) for task in result['tasks'])
+    assert result['elapsed'] >= 3 * 0.2
+    assert all(elapsed[wave] >= 0.2 for wave in elapsed)
+    assert all(task['final_state'] == 'STOPPED' for task in result['tasks'])
+
+
+def test_waiter_polls_one_task_list_per_round_for_all_the_tasks(qem_standin, qem_client):
+    set_tasks(qem_standin)
+    keys = [(SERVER, 'task-0000{0}'.format(index)) for index in range(6)]
+    for server, name in keys:
+        qem_client.run_task(AemRunTaskReq(), server, name)
+    lists = qem_standin.fleet.requests['get_task_list']
+
+    waiter = TaskStateWaiter(qem_client, timeout=5, initial_interval=0.05)
+    results = waiter.wait(dict((key, 'running') for key in keys + [(SERVER, 'no-such-task')]), dict((key, 'STOPPED') for key in keys))
+
+    assert all(results[key]['reached'] and results[key]['state'] == 'RUNNING' for key in keys)
+    assert all(results[key]['elapsed'] >= 0.2 - 0.01 for key in keys)
+    assert results[(SERVER, 'no-such-task')]['error'] == 'Task "no-such-task" not found on server "{0}"'.format(SERVER)
+    # a few rounds of one call for the 7 tasks: 0.05s, then growing while the 0.2s transitions are pending
+    assert qem_standin.fleet.requests['get_task_list'] - lists == waiter.polls
+    assert waiter.polls <= 6
+
+
+def test_waiter_gives_up_on_error_or_at_the_deadline(qem_standin, qem_client):
+    set_tasks(qem_standin)
+    with qem_standin.fleet.lock:
+        qem_standin.fleet.servers[SERVER]['tasks']['task-00001'].update(state='ERROR', stop_reason='RECOVERABLE_ERROR')
+    qem_standin.fleet.transition_delay = 30
+    qem_client.run_task(AemRunTaskReq(), SERVER, 'task-00000')
+
+    waiter = TaskStateWaiter(qem_client, timeout=0.5, initial_interval=0.05)
+    results = waiter.wait({(SERVER, 'task-00000'): 'running', (SERVER, 'task-00001'): 'stopped'},
+                          {(SERVER, 'task-00000'): 'STOPPED', (SERVER, 'task-00001'): 'RUNNING'})
+
+    assert results[(SERVER, 'task-00000')]['state'] == 'STOPPED'
+    assert not results[(SERVER, 'task-00000')]['reached']
+    assert 0.5 <= results[(SERVER, 'task-00000')]['elapsed'] < 1
+    # a task moving to ERROR is not waited for until the deadline
+    assert (results[(SERVER, 'task-00001')]['state'], results[(SERVER, 'task-00001')]['reached']) == ('ERROR', False)
+    assert results[(SERVER, 'task-00001')]['elapsed'] < 0.5
+
+
+def test_single_task_start_is_submitted_then_waited_for(qem_standin, run_qem_module):
+    set_tasks(qem_standin)
+
+    result = run_qem_module('qem_task_status', name='task-00003', server=SERVER, state='started', submit_timeout=1, timeout=5)
+
+    assert result['changed']
+    assert result['msg'] == 'task started'
+    assert result['wait'] >= 0.2 - 0.01
+    assert fleet_task(qem_standin, 'task-00003')['state'] == 'RUNNING'
+
+    qem_standin.fleet.transition_delay = 30
+    result = run_qem_module('qem_task_status', name='task-00003', server=SERVER, state='stopped', timeout=1)
+    assert result['failed'] and result['changed']
+    assert result['msg'] == 'Task "task-00003" did not reach the stopped state within 1s, last state: RUNNING'
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from ansible.module_utils.qem_watch import TaskWatcher, diff_tasks
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=3, tasks=4)
+
+
+def snapshot(state, stop_reason='NONE', message=''):
+    return dict(state=state, stop_reason=stop_reason, message=message)
+
+
+def running_tasks(fleet, server):
+    return [name for name, task in fleet.servers[server]['tasks'].items() if task['state'] == 'RUNNING']
+
+
+def stop_task(fleet, server, name, message=''):
+    with fleet.lock:
+        task = fleet.servers[server]['tasks'][name]
+        task.update(state='STOPPED', stop_reason='NORMAL', message=message, started=None)
+
+
+def test_diff_reports_the_transitions_only():
+    previous = dict(kept=snapshot('RUNNING'), stopped=snapshot('RUNNING'), gone=snapshot('STOPPED', 'NORMAL'))
+    current = dict(kept=snapshot('RUNNING'), stopped=snapshot('STOPPED', 'NORMAL', 'Stopped by user'), new=snapshot('RUNNING'))
+
+    events = diff_tasks('server-000', previous, current, 100)
+
+    assert [(event['event'], event['task'], event['state']) for event in events] == [
+        ('removed', 'gone', 'STOPPED'), ('added', 'new', 'RUNNING'), ('changed', 'stopped', 'STOPPED')]
+    assert events[2]['changes'] == dict(state=['RUNNING', 'STOPPED'], stop_reason=['NONE', 'NORMAL'], message=['', 'Stopped by user'])
+    assert events[0]['changes']['state'] == ['STOPPED', None]
+    assert all(event['time'] == 100 and event['server'] == 'server-000' for event in events)
+
+
+def test_the_interval_of_each_server_follows_its_changes(qem_standin, qem_client):
+    servers = list(qem_standin.fleet.servers)
+    watcher = TaskWatcher(qem_client, servers, min_interval=1, max_interval=8, backoff=2)
+
+    # the first poll records the baselines
+    assert watcher.poll() == []
+    assert watcher.intervals == dict((server, 2) for server in servers)
+    # no server is due yet
+    assert watcher.poll() == []
+    assert watcher.polls == 1
+
+    for expected in (4, 8, 8):
+        assert watcher.poll(servers) == []
+        assert set(watcher.intervals.values()) == set([expected])
+
+    name = running_tasks(qem_standin.fleet, 'server-000')[0]
+    stop_task(qem_standin.fleet, 'server-000', name)
+    events = watcher.poll(servers)
+
+    assert [(event['server'], event['task'], event['event']) for event in events] == [('server-000', name, 'changed')]
+    assert watcher.intervals['server-000'] == 4
+    assert watcher.intervals['server-001'] == 8
+
+
+def test_a_server_error_is_reported_once_and_its_recovery(qem_standin, qem_client):
+    watcher = TaskWatcher(qem_client, ['server-000', 'server-001'])
+    watcher.poll()
+    qem_standin.fleet.down.add('server-001')
+
+    events = watcher.poll(['server-000', 'server-001'])
+    assert [(event['event'], event['server']) for event in events] == [('server_error', 'server-001')]
+    assert 'Cannot connect to server' in events[0]['message']
+    assert watcher.poll(['server-001']) == []
+
+    qem_standin.fleet.down.discard('server-001')
+    assert [event['event'] for event in watcher.poll(['server-001'])] == ['server_recovered']
+
+
+def test_module_reports_the_changes_since_its_previous_run(qem_standin, run_qem_module, tmp_path):
+    snapshot_path = str(tmp_path / 'task_states.json')
+    events_path = tmp_path / 'task_events.jsonl'
+
+    result = run_qem_module('qem_task_watch', server='all', snapshot=snapshot_path, events_file=str(events_path))
+    assert result['events'] == []
+    assert result['polls'] == 1
+
+    tasks = qem_standin.fleet.servers['server-001']['tasks']
+    stopped, removed = running_tasks(qem_standin.fleet, 'server-001')[:2]
+    stop_task(qem_standin.fleet, 'server-001', stopped, 'Stopped by user')
+    with qem_standin.fleet.lock:
+        del tasks[removed]
+
+    # a new run, as from cron: the snapshot of the previous one is the baseline
+    result = run_qem_module('qem_task_watch', server='all', snapshot=snapshot_path, events_file=str(events_path))
+
+    assert sorted((event['event'], event['task']) for event in result['events']) == sorted([('changed', stopped), ('removed', removed)])
+    assert all(event['server'] == 'server-001' for event in result['events'])
+    written = [json.loads(line) for line in events_path.read_text().splitlines()]
+    assert written == json.loads(json.dumps(result['events'], sort_keys=True))
+
+    result = run_qem_module('qem_task_watch', server='all', snapshot=snapshot_path)
+    assert result['events'] == []
@@ -0,0 +1,103 @@
+import io
+import sys
+
+import pytest
+
+from ansible.module_utils.qem_timeseries import RingBuffer, SeriesStore, TieredSeries, format_value
+from ansible.module_utils.qem_utilization import UTILIZATION_FIELDS, UtilizationSampler, utilization_store
+
+TIERS = (('raw', 0, 5), ('1m', 60, 3))
+
+
+@pytest.fixture
+def qem_standin_options():
+    return dict(servers=3, tasks=20)
+
+
+def test_ring_buffer_keeps_the_last_values():
+    buffer = RingBuffer(3, 'd')
+    assert buffer.last() is None
+    for value in range(5):
+        buffer.append(value)
+
+    assert len(buffer) == 3
+    assert list(buffer) == [2, 3, 4]
+    assert buffer.last() == 4
+
+    restored = RingBuffer(2, 'd')
+    restored.load(buffer.dump(), sys.byteorder)
+    assert list(restored) == [3, 4]
+
+
+def test_tiers_downsample_to_the_mean_and_the_max():
+    series = TieredSeries(['cpu'], TIERS)
+    # 4 minutes of one sample every 20s, the values of minute m are m, m + 1 and m + 2
+    for minute in range(4):
+        for index in range(3):
+            series.add(minute * 60 + index * 20, dict(cpu=minute + index))
+
+    raw = series.tier('raw').points()
+    assert len(raw) == 5
+    assert [point[1]['cpu'] for point in raw] == [3, 4, 3, 4, 5]
+    assert all(point[2] is None for point in raw)
+    # the bucket of the 4th minute is in progress, the 3 capacity keeps the 3 closed ones
+    minutes = series.tier('1m').points()
+    assert [point[0] for point in minutes] == [0, 60, 120]
+    assert [point[1]['cpu'] for point in minutes] == [1, 2, 3]
+    assert [point[2]['cpu'] for point in minutes] == [2, 3, 4]
+    assert series.last() == (220, dict(cpu=5))
+
+
+def test_store_is_bounded_and_persisted(tmp_path):
+    path = str(tmp_path / 'series.json')
+    store = SeriesStore(path, ['cpu'], TIERS)
+    for timestamp in range(0, 10000, 10):
+        store.add('server-000', timestamp, dict(cpu=timestamp % 7))
+    store.add('gone', 0, dict(cpu=1))
+    store.save()
+
+    restored = SeriesStore(path, ['cpu'], TIERS)
+    assert restored.load()
+    for name in ('raw', '1m'):
+        assert restored.series['server-000'].tier(name).points() == store.series['server-000'].tier(name).points()
+    assert len(restored.series['server-000'].tier('raw').points()) == 5
+    # a store of other fields or tiers is not loaded
+    assert not SeriesStore(path, ['memory'], TIERS).load()
+    assert not SeriesStore(path, ['cpu'], TIERS[:1]).load()
+
+    # the series not updated for longer than the longest retention are dropped
+    restored.prune(now=9990 + 60 * 3)
+    assert list(restored.series) == ['server-000']
+
+
+def test_values_are_exported_with_all_their_digits(tmp_path):
+    assert [format_value(value) for value in (1048576, 1048576.0, 0, -3.0, 0.1, 1234567.25)] == \
+        ['1048576', '1048576', '0', '-3', '0.1', '1234567.25']
+
+    store = SeriesStore(str(tmp_path / 'series.json'), ['memory_mb'], TIERS)
+    store.add('server-000', 120, dict(memory_mb=1048576))
+    assert 'qem_server_memory_mb{server="server-000"} 1048576 120000' in store.to_prometheus('qem_server')
+    output = io.StringIO()
+    store.to_csv(output, 'raw')
+    assert output.getvalue().splitlines()[1] == '1970-01-01T00:02:00Z,server-000,1048576'
+
+
+def test_sampler_stores_the_utilization_of_the_monitored_servers(qem_standin, qem_client, tmp_path):
+    qem_standin.fleet.down.add('server-002')
+    store = utilization_store(str(tmp_path / 'utilization.json'))
+    sampler = UtilizationSampler(qem_client, store, interval=0.2, jitter=0.5, parallelism=2)
+
+    sampler.run(rounds=3)
+
+    assert sorted(store.series) == ['server-000', 'server-001']
+    timestamp, values = store.series['server-000'].last()
+    details = qem_client.get_server_details('server-000').server_details
+    assert values['tasks_total'] == 20
+    assert values['tasks_running'] == details.task_summary.running
+    assert values['memory_mb'] == details.resource_utilization.memory_mb
+    assert len(store.series['server-000'].tier('raw').points()) == 3
+
+    restored = utilization_store(str(tmp_path / 'utilization.json'))
+    assert restored.load()
+    assert set(restored.fields) == set(UTILIZATION_FIELDS)
+    assert 'server-000' in restored.to_prometheus('qem_server')
@@ -0,0 +1,700 @@
+#!/usr/bin/env python
+# A local HTTPS stand-in for Qlik Enterprise Manager: serves the api/v1 routes used by AemClient (module_utils/aem_client.py)
+# from an in-memory fleet of synthetic Replicate/Compose servers, with configurable latency, jitter and error injection.
+# No QEM is needed to run the modules, the tools and the benchmarks against it. The certificate is self-signed
+# (generated with the openssl command line unless --cert/--key are given), use QEM_VERIFY_CERTIFICATE=False.
+#
+#   python tools/qem_standin.py --port 8443 --servers 10 --tasks 100 --latency 0.01 --jitter 0.005 --error-rate 0.01
+#   export QEM_HOSTNAME=127.0.0.1:8443 QEM_DOMAIN=standin QEM_USERNAME=standin QEM_PASSWORD=standin QEM_VERIFY_CERTIFICATE=False
+#
+# From pytest, load the fixtures with "pytest -p qem_standin" (tools/ on the PYTHONPATH) or pytest_plugins = ['qem_standin']
+# in a conftest.py: qem_standin starts a stand-in with a fresh fleet (override qem_standin_options to size it) and sets the
+# QEM_* environment variables, qem_client is an AemClient logged in to it.
+
+import argparse
+import base64
+import copy
+import json
+import os
+import random
+import runpy
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, unquote, urlparse
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urllib import unquote
+    from urlparse import parse_qs, urlparse
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_PREFIX = '/attunityenterprisemanager/api/v1/'
+SESSION_HEADER = 'EnterpriseManager.APISessionID'
+DEFAULT_VERSION = '2022.5.0.291'
+DEFAULT_STANDIN_CREDENTIALS = dict(qem_domain='standin', qem_username='standin', qem_password='standin')
+
+# Share of the synthetic tasks in each state, the rest are STOPPED
+RUNNING_RATIO = 0.8
+ERROR_RATIO = 0.05
+
+
+class StandInError(Exception):
+    # Returned to the client as the QEM error document {"error_code", "error_message"} with the HTTP status
+
+    def __init__(self, status, error_code, error_message):
+        Exception.__init__(self, error_code, error_message)
+        self.status = status
+        self.error_code = error_code
+        self.error_message = error_message
+
+
+def not_found(kind, name):
+    return StandInError(404, 'AEM_{0}_NOT_FOUND'.format(kind.upper()), '{0} "{1}" not found'.format(kind.capitalize(), name))
+
+
+def endpoint_type(endpoint):
+    # "OracleSettings" -> "Oracle", the type shown in the endpoint list
+    settings_type = endpoint.get('db_settings', dict()).get('$type', '')
+    return settings_type[:-len('Settings')] if settings_type.endswith('Settings') else settings_type or endpoint.get('type_id')
+
+
+def synthetic_endpoint(server, name, role):
+    return OrderedDict([
+        ('name', name),
+        ('role', role),
+        ('is_licensed', True),
+        ('type_id', 'ORACLE_COMPONENT_TYPE' if role == 'SOURCE' else 'KAFKA_COMPONENT_TYPE'),
+        ('db_settings', OrderedDict([('$type', 'OracleSettings' if role == 'SOURCE' else 'KafkaSettings'),
+                                     ('username', 'scott'),
+                                     ('server', '//{0}.{1}.contoso.com:1521'.format(name, server))])),
+    ])
+
+
+def synthetic_task_definition(name, source, target, table_count):
+    return OrderedDict([
+        ('task', OrderedDict([('name', name), ('source_name', source), ('target_names', [target])])),
+        ('source', OrderedDict([
+            ('rep_source', OrderedDict([('source_name', source), ('database_name', source)])),
+            ('source_tables', OrderedDict([('name', source), ('explicit_included_tables', [
+                OrderedDict([('owner', 'HR'), ('name', 'TABLE_{0}'.format(table))]) for table in range(table_count)])])),
+        ])),
+        ('targets', [OrderedDict([('rep_target', OrderedDict([('target_name', target), ('database_name', target)]))])]),
+        ('task_settings', OrderedDict([('target_settings', OrderedDict([('max_transaction_size', 1024)]))])),
+    ])
+
+
+def definition_endpoints(definition):
+    # The source and target endpoint names of a task definition
+    names = [definition.get('source', dict()).get('rep_source', dict()).get('database_name')]
+    names.extend(target.get('rep_target', dict()).get('database_name') for target in definition.get('targets', []))
+    return [name for name in names if name]
+
+
+class Fleet(object):
+    # The in-memory model behind the stand-in: the servers with their definition, license, ACL, endpoints and tasks.
+    # Every attribute is a plain JSON-like structure that tests may change directly (under lock) to set up a scenario.
+    # run/stop move a task to its new state after transition_delay seconds. The servers listed in down are reported in
+    # ERROR and every call QEM would proxy to them fails with AEM_SERVER_NOT_CONNECTED.
+
+    def __init__(self, transition_delay=0, seed=0):
+        self.lock = threading.RLock()
+        self.servers = OrderedDict()
+        self.down = set()
+        self.transition_delay = transition_delay
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.started = time.time()
+
+    @classmethod
+    def synthetic(cls, servers=3, tasks=10, endpoints=4, compose=0, table_count=4, transition_delay=0, seed=0):
+        # servers Replicate servers (the last compose ones are Compose servers) with tasks tasks each, spread over
+        # endpoints endpoints (half sources, half targets). Most tasks run, a few are stopped or in error.
+        fleet = cls(transition_delay=transition_delay, seed=seed)
+        for server_index in range(servers):
+            kind = 'compose' if server_index >= servers - compose else 'replicate'
+            name = 'server-{0:03d}'.format(server_index)
+            fleet.add_server(name, kind=kind)
+            sources = ['src-{0:03d}'.format(index) for index in range(max(1, endpoints // 2))]
+            targets = ['tgt-{0:03d}'.format(index) for index in range(max(1, endpoints - len(sources)))]
+            for endpoint in sources:
+                fleet.add_endpoint(name, synthetic_endpoint(name, endpoint, 'SOURCE'))
+            for endpoint in targets:
+                fleet.add_endpoint(name, synthetic_endpoint(name, endpoint, 'TARGET'))
+            for task_index in range(tasks):
+                draw = fleet.random.random()
+                state = 'RUNNING' if draw < RUNNING_RATIO else 'ERROR' if draw < RUNNING_RATIO + ERROR_RATIO else 'STOPPED'
+                fleet.add_task(name, 'task-{0:05d}'.format(task_index), state=state,
+                               source=sources[task_index % len(sources)], target=targets[task_index % len(targets)],
+                               table_count=table_count, assigned_tags=['tag-{0}'.format(task_index % 3)] if task_index % 2 else [])
+        return fleet
+
+    def add_server(self, name, kind='replicate', version=DEFAULT_VERSION, host=None, port=3552):
+        with self.lock:
+            self.servers[name] = dict(
+                kind=kind,
+                definition=OrderedDict([('$type', 'AemComposeServer' if kind == 'compose' else 'AemReplicateServer'),
+                                        ('name', name), ('description', ''), ('host', host or '{0}.contoso.com'.format(name)),
+                                        ('port', port), ('username', 'qlik'), ('monitored', True),
+                                        ('verify_server_certificate', False)]),
+                platform='LINUX',
+                version=version,
+                license=dict(issue_date='2024-01-01T00:00:00', state='VALID_LICENSE', expiration='2099-12-31T00:00:00',
+                             days_to_expiration=3650),
+                acl=None,
+                endpoints=OrderedDict(),
+                tasks=OrderedDict(),
+            )
+            return self.servers[name]
+
+    def add_endpoint(self, server, endpoint):
+        with self.lock:
+            self.server(server)['endpoints'][endpoint['name']] = endpoint
+
+    def add_task(self, server, name, state='STOPPED', source=None, target=None, table_count=4, definition=None,
+                 assigned_tags=None, description=''):
+        # definition is the task item of an export, built from source/target when not given (on demand, large fleets stay cheap)
+        with self.lock:
+            self.server(server)['tasks'][name] = dict(
+                name=name,
+                state=state,
+                stop_reason='NONE' if state == 'RUNNING' else 'RECOVERABLE_ERROR' if state == 'ERROR' else 'NORMAL',
+                message='Unexpected error encountered' if state == 'ERROR' else '',
+                assigned_tags=list(assigned_tags or []),
+                description=description,
+                definition=definition,
+                source=source,
+                target=target,
+                table_count=table_count,
+                pending=None,
+                started=self.started if state == 'RUNNING' else None,
+            )
+
+    def server(self, name):
+        if name not in self.servers:
+            raise not_found('server', name)
+        return self.servers[name]
+
+    def connected_server(self, name):
+        server = self.server(name)
+        if name in self.down:
+            raise StandInError(500, 'AEM_SERVER_NOT_CONNECTED', 'Cannot connect to server "{0}"'.format(name))
+        return server
+
+    def task(self, server, name):
+        tasks = self.connected_server(server)['tasks']
+        if name not in tasks:
+            raise not_found('task', name)
+        return self.settle(tasks[name])
+
+    def settle(self, task):
+        # Applies the run/stop transition once its delay elapsed
+        if task['pending'] and task['pending'][0] <= time.time():
+            task['state'], task['stop_reason'] = task['pending'][1:]
+            task['message'] = ''
+            task['started'] = time.time() if task['state'] == 'RUNNING' else None
+            task['pending'] = None
+        return task
+
+    def task_definition(self, task):
+        if task['definition'] is None:
+            return synthetic_task_definition(task['name'], task['source'], task['target'], task['table_count'])
+        return task['definition']
+
+    def transition(self, task, state, stop_reason):
+        if self.transition_delay:
+            task['pending'] = (time.time() + self.transition_delay, state, stop_reason)
+        else:
+            task['pending'] = (0, state, stop_reason)
+            self.settle(task)
+
+    # Documents, as returned by QEM
+
+    def server_info(self, name):
+        server = self.servers[name]
+        down = name in self.down
+        return OrderedDict([
+            ('$type', 'ComposeServerInfo' if server['kind'] == 'compose' else 'ReplicateServerInfo'),
+            ('name', name), ('description', server['definition'].get('description', '')),
+            ('host', server['definition'].get('host')), ('port', server['definition'].get('port')),
+            ('state', 'ERROR' if down else 'MONITORED' if server['definition'].get('monitored', True) else 'NOT_MONITORED'),
+            ('message', 'Cannot connect to server' if down else ''),
+            ('platform', server['platform']), ('version', server['version']), ('last_connection', None),
+        ])
+
+    def server_details(self, name):
+        server = self.server(name)
+        info = self.server_info(name)
+        states = Counter(self.settle(task)['state'] for task in server['tasks'].values())
+        running = states['RUNNING'] + states['RECOVERY']
+        return dict(server_details=OrderedDict([
+            ('$type', 'ComposeServerDetails' if server['kind'] == 'compose' else 'ReplicateServerDetails'),
+            ('name', name), ('description', info['description']),
+            ('configuration', OrderedDict([('host', info['host']), ('platform', server['platform']), ('port', info['port']),
+                                           ('user_name', server['definition'].get('username'))])),
+            ('state', info['state']), ('message', info['message']), ('version', server['version']),
+            ('license', server['license']), ('last_connection', None),
+            ('task_summary', OrderedDict([('total', len(server['tasks'])), ('running', states['RUNNING']),
+                                          ('stopped', states['STOPPED']), ('recovering', states['RECOVERY']),
+                                          ('error', states['ERROR'])])),
+            ('resource_utilization', OrderedDict([('disk_usage_mb', 20 * running), ('memory_mb', 300 * running),
+                                                  ('attunity_cpu_percentage', min(100, 2 * running)),
+                                                  ('machine_cpu_percentage', min(100, 5 + 2 * running))])),
+        ]))
+
+    def task_info(self, task):
+        return OrderedDict([('name', task['name']), ('state', task['state']), ('stop_reason', task['stop_reason']),
+                            ('message', task['message']), ('assigned_tags', task['assigned_tags'])])
+
+    def task_details(self, server, name):
+        task = self.task(server, name)
+        endpoints = self.servers[server]['endpoints']
+        names = definition_endpoints(self.task_definition(task))
+
+        def task_endpoint(endpoint_name):
+            endpoint = endpoints.get(endpoint_name, dict(name=endpoint_name))
+            return OrderedDict([('name', endpoint_name), ('type', endpoint_type(endpoint))])
+
+        details = OrderedDict([
+            ('$type', 'AemComposeTaskInfoDetailed' if self.servers[server]['kind'] == 'compose' else 'AemTaskInfoDetailed'),
+            ('name', task['name']), ('state', task['state']), ('description', task['description']),
+            ('source_endpoint', task_endpoint(names[0]) if names else None),
+            ('target_endpoint', task_endpoint(names[1]) if len(names) > 1 else None),
+            ('assigned_tags', task['assigned_tags']), ('message', task['message']),
+        ])
+        if self.servers[server]['kind'] == 'compose':
+            return details
+        # The figures grow with the time the task has been running
+        elapsed = int(time.time() - task['started']) if task['started'] else 0
+        running = task['state'] == 'RUNNING'
+        tables = task['table_count']
+        details.update([
+            ('full_load_completed', True),
+            ('full_load_counters', OrderedDict([('tables_completed_count', tables), ('tables_loading_count', 0),
+                                                ('tables_queued_count', 0), ('tables_with_error_count', 0),
+                                                ('records_completed_count', 10000 * tables),
+                                                ('estimated_records_for_all_tables_count', 10000 * tables)])),
+            ('full_load_throughput', OrderedDict([('source_throughput_records_count', 0), ('source_throughput_volume', 0),
+                                                  ('target_throughput_records_count', 0), ('target_throughput_volume', 0)])),
+            ('cdc_event_counters', OrderedDict([('applied_insert_count', 10 * elapsed), ('applied_update_count', 5 * elapsed),
+                                                ('applied_delete_count', elapsed), ('applied_ddl_count', 0)])),
+            ('cdc_transactions_counters', OrderedDict([('incoming_accumulated_changes_in_memory_count', 7 if running else 0),
+                                                       ('incoming_accumulated_changes_on_disk_count', 0)])),
+            ('cdc_throughput', OrderedDict([('source_throughput_records_count', 16 if running else 0),
+                                            ('target_throughput_records_count', 16 if running else 0)])),
+            ('cdc_latency', OrderedDict([('source_latency', '00:00:01'), ('total_latency', '00:00:02' if running else '00:00:00')])),
+            ('memory_mb', 300 if running else 0), ('disk_usage_mb', 20), ('cpu_percentage', 2 if running else 0),
+            ('data_error_count', 0),
+        ])
+        return details
+
+    def export(self, server, task_names, with_endpoints=True):
+        definitions = [self.task_definition(self.task(server, name)) for name in task_names]
+        endpoints = self.servers[server]['endpoints']
+        if with_endpoints:
+            used = set(name for definition in definitions for name in definition_endpoints(definition))
+            databases = [endpoint for name, endpoint in endpoints.items() if name in used]
+        else:
+            databases = []
+        return OrderedDict([
+            ('name', task_names[0] if len(task_names) == 1 else server), ('description', ''),
+            ('_version', OrderedDict([('version', self.servers[server]['version'])])),
+            ('cmd.replication_definition', OrderedDict([('tasks', definitions), ('databases', databases)])),
+        ])
+
+    def import_document(self, server, document, task_name=None):
+        # Adds or replaces the tasks and endpoints of an export; a task import is renamed after the task of the URL
+        self.connected_server(server)
+        replication_definition = document.get('cmd.replication_definition', dict())
+        for endpoint in replication_definition.get('databases', []):
+            self.add_endpoint(server, copy.deepcopy(endpoint))
+        tasks = replication_definition.get('tasks', [])
+        for definition in tasks:
+            definition = copy.deepcopy(definition)
+            if task_name is not None and len(tasks) == 1:
+                definition['task']['name'] = task_name
+            name = definition['task']['name']
+            previous = self.servers[server]['tasks'].get(name)
+            self.add_task(server, name, state=previous['state'] if previous else 'STOPPED', definition=definition,
+                          assigned_tags=previous['assigned_tags'] if previous else [])
+
+    # Routes, named after the AemClient methods
+
+    def handle(self, method, parts, params, body):
+        # Returns (route, document)
+        action = params.get('action')
+        if parts == ['servers'] and method == 'GET':
+            return 'get_server_list', dict(serverList=[self.server_info(name) for name in self.servers])
+        if len(parts) < 2 or parts[0] != 'servers':
+            raise StandInError(404, 'AEM_NOT_FOUND', 'No route for {0} {1}'.format(method, '/'.join(parts)))
+        server, rest = parts[1], parts[2:]
+        if not rest:
+            if action == 'acl':
+                return self.handle_acl(method, server, body)
+            if action == 'export' and method == 'GET':
+                self.connected_server(server)
+                return 'export_all', self.export(server, list(self.servers[server]['tasks']))
+            if action == 'import' and method == 'POST':
+                self.import_document(server, json.loads(body))
+                return 'import_all', None
+            if action is None and method == 'GET':
+                return 'get_server_details', self.server_details(server)
+        elif rest == ['def']:
+            return self.handle_server_definition(method, server, body)
+        elif rest == ['license', 'def'] and method == 'PUT':
+            self.connected_server(server)['license'].update(state='VALID_LICENSE', issue_date=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            return 'put_server_license', None
+        elif rest == ['tasks'] and method == 'GET':
+            tasks = self.connected_server(server)['tasks'].values()
+            return 'get_task_list', dict(taskList=[self.task_info(self.settle(task)) for task in tasks])
+        elif rest[0] == 'tasks' and len(rest) in (2, 3):
+            return self.handle_task(method, server, rest[1], rest[2:], action, params, body)
+        elif rest == ['endpoints'] and method == 'GET':
+            endpoints = self.connected_server(server)['endpoints'].values()
+            return 'get_endpoint_list', dict(endpointList=[OrderedDict([
+                ('name', endpoint['name']), ('description', endpoint.get('description', '')), ('role', endpoint['role']),
+                ('type', endpoint_type(endpoint)), ('is_licensed', endpoint.get('is_licensed', True)),
+                ('type_id', endpoint.get('type_id'))]) for endpoint in endpoints])
+        elif rest[0] == 'endpoints' and len(rest) == 2:
+            return self.handle_endpoint(method, server, rest[1], action)
+        raise StandInError(404, 'AEM_NOT_FOUND', 'No route for {0} {1}'.format(method, '/'.join(parts)))
+
+    def handle_acl(self, method, server, body):
+        acl_server = self.server(server)
+        if method == 'GET':
+            if acl_server['acl'] is None:
+                raise StandInError(400, 'AEM_SERVER_HAS_NO_ACL', 'Server "{0}" has no ACL'.format(server))
+            return 'get_server_acl', acl_server['acl']
+        if method == 'PUT':
+            acl_server['acl'] = json.loads(body)
+            return 'put_server_acl', None
+        if method == 'DELETE':
+            acl_server['acl'] = None
+            return 'delete_server_acl', None
+        raise StandInError(405, 'AEM_NOT_FOUND', 'Method {0} not allowed'.format(method))
+
+    def handle_server_definition(self, method, server, body):
+        if method == 'GET':
+            definition = dict(self.server(server)['definition'])
+            definition.pop('password', None)
+            return 'get_server', definition
+        if method == 'PUT':
+            definition = json.loads(body, object_pairs_hook=OrderedDict)
+            if server not in self.servers:
+                self.add_server(server, kind='compose' if 'Compose' in definition.get('$type', '') else 'replicate')
+            self.servers[server]['definition'].update(definition)
+            return 'put_server', None
+        if method == 'DELETE':
+            self.server(server)
+            del self.servers[server]
+            self.down.discard(server)
+            return 'delete_server', None
+        raise StandInError(405, 'AEM_NOT_FOUND', 'Method {0} not allowed'.format(method))
+
+    def handle_task(self, method, server, name, rest, action, params, body):
+        if rest == ['tables'] and action == 'reload' and method == 'POST':
+            task = self.task(server, name)
+            tables = self.task_definition(task).get('source', dict()).get('source_tables', dict()).get('explicit_included_tables', [])
+            if not any(table.get('owner') == params.get('schema') and table.get('name') == params.get('table') for table in tables):
+                raise StandInError(404, 'AEM_TABLE_NOT_FOUND', 'Table "{0}.{1}" not found in task "{2}"'.format(
+                    params.get('schema'), params.get('table'), name))
+            return 'reload_table', None
+        if rest:
+            raise StandInError(404, 'AEM_NOT_FOUND', 'No route for task {0}'.format('/'.join(rest)))
+        if method == 'GET' and action is None:
+            return 'get_task_details', self.task_details(server, name)
+        if method == 'GET' and action == 'export':
+            return 'export_task', self.export(server, [name], params.get('withendpoints', 'False').lower() == 'true')
+        if method == 'POST' and action == 'import':
+            self.import_document(server, json.loads(body), task_name=name)
+            return 'import_task', None
+        if method == 'POST' and action == 'run':
+            task = self.task(server, name)
+            if task['state'] != 'RUNNING':
+                self.transition(task, 'RUNNING', 'NONE')
+            return 'run_task', OrderedDict([('state', task['state']), ('error_message', '')])
+        if method == 'POST' and action == 'stop':
+            task = self.task(server, name)
+            if task['state'] != 'STOPPED':
+                self.transition(task, 'STOPPED', 'NORMAL')
+            return 'stop_task', OrderedDict([('state', task['state']), ('error_message', '')])
+        if method == 'POST' and action == 'delete':
+            self.task(server, name)
+            del self.servers[server]['tasks'][name]
+            return 'delete_task', None
+        raise StandInError(404, 'AEM_NOT_FOUND', 'No route for {0} task action {1}'.format(method, action))
+
+    def handle_endpoint(self, method, server, name, action):
+        endpoints = self.connected_server(server)['endpoints']
+        if name not in endpoints:
+            raise not_found('endpoint', name)
+        if method == 'GET' and action == 'test':
+            if endpoints[name].get('test_error'):
+                return 'test_endpoint', OrderedDict([('status', 'ERROR'), ('message', endpoints[name]['test_error']),
+                                                     ('detailed_message', endpoints[name]['test_error'])])
+            return 'test_endpoint', OrderedDict([('status', 'CONNECTED'), ('message', ''), ('detailed_message', '')])
+        if method == 'POST' and action == 'delete':
+            used = [task['name'] for task in self.servers[server]['tasks'].values() if name in definition_endpoints(self.task_definition(task))]
+            if used:
+                raise StandInError(400, 'AEM_ENDPOINT_IN_USE', 'Endpoint "{0}" is used by the tasks {1}'.format(name, ', '.join(used)))
+            del endpoints[name]
+            return 'delete_endpoint', None
+        if method == 'PUT' and action == 'reconfigure':
+            return 'reconfigure_endpoint_no_wait', None
+        raise StandInError(404, 'AEM_NOT_FOUND', 'No route for {0} endpoint action {1}'.format(method, action))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # One request: checks the session, waits the injected latency, maybe injects an error, then routes it to the fleet
+    protocol_version = 'HTTP/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.standin.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def send_document(self, status, document, headers=None):
+        body = json.dumps(document).encode('utf-8') if document is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        standin = self.server.standin
+        url = urlparse(self.path)
+        if not url.path.startswith(API_PREFIX):
+            return self.send_document(404, dict(error_code='AEM_NOT_FOUND', error_message='Not found: {0}'.format(url.path)))
+        # AemClient quotes the path and query parameters twice
+        parts = [unquote(unquote(part)) for part in url.path[len(API_PREFIX):].strip('/').split('/') if part]
+        params = dict((key, unquote(values[-1])) for key, values in parse_qs(url.query, keep_blank_values=True).items())
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else None
+        try:
+            if parts == ['login']:
+                session = standin.login(self.headers.get('Authorization'))
+                return self.send_document(200, None, {SESSION_HEADER: session})
+            standin.check_session(self.headers.get(SESSION_HEADER))
+            standin.delay()
+            standin.inject_error()
+            with standin.fleet.lock:
+                route = None
+                try:
+                    route, document = standin.fleet.handle(self.command, parts, params, body)
+                finally:
+                    standin.fleet.requests[route or 'unknown'] += 1
+        except StandInError as ex:
+            return self.send_document(ex.status, OrderedDict([('error_code', ex.error_code), ('error_message', ex.error_message)]))
+        except Exception as ex:
+            return self.send_document(500, OrderedDict([('error_code', 'AEM_INTERNAL_ERROR'), ('error_message', str(ex))]))
+        self.send_document(200, document if document is not None else dict())
+
+    do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+
+class StandInHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def generate_certificate(directory):
+    # A self-signed certificate for localhost, with the openssl command line
+    cert_path = os.path.join(directory, 'standin.crt')
+    key_path = os.path.join(directory, 'standin.key')
+    try:
+        subprocess.check_call(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '30', '-subj', '/CN=localhost',
+                               '-keyout', key_path, '-out', cert_path],
+                              stdout=open(os.devnull, 'w'), stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError) as ex:
+        raise Exception('Impossible to generate the stand-in certificate with openssl ({0}), use --cert and --key'.format(ex))
+    return cert_path, key_path
+
+
+class QemStandIn(object):
+    # The HTTPS server, started in a background thread. latency and jitter (seconds) delay every request after the login
+    # by latency +/- jitter; error_rate is the probability of answering a request with error_code (HTTP 500) instead.
+    # credentials ('DOMAIN\\user', 'password') restricts the login, any user is accepted by default.
+
+    def __init__(self, fleet=None, host='127.0.0.1', port=0, cert=None, key=None, latency=0, jitter=0, error_rate=0,
+                 error_code='AEM_INTERNAL_ERROR', credentials=None, seed=None, verbose=False):
+        self.fleet = fleet if fleet is not None else Fleet.synthetic()
+        self.host = host
+        self.port = port
+        self.cert = cert
+        self.key = key
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.credentials = credentials
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.sessions = set()
+        self.sessions_lock = threading.Lock()
+        self.httpd = None
+        self.thread = None
+        self.cert_dir = None
+
+    @property
+    def hostname(self):
+        # The qem_hostname (QEM_HOSTNAME) of the stand-in
+        return '{0}:{1}'.format(self.host, self.port)
+
+    def environment(self):
+        return dict(QEM_HOSTNAME=self.hostname, QEM_DOMAIN=DEFAULT_STANDIN_CREDENTIALS['qem_domain'],
+                    QEM_USERNAME=DEFAULT_STANDIN_CREDENTIALS['qem_username'],
+                    QEM_PASSWORD=DEFAULT_STANDIN_CREDENTIALS['qem_password'], QEM_VERIFY_CERTIFICATE='False')
+
+    def start(self):
+        if self.cert is None:
+            self.cert_dir = tempfile.mkdtemp(prefix='qem-standin-')
+            self.cert, self.key = generate_certificate(self.cert_dir)
+        self.httpd = StandInHTTPServer((self.host, self.port), StandInHandler)
+        self.httpd.standin = self
+        context = ssl.SSLContext(getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23))
+        context.load_cert_chain(self.cert, self.key)
+        # the handshake is done by the request thread, a slow client does not block the others
+        self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True, do_handshake_on_connect=False)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='qem-standin')
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+        if self.cert_dir is not None:
+            shutil.rmtree(self.cert_dir, ignore_errors=True)
+            self.cert_dir = self.cert = self.key = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def login(self, authorization):
+        if self.credentials is not None:
+            expected = 'Basic ' + base64.b64encode('{0}:{1}'.format(*self.credentials).encode('utf-8')).decode('ascii')
+            if authorization != expected:
+                raise StandInError(401, 'AEM_LOGIN_FAILED', 'Invalid user name or password')
+        session = uuid.uuid4().hex
+        with self.sessions_lock:
+            self.sessions.add(session)
+        return session
+
+    def check_session(self, session):
+        with self.sessions_lock:
+            if session not in self.sessions:
+                raise StandInError(401, 'AEM_SESSION_EXPIRED', 'The session is not valid, login again')
+
+    def expire_sessions(self):
+        with self.sessions_lock:
+            self.sessions.clear()
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+    def inject_error(self):
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise StandInError(500, self.error_code, 'Error injected by the stand-in')
+
+    def client(self):
+        # An AemClient logged in to the stand-in
+        runpy.run_path(os.path.join(ROLE_DIR, 'module_utils', 'qem_paths.py'))
+        from ansible.module_utils.qem_common import create_qem_client
+        return create_qem_client(qem_hostname=self.hostname, qem_verify_certificate=False, **DEFAULT_STANDIN_CREDENTIALS)
+
+
+if pytest is not None:
+
+    @pytest.fixture
+    def qem_standin_options():
+        # Override in a test module or conftest.py to size the fleet or inject latency/errors
+        return dict(servers=3, tasks=10)
+
+    @pytest.fixture(scope='session')
+    def qem_standin_certificate(tmp_path_factory):
+        return generate_certificate(str(tmp_path_factory.mktemp('qem-standin')))
+
+    @pytest.fixture
+    def qem_standin(qem_standin_options, qem_standin_certificate, monkeypatch):
+        options = dict(qem_standin_options)
+        fleet_options = dict((key, options.pop(key)) for key in ('servers', 'tasks', 'endpoints', 'compose', 'table_count',
+                                                                 'transition_delay', 'seed') if key in options)
+        cert, key = qem_standin_certificate
+        standin = QemStandIn(Fleet.synthetic(**fleet_options), cert=cert, key=key, **options)
+        with standin:
+            for name, value in standin.environment().items():
+                monkeypatch.setenv(name, value)
+            yield standin
+
+    @pytest.fixture
+    def qem_client(qem_standin):
+        return qem_standin.client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a synthetic Qlik Enterprise Manager fleet over HTTPS')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8443, help='0 picks a free port')
+    parser.add_argument('--servers', type=int, default=3, help='number of servers')
+    parser.add_argument('--tasks', type=int, default=10, help='number of tasks per server')
+    parser.add_argument('--endpoints', type=int, default=4, help='number of endpoints per server')
+    parser.add_argument('--compose', type=int, default=0, help='how many of the servers are Compose servers')
+    parser.add_argument('--transition-delay', type=float, default=2, help='seconds a task takes to start or stop')
+    parser.add_argument('--down', action='append', default=[], help='a server which cannot be reached (repeatable)')
+    parser.add_argument('--latency', type=float, default=0, help='seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0, help='random +/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='probability of failing a request')
+    parser.add_argument('--error-code', default='AEM_INTERNAL_ERROR', help='the error code of the failed requests')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cert', help='the PEM certificate, a self-signed one is generated by default')
+    parser.add_argument('--key', help='the PEM private key of --cert')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+    if bool(args.cert) != bool(args.key):
+        parser.error('--cert and --key go together')
+
+    fleet = Fleet.synthetic(args.servers, args.tasks, args.endpoints, args.compose, transition_delay=args.transition_delay, seed=args.seed)
+    fleet.down.update(args.down)
+    standin = QemStandIn(fleet, args.host, args.port, args.cert, args.key, args.latency, args.jitter, args.error_rate,
+                         args.error_code, seed=args.seed, verbose=args.verbose)
+    standin.start()
+    sys.stderr.write('QEM stand-in listening on https://{0}/attunityenterprisemanager\nexport {1}\n'.format(
+        standin.hostname, ' '.join('{0}={1}'.format(name, value) for name, value in sorted(standin.environment().items()))))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
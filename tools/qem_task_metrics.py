@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# Collects the full load and CDC figures of Replicate tasks (module_utils/qem_task_metrics.py) into a local store,
+# exports them and reports the tasks whose CDC latency keeps growing.
+# The credentials are read like the modules do, from the QEM_* environment variables or ~/.qem/credentials.
+#
+#   python tools/qem_task_metrics.py collect --server "My Sample Server" --interval 30
+#   python tools/qem_task_metrics.py trends --min-slope 2
+#   python tools/qem_task_metrics.py csv --tier 1m
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+
+# Makes the role module_utils importable, see module_utils/qem_paths.py
+ROLE_DIR = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))['ROLE_DIR']
+
+from ansible.module_utils.qem_common import create_qem_client, resolve_credentials
+from ansible.module_utils.qem_task_metrics import DEFAULT_TASK_METRICS_STORE, TaskMetricsCollector, latency_trends, task_metrics_store
+from ansible.module_utils.qem_timeseries import DEFAULT_TIERS
+
+
+def log(msg):
+    sys.stderr.write('{0} {1}\n'.format(time.strftime('%Y-%m-%dT%H:%M:%S'), msg))
+
+
+def select_tasks(aem_client, servers, tasks):
+    # --task server/name entries, plus every task of the --server servers
+    selected = [tuple(task.split('/', 1)) for task in tasks or []]
+    for server in servers or []:
+        selected.extend((server, task.name) for task in aem_client.get_task_list(server).taskList)
+    return selected
+
+
+def collect(args, store):
+    credentials = resolve_credentials(dict(profile=args.profile))
+    if not credentials:
+        raise SystemExit('Impossible to retrieve credentials from (in order) the env vars or ~/.qem/credentials profile file')
+    aem_client = create_qem_client(**credentials)
+    collector = TaskMetricsCollector(aem_client, [], store, args.parallelism)
+    done = 0
+    try:
+        while args.rounds is None or done < args.rounds:
+            start = time.time()
+            try:
+                # the task lists are read again every round, new tasks are picked up
+                collector.tasks = select_tasks(aem_client, args.server, args.task)
+                sampled = collector.collect_once()
+                log('sampled {0} tasks{1}'.format(sampled, ', errors: {0}'.format(collector.errors) if collector.errors else ''))
+            except Exception as ex:
+                log('sampling failed: {0}'.format(getattr(ex, 'message', None) or ex))
+            done += 1
+            if done % args.persist_every == 0:
+                store.save()
+            if args.rounds is None or done < args.rounds:
+                time.sleep(max(0, args.interval - (time.time() - start)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collect the full load and CDC figures of Replicate tasks')
+    parser.add_argument('--store', default=DEFAULT_TASK_METRICS_STORE, help='the store file')
+    commands = parser.add_subparsers(dest='command')
+    collect_parser = commands.add_parser('collect', help='sample the tasks every interval')
+    collect_parser.add_argument('--server', action='append', help='sample every task of this server (repeatable)')
+    collect_parser.add_argument('--task', action='append', help='sample this task, as server/task (repeatable)')
+    collect_parser.add_argument('--interval', type=float, default=30, help='seconds between two rounds')
+    collect_parser.add_argument('--parallelism', type=int, default=8)
+    collect_parser.add_argument('--rounds', type=int, help='stop after this number of rounds, run until interrupted by default')
+    collect_parser.add_argument('--persist-every', type=int, default=1, help='save the store every this number of rounds')
+    collect_parser.add_argument('--profile', help='the ~/.qem/credentials profile')
+    trends_parser = commands.add_parser('trends', help='list the tasks whose CDC latency grows, exits with 2 if any')
+    trends_parser.add_argument('--tier', default='1m', choices=[name for name, width, capacity in DEFAULT_TIERS])
+    trends_parser.add_argument('--window', type=int, default=30, help='number of points of the tier considered')
+    trends_parser.add_argument('--min-slope', type=float, default=1.0, help='seconds of latency gained per minute')
+    trends_parser.add_argument('--min-latency', type=float, default=10, help='ignore the tasks whose latest latency is lower (seconds)')
+    prometheus_parser = commands.add_parser('prometheus', help='export the latest values in the Prometheus text format')
+    prometheus_parser.add_argument('--prefix', default='qem_task')
+    csv_parser = commands.add_parser('csv', help='export the points of a tier as CSV')
+    csv_parser.add_argument('--tier', default='raw', choices=[name for name, width, capacity in DEFAULT_TIERS])
+    args = parser.parse_args()
+
+    store = task_metrics_store(args.store)
+    store.load()
+    if args.command == 'collect':
+        if not args.server and not args.task:
+            parser.error('collect requires --server or --task')
+        collect(args, store)
+    elif args.command == 'trends':
+        trends = latency_trends(store, args.tier, args.window, args.min_slope, args.min_latency)
+        json.dump(trends, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        sys.exit(2 if trends else 0)
+    elif args.command == 'prometheus':
+        sys.stdout.write(store.to_prometheus(args.prefix, label='task'))
+    elif args.command == 'csv':
+        store.to_csv(sys.stdout, args.tier, label='task')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# Prints the task state transitions of the servers managed by QEM as JSON lines (module_utils/qem_watch.py), until interrupted.
+# The credentials are read like the modules do, from the QEM_* environment variables or ~/.qem/credentials.
+#
+#   python tools/qem_task_watch.py --server all >> task_events.jsonl
+
+import argparse
+import json
+import os
+import runpy
+import sys
+
+# Makes the role module_utils importable, see module_utils/qem_paths.py
+ROLE_DIR = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))['ROLE_DIR']
+
+from ansible.module_utils.qem_common import create_qem_client, resolve_credentials
+from ansible.module_utils.qem_watch import DEFAULT_WATCH_SNAPSHOT, TaskWatcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the task state transitions as JSON lines')
+    parser.add_argument('--server', action='append', required=True, help='a server to watch (repeatable), or all')
+    parser.add_argument('--snapshot', default=DEFAULT_WATCH_SNAPSHOT, help='the file keeping the last states between runs')
+    parser.add_argument('--min-interval', type=float, default=5)
+    parser.add_argument('--max-interval', type=float, default=120)
+    parser.add_argument('--duration', type=float, help='stop after this number of seconds, run until interrupted by default')
+    parser.add_argument('--parallelism', type=int, default=8)
+    parser.add_argument('--profile', help='the ~/.qem/credentials profile')
+    args = parser.parse_args()
+
+    credentials = resolve_credentials(dict(profile=args.profile))
+    if not credentials:
+        raise SystemExit('Impossible to retrieve credentials from (in order) the env vars or ~/.qem/credentials profile file')
+    aem_client = create_qem_client(**credentials)
+    servers = args.server
+    if servers == ['all']:
+        servers = [server_info.name for server_info in aem_client.get_server_list().serverList]
+
+    def emit(event):
+        sys.stdout.write(json.dumps(event, sort_keys=True) + '\n')
+        sys.stdout.flush()
+
+    watcher = TaskWatcher(aem_client, servers, args.snapshot, args.min_interval, args.max_interval, parallelism=args.parallelism)
+    try:
+        watcher.watch(emit, args.duration)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
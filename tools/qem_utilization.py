@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# Samples the utilization of the servers managed by QEM into a local store (module_utils/qem_utilization.py) and exports it.
+# The credentials are read like the modules do, from the QEM_* environment variables or ~/.qem/credentials.
+#
+#   python tools/qem_utilization.py sample --interval 60
+#   python tools/qem_utilization.py prometheus --output /var/lib/node_exporter/qem.prom
+#   python tools/qem_utilization.py csv --tier 1h
+
+import argparse
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+# Makes the role module_utils importable, see module_utils/qem_paths.py
+ROLE_DIR = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_utils', 'qem_paths.py'))['ROLE_DIR']
+
+from ansible.module_utils.qem_common import create_qem_client, resolve_credentials
+from ansible.module_utils.qem_timeseries import DEFAULT_TIERS
+from ansible.module_utils.qem_utilization import DEFAULT_UTILIZATION_STORE, UtilizationSampler, utilization_store
+
+
+def log(msg):
+    sys.stderr.write('{0} {1}\n'.format(time.strftime('%Y-%m-%dT%H:%M:%S'), msg))
+
+
+def sample(args, store):
+    credentials = resolve_credentials(dict(profile=args.profile))
+    if not credentials:
+        raise SystemExit('Impossible to retrieve credentials from (in order) the env vars or ~/.qem/credentials profile file')
+    sampler = UtilizationSampler(create_qem_client(**credentials), store, interval=args.interval, jitter=args.jitter,
+                                 parallelism=args.parallelism, servers=args.server)
+    try:
+        sampler.run(rounds=args.rounds, persist_every=args.persist_every, log=log)
+    except KeyboardInterrupt:
+        pass
+
+
+def write_output(path, content):
+    # Atomic replacement so a scraper never reads a partial file
+    if not path:
+        sys.stdout.write(content)
+        return
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(handle, 'w') as output:
+        output.write(content)
+    os.rename(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sample and export the utilization of the servers managed by QEM')
+    parser.add_argument('--store', default=DEFAULT_UTILIZATION_STORE, help='the store file')
+    commands = parser.add_subparsers(dest='command')
+    sample_parser = commands.add_parser('sample', help='sample the servers every interval')
+    sample_parser.add_argument('--interval', type=float, default=60, help='seconds between two rounds')
+    sample_parser.add_argument('--jitter', type=float, default=0.2, help='random start offset of each server call, as a ratio of the interval')
+    sample_parser.add_argument('--parallelism', type=int, default=8)
+    sample_parser.add_argument('--rounds', type=int, help='stop after this number of rounds, run until interrupted by default')
+    sample_parser.add_argument('--persist-every', type=int, default=1, help='save the store every this number of rounds')
+    sample_parser.add_argument('--server', action='append', help='sample only this server (repeatable), all the monitored servers by default')
+    sample_parser.add_argument('--profile', help='the ~/.qem/credentials profile')
+    prometheus_parser = commands.add_parser('prometheus', help='export the latest values in the Prometheus text format')
+    prometheus_parser.add_argument('--output', help='the file to write, stdout by default')
+    prometheus_parser.add_argument('--prefix', default='qem_server')
+    csv_parser = commands.add_parser('csv', help='export the points of a tier as CSV')
+    csv_parser.add_argument('--tier', default='raw', choices=[name for name, width, capacity in DEFAULT_TIERS])
+    args = parser.parse_args()
+
+    store = utilization_store(args.store)
+    store.load()
+    if args.command == 'sample':
+        sample(args, store)
+    elif args.command == 'prometheus':
+        write_output(args.output, store.to_prometheus(args.prefix))
+    elif args.command == 'csv':
+        store.to_csv(sys.stdout, args.tier)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()